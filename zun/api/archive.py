@@ -0,0 +1,115 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Stream the archives of the containers from and to the compute hosts.
+
+The archive data flows between the API and the archive endpoint of the
+compute host in chunks of [api]archive_chunk_size bytes, so that neither the
+API nor the message bus hold the archive in memory. The compute host issues
+the URL of the endpoint, with a single use token, over RPC; the API never
+connects to the container engine.
+"""
+
+import base64
+import contextlib
+import functools
+import sys
+
+from oslo_log import log as logging
+from oslo_serialization import jsonutils
+import requests
+import six
+
+from zun.common import exception
+import zun.conf
+
+CONF = zun.conf.CONF
+LOG = logging.getLogger(__name__)
+
+STAT_HEADER = 'X-Container-Path-Stat'
+
+
+def _translate_request_error(function):
+    @functools.wraps(function)
+    def decorated_function(*args, **kwargs):
+        try:
+            return function(*args, **kwargs)
+        except requests.RequestException as e:
+            desired_exc = exception.DockerError(error_msg=six.text_type(e))
+            six.reraise(type(desired_exc), desired_exc, sys.exc_info()[2])
+
+    return decorated_function
+
+
+def _verify():
+    return CONF.api.archive_ca_file or True
+
+
+def _check_response(response):
+    if response.ok:
+        return
+    message = response.text
+    response.close()
+    if response.status_code == 404:
+        raise exception.Invalid(message)
+    raise exception.DockerError(error_msg=message)
+
+
+def _read_stream(response):
+    # NOTE: The response has started when the stream is read, an error can
+    # only abort the transfer.
+    with contextlib.closing(response):
+        try:
+            for chunk in response.iter_content(CONF.api.archive_chunk_size):
+                yield chunk
+        except Exception as e:
+            LOG.error('Failed to stream the archive: %s', six.text_type(e))
+            raise
+
+
+@_translate_request_error
+def get_archive(url, path):
+    """Get the archive of a path of a container.
+
+    :param url: the URL of the archive of the container, as issued by its
+                compute host.
+    :returns: a generator of the chunks of the tar archive, and the stat of
+              the path.
+    """
+    response = requests.get(url, params={'path': path}, stream=True,
+                            verify=_verify())
+    _check_response(response)
+    stat = jsonutils.loads(base64.b64decode(response.headers[STAT_HEADER]))
+    return _read_stream(response), stat
+
+
+def _read_chunks(data_file):
+    while True:
+        chunk = data_file.read(CONF.api.archive_chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+@_translate_request_error
+def put_archive(url, path, data_file):
+    """Extract an archive read from a file into a path of a container.
+
+    :param url: the URL of the archive of the container, as issued by its
+                compute host.
+    :param data_file: a file object of the tar archive, it is read and sent
+                      one chunk at a time.
+    """
+    response = requests.put(url, params={'path': path},
+                            data=_read_chunks(data_file), verify=_verify())
+    _check_response(response)
+    response.close()
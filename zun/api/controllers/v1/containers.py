@@ -13,15 +13,18 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import base64
 import shlex
 
 from neutronclient.common import exceptions as n_exc
 from oslo_log import log as logging
+from oslo_serialization import jsonutils
 from oslo_utils import strutils
 from oslo_utils import uuidutils
 import pecan
 import six
 
+from zun.api import archive
 from zun.api.controllers import base
 from zun.api.controllers import link
 from zun.api.controllers.v1 import collection
@@ -1017,6 +1020,7 @@ class ContainersController(base.Controller):
         compute_api = pecan.request.compute_api
         return compute_api.container_top(context, container, ps_args)
 
+    @base.Controller.api_version("1.1", "1.24")
     @pecan.expose('json')
     @exception.wrap_pecan_controller_exception
     def get_archive(self, container_ident, **kwargs):
@@ -1038,6 +1042,34 @@ class ContainersController(base.Controller):
             context, container, kwargs['path'])
         return {"data": data, "stat": stat}
 
+    @base.Controller.api_version("1.25")  # noqa
+    @pecan.expose('json')
+    @exception.wrap_pecan_controller_exception
+    def get_archive(self, container_ident, **kwargs):
+        """Retrieve a file/folder from a container
+
+        Retrieve a file or folder from a container in the form of a tar
+        archive, streamed in the response body. The stat of the path is
+        returned in the 'Container-Path-Stat' header as base64 encoded JSON.
+        :param container_ident: UUID or Name of a container.
+        """
+        container = utils.get_container(container_ident)
+        check_policy_on_container(container.as_dict(), "container:get_archive")
+        utils.validate_container_state(container, 'get_archive')
+        LOG.debug('Streaming the archive of container %(uuid)s '
+                  'path %(path)s',
+                  {'uuid': container.uuid, 'path': kwargs['path']})
+        context = pecan.request.context
+        compute_api = pecan.request.compute_api
+        url = compute_api.container_get_archive_url(context, container)
+        stream, stat = archive.get_archive(url, kwargs['path'])
+        pecan.response.content_type = 'application/x-tar'
+        pecan.response.headers['Container-Path-Stat'] = base64.b64encode(
+            jsonutils.dump_as_bytes(stat)).decode('ascii')
+        pecan.response.app_iter = stream
+        return pecan.response
+
+    @base.Controller.api_version("1.1", "1.24")
     @pecan.expose('json')
     @exception.wrap_pecan_controller_exception
     def put_archive(self, container_ident, **kwargs):
@@ -1058,6 +1090,28 @@ class ContainersController(base.Controller):
         compute_api.container_put_archive(context, container,
                                           kwargs['path'], kwargs['data'])
 
+    @base.Controller.api_version("1.25")  # noqa
+    @pecan.expose('json')
+    @api_utils.enforce_content_types(['application/x-tar'])
+    @exception.wrap_pecan_controller_exception
+    def put_archive(self, container_ident, **kwargs):
+        """Insert a file/folder to container.
+
+        Insert a file or folder to an existing container using the tar
+        archive streamed in the request body as source.
+        :param container_ident: UUID or Name of a container.
+        """
+        container = utils.get_container(container_ident)
+        check_policy_on_container(container.as_dict(), "container:put_archive")
+        utils.validate_container_state(container, 'put_archive')
+        LOG.debug('Streaming an archive to container %(uuid)s '
+                  'path %(path)s',
+                  {'uuid': container.uuid, 'path': kwargs['path']})
+        context = pecan.request.context
+        compute_api = pecan.request.compute_api
+        url = compute_api.container_get_archive_url(context, container)
+        archive.put_archive(url, kwargs['path'], pecan.request.body_file)
+
     @pecan.expose('json')
     @exception.wrap_pecan_controller_exception
     def stats(self, container_ident):
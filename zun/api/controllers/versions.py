@@ -57,10 +57,11 @@ REST_API_VERSION_HISTORY = """REST API Version History:
     * 1.22 - Add healthcheck to container create
     * 1.23 - Add CPUSet support
     * 1.24 - Add DNS support
+    * 1.25 - Stream the archives of get_archive and put_archive
 """
 
 BASE_VER = '1.1'
-CURRENT_MAX_VER = '1.24'
+CURRENT_MAX_VER = '1.25'
 
 
 class Version(object):
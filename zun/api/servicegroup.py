@@ -20,9 +20,19 @@ CONF = zun.conf.CONF
 
 
 class ServiceGroup(object):
+    # NOTE: The service records are cached per process and shared by all
+    # the ServiceGroup objects. The cache is keyed by binary, each entry
+    # being the time the services were listed and a dict of the services
+    # keyed by host.
+    _service_cache = {}
+
     def __init__(self):
         self.service_down_time = CONF.service_down_time
 
+    @classmethod
+    def reset_cache(cls):
+        cls._service_cache.clear()
+
     def service_is_up(self, member):
         if not isinstance(member, objects.ZunService):
             raise TypeError
@@ -35,3 +45,38 @@ class ServiceGroup(object):
         elapsed = timeutils.delta_seconds(last_heartbeat, now)
         is_up = abs(elapsed) <= self.service_down_time
         return is_up
+
+    def get_services(self, context, binary='zun-compute'):
+        """Return the services of a binary, read from the cache."""
+        return list(self._get_cached_services(context, binary).values())
+
+    def get_service(self, context, host, binary='zun-compute'):
+        """Return the service of a binary on a host, or None.
+
+        The service is read from the cache. A host missing from the cache
+        is looked up in the database alone.
+        """
+        services = self._get_cached_services(context, binary)
+        service = services.get(host)
+        if service is None:
+            service = objects.ZunService.get_by_host_and_binary(
+                context, host, binary)
+            if service is not None:
+                services[host] = service
+        return service
+
+    def host_is_up(self, context, host, binary='zun-compute'):
+        """Return whether the service of a binary on a host is up."""
+        service = self.get_service(context, host, binary)
+        return service is not None and self.service_is_up(service)
+
+    def _get_cached_services(self, context, binary):
+        now = timeutils.utcnow()
+        cached = self._service_cache.get(binary)
+        if (cached is None or
+                timeutils.delta_seconds(cached[0], now) >=
+                CONF.service_cache_time):
+            services = objects.ZunService.list_by_binary(context, binary)
+            cached = (now, {service.host: service for service in services})
+            self._service_cache[binary] = cached
+        return cached[1]
@@ -46,4 +46,8 @@ def main():
     server = rpc_service.Service.create(CONF.compute.topic, CONF.host,
                                         endpoints, binary='zun-compute')
     launcher = service.launch(CONF, server, restart_method='mutate')
+    # NOTE: The archive server runs in this process, as it checks the
+    # tokens issued by the RPC server.
+    from zun.container.docker import archive_server
+    launcher.launch_service(archive_server.create_server())
     launcher.wait()
@@ -0,0 +1,62 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""A per-process cache whose entries expire after a time to live."""
+
+import time
+
+
+class TTLCache(object):
+    """A dict-like cache of the values set in the last ttl seconds.
+
+    :param ttl: a callable returning the time to live in seconds, so that it
+                can follow a config option. Nothing is cached when it
+                returns 0.
+    :param max_entries: the oldest entries are dropped beyond this size.
+    """
+
+    def __init__(self, ttl, max_entries=1024):
+        self._ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        value, cached_at = entry
+        if time.time() - cached_at >= self._ttl():
+            self._entries.pop(key, None)
+            return default
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, self) is not self
+
+    def set(self, key, value):
+        if not self._ttl():
+            return
+        if key not in self._entries and \
+                len(self._entries) >= self.max_entries:
+            # Drop the oldest half of the entries
+            entries = sorted(self._entries.items(),
+                             key=lambda item: item[1][1])
+            for old_key, entry in entries[:len(entries) // 2]:
+                self._entries.pop(old_key, None)
+        self._entries[key] = (value, time.time())
+
+    def pop(self, key, default=None):
+        entry = self._entries.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        self._entries.clear()
@@ -328,6 +328,11 @@ class ConflictOptions(Conflict):
     message = _('Conflicting options.')
 
 
+class ConcurrentUpdate(Conflict):
+    message = _("%(resource)s %(id)s was modified concurrently, please "
+                "retry.")
+
+
 class InvalidState(Conflict):
     message = _("Invalid resource state.")
 
@@ -442,6 +447,11 @@ class ImageAlreadyExists(ResourceExists):
     message = _("An image with tag %(tag)s and repo %(repo)s already exists.")
 
 
+class ImageChecksumMismatch(ZunException):
+    message = _("The checksum of the image data is %(actual)s instead of "
+                "%(expected)s.")
+
+
 class ZunServiceAlreadyExists(ResourceExists):
     message = _("Service %(binary)s on host %(host)s already exists.")
 
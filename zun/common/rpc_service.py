@@ -64,6 +64,14 @@ class Service(service.Service):
             if hasattr(endpoint, 'init_containers'):
                 endpoint.init_containers(
                     context.get_admin_context(all_projects=True))
+            if hasattr(endpoint, 'watch_container_events'):
+                self.tg.add_thread(
+                    endpoint.watch_container_events,
+                    context.get_admin_context(all_projects=True))
+            if hasattr(endpoint, 'watch_image_events'):
+                self.tg.add_thread(
+                    endpoint.watch_image_events,
+                    context.get_admin_context(all_projects=True))
             self.tg.add_dynamic_timer(
                 endpoint.run_periodic_tasks,
                 periodic_interval_max=CONF.periodic_interval_max,
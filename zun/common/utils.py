@@ -32,7 +32,6 @@ import pecan
 import six
 
 from zun.api import utils as api_utils
-from zun.common import clients
 from zun.common import consts
 from zun.common import exception
 from zun.common.i18n import _
@@ -176,6 +175,26 @@ def parse_image_name(image, driver=None):
     return image_repo, image_tag
 
 
+def normalize_image_reference(repo, tag=None):
+    """Return the 'repo:tag' reference of an image as docker reports it.
+
+    The default registry and the 'library/' namespace of the official
+    images are omitted, and the tag defaults to 'latest'.
+    """
+    if tag is None:
+        # The tag is the part after the last ':' unless it is a port
+        repo, sep, tag = repo.rpartition(':')
+        if not sep or '/' in tag:
+            repo, tag = repo + sep + tag, 'latest'
+    for prefix in ('docker.io/', 'index.docker.io/'):
+        if repo.startswith(prefix):
+            repo = repo[len(prefix):]
+            if repo.startswith('library/'):
+                repo = repo[len('library/'):]
+            break
+    return '%s:%s' % (repo, tag or 'latest')
+
+
 def spawn_n(func, *args, **kwargs):
     """Passthrough method for eventlet.spawn_n.
 
@@ -305,13 +324,17 @@ def get_security_group_ids(context, security_groups, **kwargs):
     if not security_groups:
         return None
     else:
-        neutron = clients.OpenStackClients(context).neutron()
-        search_opts = {'tenant_id': context.project_id}
-        security_groups_list = neutron.list_security_groups(
-            **search_opts).get('security_groups', [])
-        security_group_ids = [item['id'] for item in security_groups_list
-                              if item['name'] in security_groups
-                              or item['id'] in security_groups]
+        def _find_security_group_ids(security_groups_list):
+            return [item['id'] for item in security_groups_list
+                    if item['name'] in security_groups
+                    or item['id'] in security_groups]
+
+        security_group_ids = _find_security_group_ids(
+            neutron.list_security_groups(context))
+        if len(security_group_ids) < len(security_groups):
+            # The security groups may have changed since they were cached
+            security_group_ids = _find_security_group_ids(
+                neutron.list_security_groups(context, refresh=True))
         if len(security_group_ids) >= len(security_groups):
             return security_group_ids
         else:
@@ -181,6 +181,9 @@ class API(object):
     def container_put_archive(self, context, container, *args):
         return self.rpcapi.container_put_archive(context, container, *args)
 
+    def container_get_archive_url(self, context, container):
+        return self.rpcapi.container_get_archive_url(context, container)
+
     def container_stats(self, context, container):
         return self.rpcapi.container_stats(context, container)
 
@@ -28,6 +28,9 @@ from zun.scheduler import placement_client
 
 LOG = logging.getLogger(__name__)
 COMPUTE_RESOURCE_SEMAPHORE = "compute_resources"
+# The usage of the compute node that is adjusted by the claims between two
+# full audits of the host.
+USAGE_FIELDS = ('mem_used', 'cpu_used', 'disk_used', 'running_containers')
 
 
 class ComputeNodeTracker(object):
@@ -40,6 +43,9 @@ class ComputeNodeTracker(object):
         self.scheduler_client = scheduler_client.SchedulerClient()
         self.placement_client = placement_client.SchedulerReportClient()
         self.pci_tracker = None
+        # Whether the usage of the compute node might not match the
+        # containers of this host anymore and needs a full audit.
+        self.usage_drifted = False
 
     def _setup_pci_tracker(self, context, compute_node):
         if not self.pci_tracker:
@@ -68,6 +74,7 @@ class ComputeNodeTracker(object):
         self._setup_pci_tracker(context, node)
         self.compute_node = node
         self._update_available_resource(context)
+        self.usage_drifted = False
         # NOTE(sbiswas7): Consider removing the return statement if not needed
         return node
 
@@ -79,6 +86,26 @@ class ComputeNodeTracker(object):
             LOG.warning("No compute node record for: %(host)s",
                         {'host': self.host})
 
+    def _refresh_compute_node(self, context):
+        """Reload the compute node before applying a usage delta.
+
+        Between two full audits, the usage of the compute node is only
+        changed by the claims of this tracker. A record whose usage is not
+        the one last persisted by this tracker has drifted.
+        """
+        node = self._get_compute_node(context)
+        old_node = self.old_resources.get(self.host)
+        if node is not None and old_node is not None:
+            for field in USAGE_FIELDS:
+                if (old_node.obj_attr_is_set(field) and
+                        getattr(node, field) != getattr(old_node, field)):
+                    LOG.info('The %(field)s of compute node %(host)s has '
+                             'drifted from the tracked usage',
+                             {'field': field, 'host': self.host})
+                    self.usage_drifted = True
+                    break
+        self.compute_node = node
+
     @utils.synchronized(COMPUTE_RESOURCE_SEMAPHORE)
     def container_claim(self, context, container, pci_requests, limits=None):
         """Indicate resources are needed for an upcoming container build.
@@ -103,7 +130,7 @@ class ComputeNodeTracker(object):
             return claims.NopClaim()
 
         # We should have the compute node created here, just get it.
-        self.compute_node = self._get_compute_node(context)
+        self._refresh_compute_node(context)
 
         claim = claims.Claim(context, container, self, self.compute_node,
                              pci_requests, limits=limits)
@@ -143,7 +170,7 @@ class ComputeNodeTracker(object):
             return claims.NopClaim()
 
         # We should have the compute node created here, just get it.
-        self.compute_node = self._get_compute_node(context)
+        self._refresh_compute_node(context)
 
         claim = claims.UpdateClaim(context, new_container, old_container,
                                    self, self.compute_node, limits=limits)
@@ -348,6 +375,11 @@ class ComputeNodeTracker(object):
         """Just a wrapper of the private function to hold lock."""
 
         # We need to get the latest compute node info
-        self.compute_node = self._get_compute_node(context)
+        self._refresh_compute_node(context)
+        if is_removed and container.uuid not in self.tracked_containers:
+            # The usage of this container is unknown to the tracker, leave
+            # it to the next audit of the host.
+            self.usage_drifted = True
+            return
         self._update_usage_from_container(context, container, is_removed)
         self._update(self.compute_node)
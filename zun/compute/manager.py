@@ -42,6 +42,9 @@ from zun import objects
 
 CONF = zun.conf.CONF
 LOG = logging.getLogger(__name__)
+# Seconds to wait before watching the container events again after the
+# events stream was interrupted.
+CONTAINER_EVENTS_RETRY_INTERVAL = 5
 
 
 class Manager(periodic_task.PeriodicTasks):
@@ -258,7 +261,7 @@ class Manager(periodic_task.PeriodicTasks):
             created_container = self._do_container_create(
                 context, container, requested_networks, requested_volumes,
                 pci_requests, limits)
-            self.inventory_host(context)
+            self._audit_host_if_drifted(context)
             if run:
                 self._do_container_start(context, created_container)
 
@@ -551,7 +554,7 @@ class Manager(periodic_task.PeriodicTasks):
         # Remove the claimed resource
         rt = self._get_resource_tracker()
         rt.remove_usage_from_container(context, container, True)
-        self.inventory_host(context)
+        self._audit_host_if_drifted(context)
 
     def _delete_sandbox(self, context, container, reraise=False):
         sandbox_id = container.get_sandbox_id()
@@ -942,6 +945,11 @@ class Manager(periodic_task.PeriodicTasks):
             LOG.exception("Unexpected exception: %s", six.text_type(e))
             raise
 
+    @translate_exception
+    def container_get_archive_url(self, context, container):
+        LOG.debug('Get the archive url of the container: %s', container.uuid)
+        return self.driver.get_archive_url(context, container)
+
     @translate_exception
     def container_put_archive(self, context, container, path, data):
         LOG.debug('Copying resource to the container: %s', container.uuid)
@@ -1096,11 +1104,59 @@ class Manager(periodic_task.PeriodicTasks):
                           six.text_type(e))
             raise
 
+    def watch_container_events(self, context):
+        """Keep the container states in sync with the container events.
+
+        The watch is restarted whenever the events stream is interrupted.
+        """
+        if not CONF.compute.watch_container_events:
+            return
+        while True:
+            try:
+                self.driver.watch_container_states(context)
+            except NotImplementedError:
+                LOG.info('The container driver does not support watching '
+                         'the container states')
+                return
+            except Exception as e:
+                LOG.warning('Watching the container events failed: %s',
+                            six.text_type(e))
+            time.sleep(CONTAINER_EVENTS_RETRY_INTERVAL)
+
+    def watch_image_events(self, context):
+        """Keep the index of the local images in sync with the image events.
+
+        The watch is restarted whenever the events stream is interrupted.
+        """
+        if not CONF.compute.watch_image_events:
+            return
+        while True:
+            try:
+                self.driver.watch_local_images()
+            except NotImplementedError:
+                LOG.info('The container driver does not support watching '
+                         'the local images')
+                return
+            except Exception as e:
+                LOG.warning('Watching the image events failed: %s',
+                            six.text_type(e))
+            time.sleep(CONTAINER_EVENTS_RETRY_INTERVAL)
+
     @periodic_task.periodic_task(run_immediately=True)
     def inventory_host(self, context):
         rt = self._get_resource_tracker()
         rt.update_available_resources(context)
 
+    def _audit_host_if_drifted(self, context):
+        """Run a full inventory only if the tracked usage has drifted.
+
+        The claims already apply the usage of the containers to the compute
+        node, the full inventory of the host is left to the periodic task.
+        """
+        rt = self._get_resource_tracker()
+        if rt.usage_drifted:
+            self.inventory_host(context)
+
     def _get_resource_tracker(self):
         if not self._resource_tracker:
             rt = compute_node_tracker.ComputeNodeTracker(self.host,
@@ -1108,6 +1164,15 @@ class Manager(periodic_task.PeriodicTasks):
             self._resource_tracker = rt
         return self._resource_tracker
 
+    @periodic_task.periodic_task(
+        spacing=CONF.glance.image_verification_interval)
+    def verify_cached_images(self, context):
+        self.driver.verify_cached_images()
+
+    @periodic_task.periodic_task(run_immediately=True)
+    def prune_port_pool(self, context):
+        self.driver.prune_port_pool()
+
     @periodic_task.periodic_task(run_immediately=True)
     def delete_unused_containers(self, context):
         """Delete container with status DELETED"""
@@ -1144,15 +1209,20 @@ class Manager(periodic_task.PeriodicTasks):
     def sync_container_state(self, ctx):
         LOG.debug('Start syncing container states.')
 
-        containers = objects.Container.list(ctx)
-        self.driver.update_containers_states(ctx, containers)
-        capsules = objects.Capsule.list(ctx)
-        for capsule in capsules:
-            container = objects.Container.get_by_uuid(
-                ctx, capsule.containers_uuids[1])
-            if capsule.host != container.host:
-                capsule.host = container.host
-                capsule.save(ctx)
+        # Only the containers of this host and the ones running in its
+        # container engine are synced.
+        containers = self.driver.update_containers_states(ctx)
+        capsule_ids = set(c.capsule_id for c in containers if c.capsule_id)
+        if capsule_ids:
+            uuid_to_container = {c.uuid: c for c in containers}
+            capsules = objects.Capsule.list(
+                ctx, filters={'id': list(capsule_ids)})
+            for capsule in capsules:
+                container = uuid_to_container.get(
+                    capsule.containers_uuids[1])
+                if container and capsule.host != container.host:
+                    capsule.host = container.host
+                    capsule.save(ctx)
         LOG.debug('Complete syncing container states.')
 
     def capsule_create(self, context, capsule, requested_networks,
@@ -19,18 +19,15 @@ from zun.common import exception
 from zun.common import profiler
 from zun.common import rpc_service
 import zun.conf
-from zun import objects
 
 
 def check_container_host(func):
     """Verify the state of container host"""
     @functools.wraps(func)
     def wrap(self, context, container, *args, **kwargs):
-        services = objects.ZunService.list_by_binary(context, 'zun-compute')
         api_servicegroup = servicegroup.ServiceGroup()
-        up_hosts = [service.host for service in services
-                    if api_servicegroup.service_is_up(service)]
-        if container.host is not None and container.host not in up_hosts:
+        if (container.host is not None and
+                not api_servicegroup.host_is_up(context, container.host)):
             raise exception.ContainerHostNotUp(container=container.uuid,
                                                host=container.host)
         return func(self, context, container, *args, **kwargs)
@@ -147,6 +144,11 @@ class API(rpc_service.API):
         return self._call(container.host, 'container_get_archive',
                           container=container, path=path)
 
+    @check_container_host
+    def container_get_archive_url(self, context, container):
+        return self._call(container.host, 'container_get_archive_url',
+                          container=container)
+
     @check_container_host
     def container_put_archive(self, context, container, path, data):
         return self._call(container.host, 'container_put_archive',
@@ -31,6 +31,7 @@ from zun.conf import path
 from zun.conf import pci
 from zun.conf import placement
 from zun.conf import profiler
+from zun.conf import quota
 from zun.conf import scheduler
 from zun.conf import services
 from zun.conf import ssl
@@ -65,3 +66,4 @@ netconf.register_opts(CONF)
 availability_zone.register_opts(CONF)
 utils.register_opts(CONF)
 placement.register_opts(CONF)
+quota.register_opts(CONF)
@@ -42,7 +42,18 @@ api_service_opts = [
                help="Configuration file for WSGI definition of API."),
     cfg.BoolOpt('enable_image_validation',
                 default=True,
-                help="Enable image validation.")
+                help="Enable image validation."),
+    cfg.IntOpt('archive_chunk_size',
+               default=64 * 1024,
+               min=1024,
+               help="Size in bytes of the chunks in which the archives of "
+                    "the containers are streamed between the API and the "
+                    "compute hosts. It bounds the memory used by an "
+                    "archive transfer."),
+    cfg.StrOpt('archive_ca_file',
+               help="CA certificate file to verify the archive endpoints "
+                    "of the compute hosts served via HTTPS. The CA "
+                    "certificates of the system are used if not set."),
 ]
 
 
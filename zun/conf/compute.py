@@ -25,6 +25,74 @@ compute_opts = [
         'reserve_disk_for_image',
         default=0.2,
         help='reserve disk for docker images'),
+    cfg.BoolOpt(
+        'watch_container_events',
+        default=True,
+        help="""
+Update the container states from the events of the container engine.
+
+When enabled, zun-compute watches the events of its containers (start, die,
+pause, ...) and records the new state of a container as soon as it changes.
+The periodic task run every 'sync_container_state_interval' seconds then only
+reconciles the states missed while the events could not be received, so the
+interval can be raised.
+
+Related options:
+
+* sync_container_state_interval
+"""),
+    cfg.BoolOpt(
+        'watch_image_events',
+        default=True,
+        help="""
+Index the local images of the container engine from its image events.
+
+When enabled, zun-compute keeps an in-memory index of the images present on
+the host, updated from the image events of the container engine (pull, tag,
+untag, delete, ...). Whether an image is present locally is then answered
+from the index instead of asking the container engine on every container
+create. The images of the index are reported in the compute node record.
+"""),
+]
+
+archive_opts = [
+    cfg.URIOpt(
+        'archive_base_url',
+        default='http://$archive_host:$archive_port/',
+        help="""
+The URL at which the API services stream the archives of the containers of
+this host (API microversion 1.25 or later).
+
+zun-compute serves the archives of its containers at this URL, so the API
+services never connect to the container engine. A transfer is authorized by
+a single use token issued over RPC to the API service.
+
+Related options:
+
+* archive_host, archive_port and archive_enable_ssl
+"""),
+    cfg.StrOpt(
+        'archive_host',
+        default='$my_ip',
+        help="The IP address on which zun-compute listens for the archive "
+             "transfers of the API services."),
+    cfg.PortOpt(
+        'archive_port',
+        default=9518,
+        help="The port on which zun-compute listens for the archive "
+             "transfers of the API services."),
+    cfg.BoolOpt(
+        'archive_enable_ssl',
+        default=False,
+        help="Serve the archive transfers via HTTPS, with the certificate "
+             "and key of the [ssl] section. The scheme of "
+             "'archive_base_url' must then be https."),
+    cfg.IntOpt(
+        'archive_token_ttl',
+        default=60,
+        min=1,
+        help="Number of seconds an archive transfer token issued to an API "
+             "service remains valid."),
 ]
 
 service_opts = [
@@ -59,7 +127,7 @@ Possible values:
 opt_group = cfg.OptGroup(
     name='compute', title='Options for the zun-compute service')
 
-ALL_OPTS = (service_opts + db_opts + compute_opts)
+ALL_OPTS = (service_opts + db_opts + compute_opts + archive_opts)
 
 
 def register_opts(conf):
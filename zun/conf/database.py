@@ -29,7 +29,18 @@ etcd_opts = [
                             "the IP address of this host."),
     cfg.PortOpt('etcd_port',
                 default=2379,
-                help="Port on which etcd listen client request.")
+                help="Port on which etcd listen client request."),
+    cfg.IntOpt('cas_max_retries',
+               default=10,
+               min=0,
+               help="""
+Maximum number of retries of a write to a container or a compute node.
+
+The records are updated with a compare-and-swap on their etcd modified
+index, so a write fails if another process or greenthread modified the
+record since it was read. The write is then retried from a fresh read of
+the record, up to this number of times, before giving up.
+"""),
 ]
 
 etcd_group = cfg.OptGroup(name='etcd', title='Options for etcd connection')
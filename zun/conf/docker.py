@@ -58,6 +58,20 @@ docker_opts = [
                help='Root directory of persistent Docker state.'),
     cfg.StrOpt('docker_volume_group',
                help='Volume group of persistent Docker state.'),
+    cfg.IntOpt('client_pool_size',
+               default=10,
+               min=1,
+               help='Maximum number of docker clients kept open by a zun '
+                    'process. The clients are shared by all the '
+                    'greenthreads of the process and keep their connections '
+                    'to the docker daemon alive. The event streams and the '
+                    'image and archive transfers use clients of their own '
+                    'outside of this pool.'),
+    cfg.IntOpt('client_pool_timeout',
+               default=60,
+               min=1,
+               help='Timeout in seconds to wait for a docker client when '
+                    'all the clients of the pool are in use.'),
 ]
 
 ALL_OPTS = (docker_opts)
@@ -32,6 +32,20 @@ Interdependencies to other options:
         'default_image_driver',
         default='docker',
         help='The default container image driver to use.'),
+    cfg.IntOpt(
+        'max_concurrent_image_pulls',
+        default=5,
+        min=1,
+        help="""Maximum number of images pulled at the same time.
+The pulls of the same image are coalesced into a single pull, this limits
+the number of different images downloaded concurrently by a compute node.
+Possible values:
+* A positive integer
+Services which consume this:
+* ``zun-compute``
+Interdependencies to other options:
+* None
+"""),
 ]
 
 sandbox_opts = [
@@ -56,6 +70,31 @@ glance_driver_opts = [
         help='Shared directory where glance images located. If '
              'specified, docker will try to load the image from '
              'the shared directory by image ID.'),
+    cfg.BoolOpt(
+        'cache_images',
+        default=True,
+        help='Keep a copy of the images downloaded from glance in '
+             'images_directory. The copy is written while the image is '
+             'streamed into docker and lets the image be used again '
+             'without downloading it. If disabled, an image is downloaded '
+             'from glance again every time it is pulled.'),
+    cfg.IntOpt(
+        'image_verification_interval',
+        default=86400,
+        help='Interval in seconds between two verifications of the images '
+             'cached in images_directory. A cached image is trusted without '
+             'being hashed as long as its file does not change, this '
+             'periodic verification removes the cached images whose data no '
+             'longer matches their checksum. A negative value disables the '
+             'verification.'),
+    cfg.IntOpt(
+        'image_lookup_cache_time',
+        default=60,
+        min=0,
+        help='Time in seconds the glance images found by name or id, and '
+             'the glance clients of a request context, are cached. An image '
+             'updated or deleted in glance may be seen for this long. Set '
+             'it to 0 to disable the cache.'),
 ]
 
 glance_opt_group = cfg.OptGroup(name='glance',
@@ -24,6 +24,30 @@ network_opts = [
                default='kuryr',
                help=('The network plugin driver name, you can find it by'
                      ' docker plugin list.')),
+    cfg.IntOpt('metadata_cache_time',
+               default=60,
+               min=0,
+               help=('Time in seconds the neutron networks, the security '
+                     'groups of a project and the existing docker networks '
+                     'are cached by each zun process. A change made outside '
+                     'of zun may be seen for this long. Set it to 0 to '
+                     'disable the cache.')),
+    cfg.IntOpt('port_pool_size',
+               default=0,
+               min=0,
+               help=('Number of neutron ports created ahead by each compute '
+                     'host for each network, project and set of security '
+                     'groups that containers are created with, so that '
+                     'a container gets an existing port instead of waiting '
+                     'for a new one. Ports with a fixed IP address are '
+                     'always created on demand. Set it to 0 to disable the '
+                     'pool.')),
+    cfg.IntOpt('port_pool_idle_time',
+               default=600,
+               min=0,
+               help=('Time in seconds after which the pooled ports of a '
+                     'network, project and set of security groups are '
+                     'deleted if no container took a port from them.')),
 ]
 
 ALL_OPTS = (network_opts)
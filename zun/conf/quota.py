@@ -0,0 +1,43 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from oslo_config import cfg
+
+
+quota_group = cfg.OptGroup(name='quota',
+                           title='Options for the quota of the projects')
+
+quota_opts = [
+    cfg.BoolOpt('track_usages',
+                default=False,
+                help="""
+Keep the container usages of each project in the quota_usages table.
+
+The number of containers, cpu, memory and disk of a project are then
+updated as its containers are created, resized and deleted, so that
+reading the usages of a project does not aggregate all its containers.
+The usages of a project are computed from its containers the first time
+they are read. They are not updated while this option is disabled, so the
+rows of the quota_usages table must be deleted before enabling it again.
+"""),
+]
+
+ALL_OPTS = (quota_opts)
+
+
+def register_opts(conf):
+    conf.register_group(quota_group)
+    conf.register_opts(ALL_OPTS, group=quota_group)
+
+
+def list_opts():
+    return {quota_group: ALL_OPTS}
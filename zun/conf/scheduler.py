@@ -93,6 +93,174 @@ Related options:
 * All of the filters in this option *must* be present in the
   'scheduler_available_filters' option, or a SchedulerHostFilterNotFound
   exception will be raised.
+"""),
+    cfg.ListOpt("weight_classes",
+                default=["zun.scheduler.weights.all_weighers"],
+                help="""
+Weighers that the scheduler will use.
+
+Only hosts which pass the filters are weighed. The weight for any host starts
+at 0, and the weighers order these hosts by adding to or subtracting from the
+weight assigned by the previous weigher. Weights may become negative. A
+container will be scheduled to one of the N most-weighted hosts, where N is
+'host_subset_size'.
+
+By default, this is set to all weighers that are included with zun.
+
+This option is only used by the FilterScheduler and its subclasses; if you use
+a different scheduler, this option has no effect.
+
+Possible values:
+
+* A list of zero or more strings, where each string corresponds to the name of
+  a weigher that will be used for selecting a host
+"""),
+    cfg.FloatOpt("ram_weight_multiplier",
+                 default=1.0,
+                 help="""
+RAM weight multipler ratio.
+
+This option determines how hosts with more or less available RAM are weighed.
+A positive value will result in the scheduler preferring hosts with more
+available RAM, and a negative number will result in the scheduler preferring
+hosts with less available RAM. Another way to look at it is that positive
+values for this option will tend to spread containers across many hosts,
+while negative values will tend to fill up (stack) hosts as much as possible
+before scheduling to a less-used host. The absolute value, whether positive or
+negative, controls how strong the RAM weigher is relative to other weighers.
+
+This option is only used by the FilterScheduler and its subclasses; if you use
+a different scheduler, this option has no effect. Also note that this setting
+only affects scheduling if the 'RAMWeigher' weigher is enabled.
+
+Possible values:
+
+* An integer or float value, where the value corresponds to the multipler
+  ratio for this weigher.
+"""),
+    cfg.FloatOpt("cpu_weight_multiplier",
+                 default=1.0,
+                 help="""
+CPU weight multiplier ratio.
+
+Multiplier used for weighting free vCPUs. Negative numbers indicate stacking
+rather than spreading. This option is only used by the FilterScheduler and
+its subclasses, and only if the 'CPUWeigher' weigher is enabled.
+
+Possible values:
+
+* An integer or float value, where the value corresponds to the multipler
+  ratio for this weigher.
+"""),
+    cfg.FloatOpt("disk_weight_multiplier",
+                 default=1.0,
+                 help="""
+Disk weight multipler ratio.
+
+Multiplier used for weighing free disk space. Negative numbers mean to
+stack vs spread. This option is only used by the FilterScheduler and its
+subclasses, and only if the 'DiskWeigher' weigher is enabled.
+
+Possible values:
+
+* An integer or float value, where the value corresponds to the multipler
+  ratio for this weigher.
+"""),
+    cfg.FloatOpt("container_count_weight_multiplier",
+                 default=0.0,
+                 help="""
+Container count weight multiplier ratio.
+
+Multiplier used for weighing the number of containers on a host. Negative
+numbers prefer the hosts with fewer containers, positive numbers prefer the
+busiest hosts. The default of 0 disables this weigher. This option is only
+used by the FilterScheduler and its subclasses, and only if the
+'ContainerCountWeigher' weigher is enabled.
+
+Possible values:
+
+* An integer or float value, where the value corresponds to the multipler
+  ratio for this weigher.
+"""),
+    cfg.FloatOpt("numa_weight_multiplier",
+                 default=1.0,
+                 help="""
+NUMA weight multiplier ratio.
+
+Multiplier used for weighing the free CPUs of the NUMA node that fits a
+container with the 'dedicated' CPU policy. Negative numbers pack dedicated
+containers in the fullest NUMA nodes rather than spreading them. This option
+is only used by the FilterScheduler and its subclasses, and only if the
+'NUMAWeigher' weigher is enabled.
+
+Possible values:
+
+* An integer or float value, where the value corresponds to the multipler
+  ratio for this weigher.
+"""),
+    cfg.FloatOpt("image_locality_weight_multiplier",
+                 default=1.0,
+                 help="""
+Image locality weight multiplier ratio.
+
+Multiplier used for weighing the hosts that already have the image of a
+container, as reported by their compute node. Positive numbers prefer these
+hosts to avoid pulling the image, 0 ignores where the images are and spreads
+the containers by the other weighers only. This option is only used by the
+FilterScheduler and its subclasses, and only if the 'ImageLocalityWeigher'
+weigher is enabled.
+
+Possible values:
+
+* An integer or float value, where the value corresponds to the multipler
+  ratio for this weigher.
+"""),
+    cfg.IntOpt("host_subset_size",
+               default=1,
+               min=1,
+               help="""
+Size of subset of best hosts selected by scheduler.
+
+New containers will be scheduled on a host chosen randomly from a subset of
+the N best hosts, where N is the value set by this option.
+
+Setting this to a value greater than 1 will reduce the chance that multiple
+scheduler processes handling similar requests will select the same host,
+creating a potential race condition. By selecting a host randomly from the N
+hosts that best fit the request, the chance of a conflict is reduced. However,
+the higher you set this value, the less optimal the chosen host may be for a
+given request.
+
+This option is only used by the FilterScheduler and its subclasses; if you use
+a different scheduler, this option has no effect.
+
+Possible values:
+
+* A positive integer, where the integer corresponds to the size of a host
+  subset
+"""),
+    cfg.IntOpt("host_state_cache_time",
+               default=0,
+               min=0,
+               help="""
+Maximum age, in seconds, of the host states cached by the scheduler.
+
+The FilterScheduler keeps the host state of every compute node in memory and
+only rebuilds the state of a host when its compute node record has changed.
+Within this window, the scheduler does not list services and compute nodes at
+all; only hosts selected by a previous request are re-read from the database.
+When the window expires, all compute nodes are listed again and the hosts
+whose record changed since the last refresh are rebuilt. The value should be
+kept well below ``service_down_time`` since the liveness of the compute
+services is only re-evaluated from the cached service records in between.
+
+This option is only used by the FilterScheduler and its subclasses; if you use
+a different scheduler, this option has no effect.
+
+Possible values:
+
+* 0: list services and compute nodes on every request (default)
+* A positive integer, the number of seconds a cached host state is trusted
 """),
 ]
 
@@ -26,6 +26,22 @@ periodic_opts = [
                default=180,
                help='Max interval size between periodic tasks execution in '
                     'seconds.'),
+    cfg.IntOpt('service_cache_time',
+               default=10,
+               min=0,
+               help="""
+Time, in seconds, the service records used to check whether a host is up
+are cached.
+
+The records are shared by the compute RPC API, the scheduler and its
+filters within a process. The liveness of a service is still evaluated from
+its last heartbeat on every check, so this value should be kept well below
+service_down_time.
+
+Possible values:
+* 0: Read the service records from the database on every check.
+* Any positive integer in seconds.
+"""),
     cfg.IntOpt('sync_container_state_interval',
                default=60,
                help="""
@@ -0,0 +1,150 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Serve the archives of the containers of this host to the API services.
+
+The API services stream the archives of the containers from and to this
+endpoint of zun-compute, so that the docker API of the compute hosts does not
+have to be reachable from them. A transfer is authorized by a token issued
+over RPC for one container, which can be used once within
+[compute]archive_token_ttl seconds.
+"""
+
+import base64
+import contextlib
+
+from docker import errors
+from oslo_log import log as logging
+from oslo_serialization import jsonutils
+from oslo_service import wsgi
+from oslo_utils import uuidutils
+import six
+from six.moves.urllib import parse
+import webob.dec
+from webob import exc
+
+from zun.common import cache
+import zun.conf
+from zun.container.docker import utils as docker_utils
+
+CONF = zun.conf.CONF
+LOG = logging.getLogger(__name__)
+
+STAT_HEADER = 'X-Container-Path-Stat'
+
+
+def _token_ttl():
+    return CONF.compute.archive_token_ttl
+
+
+_tokens = cache.TTLCache(_token_ttl)
+
+
+def get_url(container_id):
+    """Issue a token for an archive transfer of a container.
+
+    :returns: the URL of the archive of the container, with the token.
+    """
+    token = uuidutils.generate_uuid()
+    _tokens.set(token, container_id)
+    return '%s/containers/%s/archive?%s' % (
+        CONF.compute.archive_base_url.rstrip('/'), container_id,
+        parse.urlencode({'token': token}))
+
+
+def _consume_token(token, container_id):
+    # NOTE: The token is dropped on its first use, whether or not it was
+    # issued for this container.
+    if not token or _tokens.get(token) is None:
+        return False
+    return _tokens.pop(token) == container_id
+
+
+def _read_stream(client, stream):
+    with contextlib.closing(client):
+        for chunk in stream:
+            yield chunk
+
+
+def _read_chunks(data_file):
+    while True:
+        chunk = data_file.read(CONF.api.archive_chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _get_archive(container_id, path):
+    client = docker_utils.create_client()
+    try:
+        stream, stat = client.get_archive(
+            container_id, path, chunk_size=CONF.api.archive_chunk_size)
+    except Exception:
+        client.close()
+        raise
+    response = webob.Response(content_type='application/x-tar')
+    response.headers[STAT_HEADER] = base64.b64encode(
+        jsonutils.dump_as_bytes(stat)).decode('ascii')
+    response.app_iter = _read_stream(client, stream)
+    return response
+
+
+def _put_archive(container_id, path, data_file):
+    with contextlib.closing(docker_utils.create_client()) as client:
+        client.put_archive(container_id, path, _read_chunks(data_file))
+    return webob.Response(status=200)
+
+
+class ArchiveApplication(object):
+    """The WSGI application of the archive transfers.
+
+    GET and PUT /containers/<container_id>/archive?token=<token>&path=<path>
+    get and extract the tar archive of a path of a container.
+    """
+
+    @webob.dec.wsgify
+    def __call__(self, request):
+        parts = request.path_info.strip('/').split('/')
+        if len(parts) != 3 or parts[0] != 'containers' or \
+                parts[2] != 'archive':
+            raise exc.HTTPNotFound()
+        if request.method not in ('GET', 'PUT'):
+            raise exc.HTTPMethodNotAllowed()
+        container_id = parts[1]
+        if not _consume_token(request.GET.get('token'), container_id):
+            raise exc.HTTPForbidden(
+                explanation='The archive token is invalid or expired.')
+        path = request.GET.get('path')
+        if not path:
+            raise exc.HTTPBadRequest(explanation='The path is missing.')
+
+        try:
+            if request.method == 'GET':
+                return _get_archive(container_id, path)
+            # NOTE: The body is read from the raw input, as the API sends it
+            # with the chunked transfer encoding.
+            return _put_archive(container_id, path, request.body_file_raw)
+        except errors.NotFound as e:
+            raise exc.HTTPNotFound(explanation=six.text_type(e))
+        except errors.APIError as e:
+            LOG.error('Error occurred while transferring the archive of '
+                      'container %(id)s: %(error)s',
+                      {'id': container_id, 'error': six.text_type(e)})
+            raise exc.HTTPBadGateway(explanation=six.text_type(e))
+
+
+def create_server():
+    """Create the WSGI server of the archive transfers."""
+    return wsgi.Server(CONF, 'zun_compute_archive', ArchiveApplication(),
+                       host=CONF.compute.archive_host,
+                       port=CONF.compute.archive_port,
+                       use_ssl=CONF.compute.archive_enable_ssl)
@@ -11,6 +11,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
 import datetime
 import eventlet
 import functools
@@ -18,10 +19,12 @@ import types
 
 from docker import errors
 from oslo_log import log as logging
+from oslo_utils import excutils
 from oslo_utils import timeutils
 from oslo_utils import uuidutils
 import six
 
+from zun.common import cache
 from zun.common import consts
 from zun.common import exception
 from zun.common.i18n import _
@@ -29,11 +32,14 @@ from zun.common import utils
 from zun.common.utils import check_container_id
 from zun.compute import api as zun_compute
 import zun.conf
+from zun.container.docker import archive_server
 from zun.container.docker import host
+from zun.container.docker import image_index
 from zun.container.docker import utils as docker_utils
 from zun.container import driver
 from zun.image import driver as img_driver
 from zun.network import network as zun_network
+from zun.network import port_pool
 from zun import objects
 from zun.volume import driver as vol_driver
 from zun.volume.driver import Directory as dir_driver
@@ -41,6 +47,9 @@ from zun.volume.driver import Directory as dir_driver
 CONF = zun.conf.CONF
 LOG = logging.getLogger(__name__)
 ATTACH_FLAG = "/attach/ws?logs=0&stream=1&stdin=1&stdout=1&stderr=1"
+# The docker events after which the state of a container may have changed.
+CONTAINER_STATE_EVENTS = ['start', 'restart', 'die', 'kill', 'oom', 'stop',
+                          'pause', 'unpause']
 
 
 def is_not_found(e):
@@ -113,6 +122,16 @@ class DockerDriver(driver.ContainerDriver):
         self._host = host.Host()
         self._get_host_storage_info()
         self.volume_driver = vol_driver.driver()
+        # CPU reserved by each docker container, keyed by container id.
+        self._cpu_reserved = {}
+        # The image pulls in progress, keyed by (driver, repo, tag, pull
+        # policy, project of the glance pulls).
+        self._image_pulls = {}
+        self._image_pull_semaphore = eventlet.semaphore.Semaphore(
+            CONF.max_concurrent_image_pulls)
+        # The names of the docker networks known to exist.
+        self._docker_networks = cache.TTLCache(
+            lambda: CONF.network.metadata_cache_time)
         self.image_drivers = {}
         for driver_name in CONF.image_driver_list:
             driver = img_driver.load_image_driver(driver_name)
@@ -124,12 +143,43 @@ class DockerDriver(driver.ContainerDriver):
         self.support_disk_quota = self._host.check_supported_disk_quota()
 
     def load_image(self, image_path=None):
-        with docker_utils.docker_client() as docker:
+        with docker_utils.docker_client(dedicated=True) as docker:
             if image_path:
                 with open(image_path, 'rb') as fd:
                     LOG.debug('Loading local image %s into docker', image_path)
                     docker.load_image(fd)
 
+    def _load_image(self, image):
+        image_stream = image.pop('stream', None)
+        if image_stream is None:
+            self.load_image(image['path'])
+            return
+
+        # The image data is streamed into docker as it is downloaded
+        with docker_utils.docker_client(dedicated=True) as docker:
+            LOG.debug('Loading image %s into docker', image['image'])
+            try:
+                docker.load_image(image_stream)
+            except exception.ImageChecksumMismatch:
+                # NOTE: The mismatch is only known at the end of the data,
+                # when docker may have loaded the image already.
+                with excutils.save_and_reraise_exception():
+                    self._remove_loaded_image(docker, image_stream.manifest)
+        if image_stream.manifest is not None:
+            image['manifest'] = image_stream.manifest
+
+    def _remove_loaded_image(self, docker, manifest):
+        for tag in set(tag for entry in manifest or []
+                       for tag in entry.get('RepoTags') or []):
+            LOG.warning('Removing image %s loaded from data with a wrong '
+                        'checksum', tag)
+            try:
+                docker.remove_image(tag, force=True)
+            except errors.APIError as api_error:
+                if not is_not_found(api_error):
+                    LOG.error('Failed to remove image %(image)s: %(error)s',
+                              {'image': tag, 'error': api_error})
+
     def inspect_image(self, image):
         with docker_utils.docker_client() as docker:
             LOG.debug('Inspecting image %s', image)
@@ -176,6 +226,41 @@ class DockerDriver(driver.ContainerDriver):
         if driver_name is None:
             driver_name = CONF.default_image_driver
 
+        # NOTE: Concurrent pulls of an image are coalesced, the callers
+        # arriving while the image is being pulled wait for that pull and
+        # share its result. The image is loaded into docker as part of the
+        # pull so that it is loaded once as well. Only the pulls made with
+        # the same policy are coalesced, and glance pulls only within a
+        # project since the projects may have private images of the same
+        # name.
+        project_id = context.project_id if driver_name == 'glance' else None
+        key = (driver_name, repo, tag, image_pull_policy, project_id)
+        pull = self._image_pulls.get(key)
+        if pull is not None:
+            LOG.debug('Waiting for the pull of image %s in progress', repo)
+            image, image_loaded = pull.wait()
+            return copy.deepcopy(image), image_loaded
+
+        pull = eventlet.event.Event()
+        self._image_pulls[key] = pull
+        try:
+            with self._image_pull_semaphore:
+                image, image_loaded = self._pull_image(
+                    context, repo, tag, image_pull_policy, driver_name)
+                if image and not image_loaded:
+                    self._load_image(image)
+                    image_loaded = True
+        except Exception as e:
+            pull.send_exception(e)
+            raise
+        else:
+            pull.send((copy.deepcopy(image), image_loaded))
+        finally:
+            del self._image_pulls[key]
+        return image, image_loaded
+
+    def _pull_image(self, context, repo, tag, image_pull_policy,
+                    driver_name):
         try:
             image_driver = self.image_drivers[driver_name]
             image, image_loaded = image_driver.pull_image(
@@ -231,7 +316,7 @@ class DockerDriver(driver.ContainerDriver):
 
     def read_tar_image(self, image):
         with docker_utils.docker_client() as docker:
-            LOG.debug('Reading local tar image %s ', image['path'])
+            LOG.debug('Reading tar image %s ', image['image'])
             try:
                 docker.read_tar_image(image)
             except Exception:
@@ -454,7 +539,12 @@ class DockerDriver(driver.ContainerDriver):
         return True
 
     def list(self, context):
-        non_existent_containers = []
+        local_containers, id_to_container_map = self._list_local_containers(
+            context)
+        return self._populate_local_containers(local_containers,
+                                               id_to_container_map)
+
+    def _list_local_containers(self, context):
         with docker_utils.docker_client() as docker:
             docker_containers = docker.list_containers()
             id_to_container_map = {c['Id']: c
@@ -462,6 +552,11 @@ class DockerDriver(driver.ContainerDriver):
             uuids = self._get_container_uuids(docker_containers)
 
         local_containers = self._get_local_containers(context, uuids)
+        return local_containers, id_to_container_map
+
+    def _populate_local_containers(self, local_containers,
+                                   id_to_container_map):
+        non_existent_containers = []
         for container in local_containers:
             if container.status in (consts.CREATING, consts.DELETING,
                                     consts.DELETED):
@@ -513,10 +608,24 @@ class DockerDriver(driver.ContainerDriver):
                                             filters={'uuid': uuids})
         return containers
 
-    def update_containers_states(self, context, containers):
-        local_containers, non_existent_containers = self.list(context)
+    def update_containers_states(self, context, containers=None):
+        """Sync the status and host of containers with the local docker.
+
+        :param containers: the database records of the containers to sync.
+                           By default, the containers of this host and the
+                           ones found in the local docker are synced.
+        :returns: the database records of the synced containers.
+        """
+        if containers is None:
+            containers, id_to_container_map = self._list_local_containers(
+                context)
+            local_containers, non_existent_containers = \
+                self._populate_local_containers(
+                    [c.obj_clone() for c in containers], id_to_container_map)
+        else:
+            local_containers, non_existent_containers = self.list(context)
         if not local_containers:
-            return
+            return containers
 
         id_to_local_container_map = {container.container_id: container
                                      for container in local_containers
@@ -525,6 +634,9 @@ class DockerDriver(driver.ContainerDriver):
                                for container in containers
                                if container.container_id}
 
+        # Note(kiennt): Current host.
+        cur_host = CONF.host
+        updated_containers = []
         for cid in (six.viewkeys(id_to_container_map) &
                     six.viewkeys(id_to_local_container_map)):
             container = id_to_container_map[cid]
@@ -533,18 +645,20 @@ class DockerDriver(driver.ContainerDriver):
             if container.status != local_container.status:
                 old_status = container.status
                 container.status = local_container.status
-                container.save(context)
                 LOG.info('Status of container %s changed from %s to %s',
                          container.uuid, old_status, container.status)
             # sync host
-            # Note(kiennt): Current host.
-            cur_host = CONF.host
             if container.host != cur_host:
                 old_host = container.host
                 container.host = cur_host
-                container.save(context)
                 LOG.info('Host of container %s changed from %s to %s',
                          container.uuid, old_host, container.host)
+            if container.obj_what_changed():
+                updated_containers.append(container)
+        # Save all the changes of this cycle at once
+        if updated_containers:
+            objects.Container.save_all(context, updated_containers)
+
         for container in non_existent_containers:
             if container.host == cur_host:
                 if container.auto_remove:
@@ -553,6 +667,78 @@ class DockerDriver(driver.ContainerDriver):
                 else:
                     self.heal_with_rebuilding_container(context,
                                                         container)
+        return containers
+
+    def watch_local_images(self):
+        """Maintain the index of the local images from the docker events.
+
+        This blocks reading the events stream of the local docker daemon
+        and only returns when the stream is closed.
+        """
+        image_index.get_image_index().watch()
+
+    def get_local_images(self):
+        index = image_index.get_image_index()
+        if not index.watching:
+            # Take a snapshot of the local images instead
+            with docker_utils.docker_client() as docker:
+                index.load(docker)
+        return index.references()
+
+    def watch_container_states(self, context):
+        """Update the state of the containers from the docker events.
+
+        This blocks reading the events stream of the local docker daemon
+        and only returns when the stream is closed.
+        """
+        name_prefix = consts.NAME_PREFIX
+        with docker_utils.docker_client(dedicated=True) as docker:
+            events = docker.events(decode=True,
+                                   filters={'type': 'container',
+                                            'event': CONTAINER_STATE_EVENTS})
+            for event in events:
+                actor = event.get('Actor') or {}
+                name = (actor.get('Attributes') or {}).get('name', '')
+                if not name.startswith(name_prefix):
+                    continue
+                uuid = name[len(name_prefix):]
+                if not uuidutils.is_uuid_like(uuid):
+                    continue
+                try:
+                    self._update_container_state(context, docker, uuid,
+                                                 actor.get('ID'))
+                except Exception as e:
+                    LOG.warning('Failed to update the state of container '
+                                '%(uuid)s on event %(event)s: %(error)s',
+                                {'uuid': uuid, 'event': event.get('Action'),
+                                 'error': six.text_type(e)})
+
+    def _update_container_state(self, context, docker, uuid, container_id):
+        try:
+            container = objects.Container.get_by_uuid(context, uuid)
+        except exception.ContainerNotFound:
+            return
+        if (container.container_id != container_id or
+                container.status in (consts.CREATING, consts.DELETING,
+                                     consts.DELETED)):
+            # Skip the containers in an unstable state, the same as the
+            # periodic sync does.
+            return
+
+        try:
+            response = docker.inspect_container(container_id)
+        except errors.APIError as api_error:
+            if is_not_found(api_error):
+                return
+            raise
+
+        old_status = container.status
+        self._populate_container_state(container, response.get('State'))
+        if container.obj_what_changed():
+            container.save(context)
+        if container.status != old_status:
+            LOG.info('Status of container %s changed from %s to %s',
+                     container.uuid, old_status, container.status)
 
     def show(self, context, container):
         with docker_utils.docker_client() as docker:
@@ -854,7 +1040,13 @@ class DockerDriver(driver.ContainerDriver):
             args['cpu_period'] = 100000
 
         with docker_utils.docker_client() as docker:
-            return docker.update_container(container.container_id, **args)
+            try:
+                return docker.update_container(container.container_id,
+                                               **args)
+            finally:
+                # NOTE: Invalidate once docker has the new quota, otherwise
+                # a concurrent get_cpu_used could cache the old one again.
+                self._cpu_reserved.pop(container.container_id, None)
 
     @check_container_id
     def get_websocket_url(self, context, container):
@@ -887,7 +1079,7 @@ class DockerDriver(driver.ContainerDriver):
     @check_container_id
     @wrap_docker_error
     def get_archive(self, context, container, path):
-        with docker_utils.docker_client() as docker:
+        with docker_utils.docker_client(dedicated=True) as docker:
             try:
                 stream, stat = docker.get_archive(
                     container.container_id, path)
@@ -904,7 +1096,7 @@ class DockerDriver(driver.ContainerDriver):
     @check_container_id
     @wrap_docker_error
     def put_archive(self, context, container, path, data):
-        with docker_utils.docker_client() as docker:
+        with docker_utils.docker_client(dedicated=True) as docker:
             try:
                 docker.put_archive(container.container_id, path, data)
             except errors.APIError as api_error:
@@ -912,6 +1104,10 @@ class DockerDriver(driver.ContainerDriver):
                     raise exception.Invalid(_("%s") % str(api_error))
                 raise
 
+    @check_container_id
+    def get_archive_url(self, context, container):
+        return archive_server.get_url(container.container_id)
+
     @check_container_id
     @wrap_docker_error
     def stats(self, context, container):
@@ -1019,10 +1215,13 @@ class DockerDriver(driver.ContainerDriver):
                                       neutron_net_id):
         docker_net_name = self._get_docker_network_name(context,
                                                         neutron_net_id)
+        if docker_net_name in self._docker_networks:
+            return
         docker_networks = network_api.list_networks(names=[docker_net_name])
         if not docker_networks:
             network_api.create_network(neutron_net_id=neutron_net_id,
                                        name=docker_net_name)
+        self._docker_networks.set(docker_net_name, True)
 
     def _get_docker_network_name(self, context, neutron_net_id):
         # Note(kiseok7): neutron_net_id is a unique ID in neutron networks and
@@ -1105,23 +1304,37 @@ class DockerDriver(driver.ContainerDriver):
         return int(total_disk * (1 - CONF.compute.reserve_disk_for_image))
 
     def get_cpu_used(self):
+        """Return the CPU reserved by the running containers.
+
+        The reservation of a container only changes when it is updated, so
+        it is inspected once and cached until the container is updated or
+        removed, the periodic cost being a single listing of the containers.
+        """
         cpu_used = 0
         with docker_utils.docker_client() as docker:
             containers = docker.containers()
+            cnt_ids = set()
             for container in containers:
                 cnt_id = container['Id']
-                # Fixme: if there is a way to get all container inspect info
-                # for one call only?
-                inspect = docker.inspect_container(cnt_id)
-                cpu_period = inspect['HostConfig']['CpuPeriod']
-                cpu_quota = inspect['HostConfig']['CpuQuota']
-                if cpu_period and cpu_quota:
-                    cpu_used += float(cpu_quota) / cpu_period
-                else:
-                    if 'NanoCpus' in inspect['HostConfig']:
-                        nanocpus = inspect['HostConfig']['NanoCpus']
-                        cpu_used += float(nanocpus) / 1e9
-            return cpu_used
+                cnt_ids.add(cnt_id)
+                if cnt_id not in self._cpu_reserved:
+                    inspect = docker.inspect_container(cnt_id)
+                    self._cpu_reserved[cnt_id] = self._get_cpu_reserved(
+                        inspect['HostConfig'])
+                cpu_used += self._cpu_reserved[cnt_id]
+
+        for cnt_id in set(self._cpu_reserved) - cnt_ids:
+            del self._cpu_reserved[cnt_id]
+        return cpu_used
+
+    def _get_cpu_reserved(self, host_config):
+        cpu_period = host_config['CpuPeriod']
+        cpu_quota = host_config['CpuQuota']
+        if cpu_period and cpu_quota:
+            return float(cpu_quota) / cpu_period
+        if 'NanoCpus' in host_config:
+            return float(host_config['NanoCpus']) / 1e9
+        return 0
 
     def add_security_group(self, context, container, security_group):
 
@@ -1142,6 +1355,14 @@ class DockerDriver(driver.ContainerDriver):
     def get_available_nodes(self):
         return [self._host.get_hostname()]
 
+    def verify_cached_images(self):
+        for image_driver in self.image_drivers.values():
+            image_driver.verify_cached_images()
+
+    def prune_port_pool(self):
+        if CONF.network.driver == 'kuryr':
+            port_pool.get_port_pool().prune()
+
     @wrap_docker_error
     def network_detach(self, context, container, network):
         with docker_utils.docker_client() as docker:
@@ -1199,4 +1420,5 @@ class DockerDriver(driver.ContainerDriver):
             docker_network = network_api.create_network(
                 neutron_net_id=network.neutron_net_id,
                 name=docker_net_name)
+            self._docker_networks.set(docker_net_name, True)
             return docker_network
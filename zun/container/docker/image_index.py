@@ -0,0 +1,156 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""An in-memory index of the images present in the local docker daemon."""
+
+import time
+
+from docker import errors
+from oslo_log import log as logging
+
+from zun.common import utils
+from zun.container.docker import utils as docker_utils
+
+LOG = logging.getLogger(__name__)
+
+
+class LocalImageIndex(object):
+    """The images of the local docker daemon by 'repo:tag' reference.
+
+    The index is loaded from the image list of docker then maintained from
+    the image events of docker. It is only trusted to tell that an image is
+    absent while its events are watched, see watch().
+    """
+
+    def __init__(self):
+        # image id => {'id', 'size', 'refs', 'last_used'}
+        self._images = {}
+        # 'repo:tag' reference => image id
+        self._refs = {}
+        self.watching = False
+
+    def reset(self):
+        self._images = {}
+        self._refs = {}
+        self.watching = False
+
+    def _set_image(self, image_id, refs, size):
+        entry = self._images.get(image_id)
+        if entry is None:
+            entry = {'id': image_id, 'refs': set(), 'size': size,
+                     'last_used': None}
+            self._images[image_id] = entry
+        entry['size'] = size
+        refs = set(utils.normalize_image_reference(ref) for ref in refs
+                   if ref != '<none>:<none>')
+        for ref in entry['refs'] - refs:
+            self._refs.pop(ref, None)
+        for ref in refs:
+            # A reference moved from another image
+            old_id = self._refs.get(ref)
+            if old_id is not None and old_id != image_id:
+                self._images[old_id]['refs'].discard(ref)
+            self._refs[ref] = image_id
+        entry['refs'] = refs
+
+    def _remove_image(self, image_id):
+        entry = self._images.pop(image_id, None)
+        if entry is not None:
+            for ref in entry['refs']:
+                if self._refs.get(ref) == image_id:
+                    del self._refs[ref]
+
+    def load(self, docker):
+        """Rebuild the index from the image list of docker."""
+        images = {}
+        for image in docker.images():
+            images[image['Id']] = image
+        last_used = {image_id: entry['last_used']
+                     for image_id, entry in self._images.items()}
+        self._images = {}
+        self._refs = {}
+        for image_id, image in images.items():
+            self._set_image(image_id, image.get('RepoTags') or [],
+                            image.get('Size'))
+            self._images[image_id]['last_used'] = last_used.get(image_id)
+
+    def refresh_image(self, docker, image):
+        """Update the index entry of an image from its docker inspection.
+
+        :param image: the id or a reference of the image.
+        """
+        try:
+            info = docker.inspect_image(image)
+        except errors.NotFound:
+            if image in self._images:
+                self._remove_image(image)
+            else:
+                ref = utils.normalize_image_reference(image)
+                image_id = self._refs.get(ref)
+                if image_id is not None:
+                    self._remove_image(image_id)
+            return
+        self._set_image(info['Id'], info.get('RepoTags') or [],
+                        info.get('Size'))
+
+    def watch(self):
+        """Load the index and keep it up to date from the image events.
+
+        This blocks reading the events stream of the local docker daemon
+        and only returns when the stream is closed.
+        """
+        with docker_utils.docker_client(dedicated=True) as docker:
+            # Replay the events that happen while the images are listed
+            since = int(time.time())
+            self.load(docker)
+            events = docker.events(decode=True, since=since,
+                                   filters={'type': 'image'})
+            self.watching = True
+            try:
+                for event in events:
+                    image = (event.get('Actor') or {}).get('ID')
+                    if not image:
+                        continue
+                    try:
+                        self.refresh_image(docker, image)
+                    except Exception as e:
+                        LOG.warning('Failed to index image %(image)s on '
+                                    'event %(event)s: %(error)s',
+                                    {'image': image,
+                                     'event': event.get('Action'),
+                                     'error': e})
+            finally:
+                self.watching = False
+
+    def get(self, repo, tag):
+        """Return the index entry of the image 'repo:tag', if present."""
+        image_id = self._refs.get(utils.normalize_image_reference(repo, tag))
+        if image_id is None:
+            return None
+        return self._images.get(image_id)
+
+    def touch(self, repo, tag):
+        """Record that the image 'repo:tag' has been used."""
+        entry = self.get(repo, tag)
+        if entry is not None:
+            entry['last_used'] = time.time()
+
+    def references(self):
+        """Return the sorted 'repo:tag' references of the local images."""
+        return sorted(self._refs)
+
+
+_image_index = LocalImageIndex()
+
+
+def get_image_index():
+    return _image_index
@@ -10,15 +10,22 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import collections
 import contextlib
+import re
 import six
 import sys
 import tarfile
+import threading
+import time
 
 import docker
 from docker import errors
+from eventlet import semaphore
+from oslo_log import log as logging
 from oslo_serialization import jsonutils
 from oslo_utils import encodeutils
+from six.moves.urllib import parse
 
 from zun.common import consts
 from zun.common import exception
@@ -27,23 +34,200 @@ import zun.conf
 
 
 CONF = zun.conf.CONF
+LOG = logging.getLogger(__name__)
 
+# Interval in seconds between two reports of the docker client metrics.
+METRICS_REPORT_INTERVAL = 600
 
-@contextlib.contextmanager
-def docker_client():
+_API_VERSION_RE = re.compile(r'^/v[0-9.]+(?=/)')
+# The paths of the docker API are turned into endpoints by replacing the
+# id or name of the resource they refer to, e.g. /containers/{id}/json.
+_ENDPOINT_RES = [
+    (re.compile(r'^/(containers|exec|networks|volumes|plugins)/'
+                r'(?!(json|create|prune)$)[^/]+'), r'/\1/{id}'),
+    (re.compile(r'^/images/(?!(json|create|prune|load|search|get)$)'
+                r'.+?(?=/(json|history|push|tag|get)$|$)'), r'/images/{id}'),
+]
+
+
+def get_endpoint(method, url):
+    """Return the API endpoint a docker request is sent to."""
+    path = _API_VERSION_RE.sub('', parse.urlparse(url).path)
+    for regex, replacement in _ENDPOINT_RES:
+        path = regex.sub(replacement, path)
+    return '%s %s' % (method.upper(), path)
+
+
+class DockerClientMetrics(object):
+    """Timings of the docker clients of this process.
+
+    It records the time spent waiting for a client of the pool and the
+    latency of the docker API requests, per endpoint. The latency of a
+    streamed response only covers the time to receive its headers.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.pool_wait = self._new_timing()
+        self.requests = collections.defaultdict(self._new_timing)
+        self.last_report = time.time()
+
+    @staticmethod
+    def _new_timing():
+        return {'count': 0, 'total': 0.0, 'max': 0.0}
+
+    @staticmethod
+    def _record(timing, seconds):
+        timing['count'] += 1
+        timing['total'] += seconds
+        timing['max'] = max(timing['max'], seconds)
+
+    def record_pool_wait(self, seconds):
+        self._record(self.pool_wait, seconds)
+
+    def record_request(self, endpoint, seconds):
+        self._record(self.requests[endpoint], seconds)
+
+    def to_dict(self):
+        def _summary(timing):
+            count = timing['count']
+            return {'count': count,
+                    'avg': timing['total'] / count if count else 0.0,
+                    'max': timing['max']}
+
+        return {'pool_wait': _summary(self.pool_wait),
+                'requests': {endpoint: _summary(timing)
+                             for endpoint, timing in self.requests.items()}}
+
+    def report(self):
+        """Log the metrics if they were not reported recently."""
+        now = time.time()
+        if now - self.last_report < METRICS_REPORT_INTERVAL:
+            return
+        self.last_report = now
+        LOG.debug('Docker client metrics: %s', self.to_dict())
+
+
+metrics = DockerClientMetrics()
+
+
+def create_client(url=None):
+    """Create a docker client using the [docker] TLS options.
+
+    :param url: the URL of the docker API, [docker]api_url by default.
+    """
     client_kwargs = dict()
     if not CONF.docker.api_insecure:
         client_kwargs['ca_cert'] = CONF.docker.ca_file
         client_kwargs['client_key'] = CONF.docker.key_file
         client_kwargs['client_cert'] = CONF.docker.cert_file
 
+    return DockerHTTPClient(
+        url or CONF.docker.api_url,
+        CONF.docker.docker_remote_api_version,
+        CONF.docker.default_timeout,
+        **client_kwargs
+    )
+
+
+class DockerClientPool(object):
+    """A pool of keep-alive docker clients shared by the greenthreads.
+
+    A client, and thus its connections and TLS sessions, is reused by the
+    following requests. A client is used by a single greenthread at a
+    time, a greenthread that gets a client while holding one reuses it.
+    """
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self._idle_clients = []
+        self._semaphore = semaphore.Semaphore(size)
+        self._local = threading.local()
+
+    def _create_client(self):
+        return create_client()
+
+    @contextlib.contextmanager
+    def get(self):
+        client = getattr(self._local, 'client', None)
+        if client is not None:
+            yield client
+            return
+
+        start = time.time()
+        if not self._semaphore.acquire(timeout=self.timeout):
+            raise exception.DockerError(error_msg=_(
+                "Timed out after %s seconds waiting for a docker "
+                "client") % self.timeout)
+        metrics.record_pool_wait(time.time() - start)
+        try:
+            if self._idle_clients:
+                client = self._idle_clients.pop()
+            else:
+                client = self._create_client()
+        except Exception:
+            self._semaphore.release()
+            raise
+
+        self._local.client = client
+        try:
+            yield client
+        finally:
+            self._local.client = None
+            self._idle_clients.append(client)
+            self._semaphore.release()
+            metrics.report()
+
+    def close(self):
+        while self._idle_clients:
+            self._idle_clients.pop().close()
+
+
+_client_pool = None
+
+
+def get_client_pool():
+    global _client_pool
+    if _client_pool is None:
+        _client_pool = DockerClientPool(CONF.docker.client_pool_size,
+                                        CONF.docker.client_pool_timeout)
+    return _client_pool
+
+
+def reset_client_pool():
+    global _client_pool
+    if _client_pool is not None:
+        _client_pool.close()
+    _client_pool = None
+
+
+@contextlib.contextmanager
+def _dedicated_client():
+    client = create_client()
     try:
-        yield DockerHTTPClient(
-            CONF.docker.api_url,
-            CONF.docker.docker_remote_api_version,
-            CONF.docker.default_timeout,
-            **client_kwargs
-        )
+        yield client
+    finally:
+        client.close()
+
+
+@contextlib.contextmanager
+def docker_client(dedicated=False):
+    """Get a docker client from the pool of the process.
+
+    :param dedicated: create a client outside of the pool instead, for the
+                      event streams and the image and archive transfers
+                      which would hold a pooled client for a long time.
+    """
+    try:
+        if dedicated:
+            with _dedicated_client() as client:
+                yield client
+        else:
+            with get_client_pool().get() as client:
+                yield client
     except errors.APIError as e:
         desired_exc = exception.DockerError(error_msg=six.text_type(e))
         six.reraise(type(desired_exc), desired_exc, sys.exc_info()[2])
@@ -73,22 +257,43 @@ class DockerHTTPClient(docker.APIClient):
             tls=ssl_config
         )
 
+    def request(self, method, url, *args, **kwargs):
+        start = time.time()
+        try:
+            return super(DockerHTTPClient, self).request(
+                method, url, *args, **kwargs)
+        finally:
+            metrics.record_request(get_endpoint(method, url),
+                                   time.time() - start)
+
     def list_containers(self):
         return self.containers(all=True, filters={'name': consts.NAME_PREFIX})
 
+    def load_image(self, data, quiet=None):
+        # NOTE: The response is streamed since the API version 1.23, it is
+        # consumed to raise the errors of the load and release the
+        # connection before the client is used again.
+        res = super(DockerHTTPClient, self).load_image(data, quiet=quiet)
+        for message in res or []:
+            if isinstance(message, dict) and message.get('error'):
+                raise exception.DockerError(error_msg=message['error'])
+
     def read_tar_image(self, image):
-        image_path = image['path']
-        with tarfile.open(image_path, 'r') as fil:
-            fest = fil.extractfile('manifest.json')
-            data = fest.read()
-            data = jsonutils.loads(encodeutils.safe_decode(data))
-            repo_tags = data[0]['RepoTags']
-            if repo_tags:
-                repo, tag = repo_tags[0].split(":")
-                image['repo'], image['tag'] = repo, tag
-            else:
-                image_uuid = data[0]['Config'].split('.')[0]
-                image['repo'], image['tag'] = image_uuid, ''
+        # The manifest is parsed while a streamed image is loaded
+        data = image.get('manifest')
+        if data is None:
+            image_path = image['path']
+            with tarfile.open(image_path, 'r') as fil:
+                fest = fil.extractfile('manifest.json')
+                data = fest.read()
+                data = jsonutils.loads(encodeutils.safe_decode(data))
+        repo_tags = data[0]['RepoTags']
+        if repo_tags:
+            repo, tag = repo_tags[0].split(":")
+            image['repo'], image['tag'] = repo, tag
+        else:
+            image_uuid = data[0]['Config'].split('.')[0]
+            image['repo'], image['tag'] = image_uuid, ''
 
     def exec_resize(self, exec_id, height=None, width=None):
         # NOTE(hongbin): This is a temporary work-around for a docker issue
@@ -76,7 +76,7 @@ class ContainerDriver(object):
         """List all containers."""
         raise NotImplementedError()
 
-    def update_containers_states(self, context, containers):
+    def update_containers_states(self, context, containers=None):
         """Update containers states."""
         raise NotImplementedError()
 
@@ -145,6 +145,10 @@ class ContainerDriver(object):
         """Copy resource to a container."""
         raise NotImplementedError()
 
+    def get_archive_url(self, context, container):
+        """Get a single use URL streaming the archives of a container."""
+        raise NotImplementedError()
+
     def stats(self, context, container):
         """Display stats of the container."""
         raise NotImplementedError()
@@ -198,6 +202,16 @@ class ContainerDriver(object):
     def get_cpu_used(self):
         raise NotImplementedError()
 
+    def watch_container_states(self, context):
+        raise NotImplementedError()
+
+    def watch_local_images(self):
+        raise NotImplementedError()
+
+    def get_local_images(self):
+        """Return the 'repo:tag' references of the images on the host."""
+        return None
+
     def attach_volume(self, context, volume_mapping):
         raise NotImplementedError()
 
@@ -223,6 +237,14 @@ class ContainerDriver(object):
     def get_available_nodes(self):
         pass
 
+    def verify_cached_images(self):
+        """Verify the integrity of the images cached by the image drivers."""
+        pass
+
+    def prune_port_pool(self):
+        """Delete the pre-created network ports that are no longer used."""
+        pass
+
     def get_available_resources(self, node):
         numa_topo_obj = self.get_host_numa_topology()
         node.numa_topology = numa_topo_obj
@@ -253,6 +275,7 @@ class ContainerDriver(object):
         disk_quota_supported = self.node_support_disk_quota()
         node.disk_quota_supported = disk_quota_supported
         node.runtimes = runtimes
+        node.images = self.get_local_images()
 
     def node_is_available(self, nodename):
         """Return whether this compute service manages a particular node."""
@@ -13,7 +13,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-from oslo_concurrency import processutils
+import os
+
+from oslo_log import log as logging
 from oslo_serialization import jsonutils
 
 from zun.common import exception
@@ -22,12 +24,37 @@ from zun import objects
 from zun.objects import fields
 from zun.pci import utils as pci_utils
 
+LOG = logging.getLogger(__name__)
+
+SYSFS_PCI_DEVICES_PATH = '/sys/bus/pci/devices'
+
+
+def read_sysfs_file(path):
+    """Return the stripped content of a sysfs file, None if unreadable."""
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except (IOError, OSError):
+        return None
+
 
 class Host(object):
 
+    # The PCI devices of the host, together with the PCI addresses they
+    # were probed for. The devices only change on hotplug, which adds or
+    # removes PCI addresses (e.g. when the VFs of a PF are created).
+    _pci_resources = None
+    # The network features of the VFs, by PCI address and interface name.
+    _pcinet_features = {}
+
     def __init__(self):
         self.capabilities = None
 
+    @classmethod
+    def reset_cache(cls):
+        Host._pci_resources = None
+        Host._pcinet_features = {}
+
     def get_cpu_numa_info(self):
         """This method returns a dict containing the cpuset info for a host"""
 
@@ -85,27 +112,32 @@ class Host(object):
         return int(mem_total), int(mem_free), int(mem_ava), int(mem_used)
 
     def get_pci_resources(self):
-        addresses = []
         try:
-            output, status = utils.execute('lspci', '-D', '-nnmm')
-            lines = output.split('\n')
-            for line in lines:
-                if not line:
-                    continue
-                columns = line.split()
-                address = columns[0]
-                addresses.append(address)
-        except processutils.ProcessExecutionError:
-            raise exception.CommandError(cmd='lspci')
+            addresses = sorted(os.listdir(SYSFS_PCI_DEVICES_PATH))
+        except OSError as e:
+            raise exception.CommandError(cmd='ls %s' % SYSFS_PCI_DEVICES_PATH,
+                                         error=e)
+
+        cached = Host._pci_resources
+        if cached is not None and cached[0] == addresses:
+            return cached[1]
 
         pci_info = []
+        complete = True
         for addr in addresses:
-            pci_info.append(self._get_pci_dev_info(addr))
-
-        return jsonutils.dumps(pci_info)
+            device = self._get_pci_dev_info(addr)
+            if device is None:
+                complete = False
+                continue
+            pci_info.append(device)
+        pci_resources = jsonutils.dumps(pci_info)
+        # NOTE: The devices are probed again next time if one of them could
+        # not be read, e.g. while it was being hotplugged.
+        Host._pci_resources = (addresses, pci_resources) if complete else None
+        return pci_resources
 
     def _get_pci_dev_info(self, address):
-        """Returns a dict of PCI device."""
+        """Returns a dict of PCI device, None if it cannot be read."""
 
         def _get_device_type(address):
             """Get a PCI device's device type.
@@ -115,20 +147,13 @@ class Host(object):
             Function (VF). Only normal PCI devices or SR-IOV VFs
             are assignable.
             """
-            path = '/sys/bus/pci/devices/' + address + '/'
-            output, status = utils.execute('ls', path)
-            if "physfn" in output:
-                phys_address = None
-                upath = '/sys/bus/pci/devices/%s/physfn/uevent' % address
-                ou, st = utils.execute('cat', upath)
-                lines = ou.split('\n')
-                for line in lines:
-                    if 'PCI_SLOT_NAME' in line:
-                        columns = line.split("=")
-                        phys_address = columns[1]
+            path = os.path.join(SYSFS_PCI_DEVICES_PATH, address)
+            physfn = os.path.join(path, 'physfn')
+            if os.path.islink(physfn):
+                phys_address = os.path.basename(os.readlink(physfn))
                 return {'dev_type': fields.PciDeviceType.SRIOV_VF,
                         'parent_addr': phys_address}
-            if "virtfn" in output:
+            if any(name.startswith('virtfn') for name in os.listdir(path)):
                 return {'dev_type': fields.PciDeviceType.SRIOV_PF}
             return {'dev_type': fields.PciDeviceType.STANDARD}
 
@@ -147,22 +172,28 @@ class Host(object):
             return {}
 
         def _get_vendor_and_product(address):
-            output, status = utils.execute('lspci', '-n', '-s', address)
-            value = output.split()[2]
-            result = value.split(":")
-            return result[0], result[1]
+            path = os.path.join(SYSFS_PCI_DEVICES_PATH, address)
+            # The ids are written as hexadecimal numbers, e.g. "0x8086"
+            vendor_id = read_sysfs_file(os.path.join(path, 'vendor'))
+            product_id = read_sysfs_file(os.path.join(path, 'device'))
+            if vendor_id is None or product_id is None:
+                return None, None
+            return vendor_id[2:], product_id[2:]
 
         def _get_numa_node(address):
-            numa_node = None
-            output, status = utils.execute('lspci', '-vmm', '-s', address)
-            lines = output.split('\n')
-            for line in lines:
-                if 'NUMANode' in line:
-                    numa_node = int(line.split(":")[1])
-            return numa_node
+            path = os.path.join(SYSFS_PCI_DEVICES_PATH, address, 'numa_node')
+            numa_node = read_sysfs_file(path)
+            # The kernel reports -1 when the device has no NUMA affinity
+            if numa_node is None or int(numa_node) < 0:
+                return None
+            return int(numa_node)
 
         dev_name = 'pci_' + address.replace(":", "_").replace(".", "_")
         vendor_id, product_id = _get_vendor_and_product(address)
+        if vendor_id is None:
+            LOG.warning('Cannot read the vendor and product ids of the PCI '
+                        'device %s', address)
+            return None
         numa_node = _get_numa_node(address)
         device = {
             "dev_id": dev_name,
@@ -207,13 +238,20 @@ class Host(object):
                         'tx-udp_tnl-segmentation': 'txudptnl',
                         'rdma': 'rdma'}
 
+        key = (vf_address, ifname)
+        if key not in Host._pcinet_features:
+            Host._pcinet_features[key] = self._get_net_features(
+                ifname, FEATURES_LIST, FEATURES_MAP)
+        return {'name': devname,
+                'capabilities': Host._pcinet_features[key]}
+
+    def _get_net_features(self, ifname, features_list, features_map):
         features = []
         output, status = utils.execute('ethtool', '-k', ifname)
         lines = output.split('\n')
         for line in lines:
             columns = line.split(":")
-            if columns[0].strip() in FEATURES_LIST:
+            if columns[0].strip() in features_list:
                 if "on" in columns[1].strip():
-                    features.append(FEATURES_MAP.get(columns[0].strip()))
-        return {'name': devname,
-                'capabilities': features}
+                    features.append(features_map.get(columns[0].strip()))
+        return features
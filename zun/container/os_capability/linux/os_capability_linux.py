@@ -13,50 +13,97 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-from collections import defaultdict
+import collections
+import os
 import re
 
 from oslo_log import log as logging
-from zun.common import exception
+from oslo_utils import units
+
 from zun.common import utils
 from zun.container.os_capability import host_capability
 
 
 LOG = logging.getLogger(__name__)
 
+SYSFS_NODE_PATH = '/sys/devices/system/node'
+SYSFS_CPU_ONLINE_PATH = '/sys/devices/system/cpu/online'
+
 
 class LinuxHost(host_capability.Host):
 
-    def get_cpu_numa_info(self):
-        # TODO(sbiswas7): rootwrap changes for zun required.
-        try:
-            output = utils.execute('numactl', '-H')
-        except exception.CommandError:
-            LOG.info("There was a problem while executing lscpu -p=socket"
-                     ",cpu,online. Try again without the online column.")
-        nodes = []
-        for line in re.split('\n', output[0]):
-            if re.match('node.*cpus.*', line):
-                nodes.append(line)
-        node_map = defaultdict(list)
-        for node in nodes:
-            node_id = re.findall("node (\d+) cpus", node)[0]
-            node_cpus = re.findall("cpus\: (.*)", node)
-            node_cpus_list = node_cpus[0].split(" ")
-            for num in range(len(node_cpus_list)):
-                node_map[node_id].append(int(node_cpus_list[num]))
-        return node_map
+    # The NUMA topology read from sysfs, together with the online nodes,
+    # memory nodes and CPUs it was read for. The topology only changes
+    # when a node, its memory or a CPU is hotplugged.
+    _numa_info = None
 
-    def get_mem_numa_info(self):
-        try:
-            output = utils.execute('numactl', '-H')
-        except exception.CommandError:
-            LOG.info(
-                "There was a problem while executing numactl -H,"
-                "Try again without the online column.")
+    @classmethod
+    def reset_cache(cls):
+        super(LinuxHost, cls).reset_cache()
+        LinuxHost._numa_info = None
+
+    def _get_hotplug_state(self):
+        paths = (os.path.join(SYSFS_NODE_PATH, 'online'),
+                 os.path.join(SYSFS_NODE_PATH, 'has_memory'),
+                 SYSFS_CPU_ONLINE_PATH)
+        return tuple(host_capability.read_sysfs_file(path) for path in paths)
+
+    def _read_numa_info(self):
+        """Read the CPUs and the memory size of the NUMA nodes from sysfs.
 
-        sizes = re.findall("size\: \d*", str(output))
+        :returns: a tuple of the CPUs of each node by node id, the list of
+                  the memory size, in MB, of each of these nodes, and whether
+                  all of them could be read.
+        """
+        node_map = collections.OrderedDict()
         mem_numa = []
-        for size in sizes:
-            mem_numa.append(int(size.split(' ')[1]))
-        return mem_numa
+        try:
+            names = os.listdir(SYSFS_NODE_PATH)
+        except OSError:
+            LOG.info("No NUMA information available in %s", SYSFS_NODE_PATH)
+            return node_map, mem_numa, False
+
+        complete = True
+        node_ids = []
+        for name in names:
+            match = re.match(r'node(\d+)$', name)
+            if match:
+                node_ids.append(int(match.group(1)))
+        for node_id in sorted(node_ids):
+            path = os.path.join(SYSFS_NODE_PATH, 'node%d' % node_id)
+            cpulist = host_capability.read_sysfs_file(
+                os.path.join(path, 'cpulist'))
+            meminfo = host_capability.read_sysfs_file(
+                os.path.join(path, 'meminfo'))
+            if cpulist is None or meminfo is None:
+                LOG.warning("Cannot read the CPUs or the memory of NUMA "
+                            "node %s", node_id)
+                complete = False
+            cpus = utils.parse_floating_cpu(cpulist) if cpulist else set()
+            node_map[str(node_id)] = sorted(cpus)
+            match = re.search(r'MemTotal:\s+(\d+) kB', meminfo or '')
+            mem_total = int(match.group(1)) if match else 0
+            mem_numa.append(mem_total // units.Ki)
+        return node_map, mem_numa, complete
+
+    def _get_numa_info(self):
+        state = self._get_hotplug_state()
+        cached = LinuxHost._numa_info
+        if cached is not None and cached[0] == state:
+            return cached[1]
+
+        node_map, mem_numa, complete = self._read_numa_info()
+        # NOTE: A topology that could not be fully read is read again next
+        # time instead of being kept until a hotplug.
+        LinuxHost._numa_info = ((state, (node_map, mem_numa)) if complete
+                                else None)
+        return node_map, mem_numa
+
+    def get_cpu_numa_info(self):
+        node_map, mem_numa = self._get_numa_info()
+        return collections.OrderedDict(
+            (node, list(cpus)) for node, cpus in node_map.items())
+
+    def get_mem_numa_info(self):
+        node_map, mem_numa = self._get_numa_info()
+        return list(mem_numa)
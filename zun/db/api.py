@@ -128,6 +128,17 @@ def update_container(context, container_id, values):
         context, container_id, values)
 
 
+@profiler.trace("db")
+def update_containers(context, values):
+    """Update properties of many containers at once.
+
+    :param context: Request context
+    :param values: A dict of the properties to be updated, keyed by the
+                   uuid of the containers.
+    """
+    return _get_dbdriver_instance().update_containers(context, values)
+
+
 @profiler.trace("db")
 def list_volume_mappings(context, filters=None, limit=None, marker=None,
                          sort_key=None, sort_dir=None):
@@ -1110,5 +1121,12 @@ def list_exec_instances(context, filters=None, limit=None, marker=None,
 
 
 @profiler.trace('db')
-def count_usage(context, project_id, flag):
-    return _get_dbdriver_instance().count_usage(context, project_id, flag)
+def count_usages(context, project_id):
+    """Count the usages of the containers of a project.
+
+    :param context: The security context
+    :param project_id: The project to count the usages of.
+    :returns: A dict of the number of containers, and of the sums of the
+              cpu, memory and disk of the containers of the project.
+    """
+    return _get_dbdriver_instance().count_usages(context, project_id)
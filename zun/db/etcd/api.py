@@ -15,10 +15,16 @@
 """etcd storage backend."""
 
 from datetime import datetime
+import functools
+import random
+import sys
+import time
+
 import etcd
 from oslo_concurrency import lockutils
 from oslo_log import log
 from oslo_serialization import jsonutils as json
+from oslo_utils import excutils
 from oslo_utils import strutils
 from oslo_utils import timeutils
 from oslo_utils import uuidutils
@@ -105,12 +111,44 @@ def translate_etcd_result(etcd_result, model_type):
         raise
 
 
+def retry_on_compare_failed(resource):
+    """Retry a read-modify-write that lost a compare-and-swap.
+
+    The decorated method must read the record it writes on every call, the
+    id of the record being its second positional argument after the
+    context.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, context, record_id, *args, **kwargs):
+            retries = 0
+            while True:
+                try:
+                    return func(self, context, record_id, *args, **kwargs)
+                except etcd.EtcdCompareFailed:
+                    if retries >= CONF.etcd.cas_max_retries:
+                        raise exception.ConcurrentUpdate(resource=resource,
+                                                         id=record_id)
+                    retries += 1
+                    LOG.debug('%(resource)s %(id)s was modified '
+                              'concurrently, retrying the write '
+                              '(%(retries)d/%(max)d)',
+                              {'resource': resource, 'id': record_id,
+                               'retries': retries,
+                               'max': CONF.etcd.cas_max_retries})
+                    # Spread the retries of the writers that lost the race.
+                    time.sleep(random.uniform(0, 0.01 * retries))
+        return wrapper
+    return decorator
+
+
 @six.add_metaclass(singleton.Singleton)
 class EtcdAPI(object):
     """etcd API."""
 
     def __init__(self, host, port):
         self.client = etcd.Client(host=host, port=port)
+        self._container_indexes_checked = False
 
     @lockutils.synchronized('etcd-client')
     def clean_all_zun_data(self):
@@ -136,15 +174,17 @@ class EtcdAPI(object):
         return filters
 
     def _filter_resources(self, resources, filters):
-        for c in list(resources):
-            for k, v in filters.items():
-                if c.get(k) != v:
-                    resources.remove(c)
-                    break
+        def _match(resource, key, value):
+            if isinstance(value, list):
+                return resource.get(key) in value
+            return resource.get(key) == value
 
-        return resources
+        return [r for r in resources
+                if all(_match(r, k, v) for k, v in filters.items())]
 
-    def _process_list_result(self, res_list, limit=None, sort_key=None):
+    def _process_list_result(self, res_list, limit=None, marker=None,
+                             sort_key=None, sort_dir=None,
+                             default_sort_key=None):
         if len(res_list) == 0:
             return []
         sorted_res_list = res_list
@@ -152,36 +192,149 @@ class EtcdAPI(object):
             if not hasattr(res_list[0], sort_key):
                 raise exception.InvalidParameterValue(
                     err='Container has no attribute: %s' % sort_key)
-            sorted_res_list = sorted(res_list, key=lambda k: k.get(sort_key))
+        sort_keys = [k for k in (sort_key, default_sort_key) if k]
+        if sort_keys:
+            def _sort_value(res):
+                return tuple(getattr(res, k, None) for k in sort_keys)
+
+            reverse = sort_dir == 'desc'
+            sorted_res_list = sorted(res_list, key=_sort_value,
+                                     reverse=reverse)
+            if marker is not None:
+                # NOTE: The marker is the last resource of the previous
+                # page, it may have been deleted in the meantime so the
+                # page starts after its position in the sort order.
+                marker_value = _sort_value(marker)
+                if reverse:
+                    sorted_res_list = [r for r in sorted_res_list
+                                       if _sort_value(r) < marker_value]
+                else:
+                    sorted_res_list = [r for r in sorted_res_list
+                                       if _sort_value(r) > marker_value]
 
         if limit:
             sorted_res_list = sorted_res_list[0:limit]
 
         return sorted_res_list
 
-    def list_containers(self, context, filters=None, limit=None,
-                        marker=None, sort_key=None, sort_dir=None):
+    def _read_container_index(self, field, value):
+        """Return the uuids of the containers indexed under a value."""
+        try:
+            res = self.client.read(models.Container.index_path(field, value))
+        except etcd.EtcdKeyNotFound:
+            return set()
+        return set(c.key.rsplit('/', 1)[-1]
+                   for c in getattr(res, 'children', [])
+                   if not c.dir)
+
+    def _get_container_uuids_by_index(self, filters):
+        """Return the uuids of the containers that may match filters.
+
+        The lookup is done on the first indexed field found in the filters,
+        in the order of the indexed fields which is from the most to the
+        least selective. None is returned if no filter can use an index.
+        """
+        self._ensure_container_indexes()
+        for field in models.Container.indexed_fields():
+            value = filters.get(field)
+            if value is None:
+                continue
+            values = value if isinstance(value, list) else [value]
+            uuids = set()
+            for v in values:
+                if v is not None:
+                    uuids.update(self._read_container_index(field, v))
+            return uuids
+        return None
+
+    def _list_all_containers(self):
         try:
             res = getattr(self.client.read('/containers'), 'children', None)
         except etcd.EtcdKeyNotFound:
             # Before the first container been created, path '/containers'
             # does not exist.
             return []
-        except Exception as e:
-            LOG.error(
-                "Error occurred while reading from etcd server: %s",
-                six.text_type(e))
-            raise
 
         containers = []
         for c in res:
             if c.value is not None:
                 containers.append(translate_etcd_result(c, 'container'))
+        return containers
+
+    def _get_containers_by_uuids(self, container_uuids):
+        containers = []
+        for container_uuid in sorted(container_uuids):
+            try:
+                res = self.client.read('/containers/' + container_uuid)
+            except etcd.EtcdKeyNotFound:
+                # The index is stale, the container has been deleted.
+                continue
+            containers.append(translate_etcd_result(res, 'container'))
+        return containers
+
+    def list_containers(self, context, filters=None, limit=None,
+                        marker=None, sort_key=None, sort_dir=None):
         filters = self._add_project_filters(context, filters)
+        try:
+            container_uuids = self._get_container_uuids_by_index(filters)
+            if container_uuids is None:
+                containers = self._list_all_containers()
+            else:
+                containers = self._get_containers_by_uuids(container_uuids)
+        except Exception as e:
+            LOG.error(
+                "Error occurred while reading from etcd server: %s",
+                six.text_type(e))
+            raise
+
         filtered_containers = self._filter_resources(
             containers, filters)
         return self._process_list_result(filtered_containers,
-                                         limit=limit, sort_key=sort_key)
+                                         limit=limit, marker=marker,
+                                         sort_key=sort_key, sort_dir=sort_dir,
+                                         default_sort_key='uuid')
+
+    def _cleanup_container_indexes(self, container_uuid, index_keys):
+        """Delete the index keys written by a failed container update."""
+        try:
+            current = json.loads(
+                self.client.read('/containers/' + container_uuid).value)
+            index_keys = set(index_keys) - set(
+                models.Container.index_keys(current, container_uuid))
+        except etcd.EtcdKeyNotFound:
+            pass
+        self._delete_container_indexes(index_keys)
+
+    def _delete_container_indexes(self, index_keys):
+        for key in index_keys:
+            try:
+                self.client.delete(key)
+            except etcd.EtcdKeyNotFound:
+                pass
+
+    def rebuild_container_indexes(self):
+        """Write the index keys of all the containers.
+
+        The containers created before the indexes existed are not visible
+        to the filtered listings until this has been run once.
+        """
+        for container in self._list_all_containers():
+            for key in models.Container.index_keys(container.as_dict(),
+                                                   container.uuid):
+                self.client.write(key, '')
+
+    def _ensure_container_indexes(self):
+        if self._container_indexes_checked:
+            return
+        try:
+            self.client.read(models.Container.index_marker())
+        except etcd.EtcdKeyNotFound:
+            LOG.info('Building the indexes of the existing containers')
+            self.rebuild_container_indexes()
+            # Only written once every container is indexed, a process
+            # interrupted meanwhile leaves the rebuild to the next one.
+            self.client.write(models.Container.index_marker(), '')
+        self._container_indexes_checked = True
 
     def _validate_unique_container_name(self, context, name):
         if not CONF.compute.unique_container_name_scope:
@@ -207,21 +360,90 @@ class EtcdAPI(object):
             raise exception.ContainerAlreadyExists(field='name',
                                                    value=lowername)
 
-    @lockutils.synchronized('etcd_container')
+    def _get_container_name_key(self, name, project_id):
+        scope = CONF.compute.unique_container_name_scope
+        if scope == 'project':
+            return models.Container.name_key(name, project_id)
+        elif scope == 'global':
+            return models.Container.name_key(name)
+        return None
+
+    def _container_exists(self, container_uuid):
+        try:
+            self.client.read('/containers/' + container_uuid)
+        except etcd.EtcdKeyNotFound:
+            return False
+        return True
+
+    def _reserve_container_name(self, context, name, project_id,
+                                container_uuid):
+        """Reserve the name of a container when names are unique.
+
+        The reservation is atomic, so two containers given the same name
+        concurrently can not both get it.
+
+        :returns: the key of the reservation, or None if names are not
+                  unique.
+        :raises: ContainerAlreadyExists if another container has the name.
+        """
+        name_key = self._get_container_name_key(name, project_id)
+        if name_key is None:
+            return None
+        try:
+            self.client.write(name_key, container_uuid, prevExist=False)
+        except etcd.EtcdAlreadyExist:
+            try:
+                owner = self.client.read(name_key).value
+            except etcd.EtcdKeyNotFound:
+                owner = None
+            if owner != container_uuid:
+                if owner is None or self._container_exists(owner):
+                    raise exception.ContainerAlreadyExists(
+                        field='name', value=name.lower())
+                # The container holding the name was deleted without
+                # releasing it, take it over unless another writer did.
+                try:
+                    self.client.write(name_key, container_uuid,
+                                      prevValue=owner)
+                except (etcd.EtcdCompareFailed, etcd.EtcdKeyNotFound):
+                    raise exception.ContainerAlreadyExists(
+                        field='name', value=name.lower())
+
+        # NOTE: The containers created before the names were reserved hold
+        # no reservation.
+        try:
+            self._validate_unique_container_name(context, name)
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                self._release_container_name(name_key, container_uuid)
+        return name_key
+
+    def _release_container_name(self, name_key, container_uuid):
+        if name_key is None:
+            return
+        try:
+            self.client.delete(name_key, prevValue=container_uuid)
+        except (etcd.EtcdKeyNotFound, etcd.EtcdCompareFailed):
+            pass
+
     def create_container(self, context, container_data):
         # ensure defaults are present for new containers
         if not container_data.get('uuid'):
             container_data['uuid'] = uuidutils.generate_uuid()
 
+        name_key = None
         if container_data.get('name'):
-            self._validate_unique_container_name(context,
-                                                 container_data['name'])
+            name_key = self._reserve_container_name(
+                context, container_data['name'],
+                container_data.get('project_id'), container_data['uuid'])
 
         container = models.Container(container_data)
         try:
             container.save()
         except Exception:
-            raise
+            with excutils.save_and_reraise_exception():
+                self._release_container_name(name_key,
+                                             container_data['uuid'])
 
         return container
 
@@ -263,39 +485,97 @@ class EtcdAPI(object):
 
         return containers[0]
 
-    @lockutils.synchronized('etcd_container')
     def destroy_container(self, context, container_uuid):
         container = self.get_container_by_uuid(context, container_uuid)
         self.client.delete('/containers/' + container.uuid)
-
-    @lockutils.synchronized('etcd_container')
+        self._delete_container_indexes(
+            models.Container.index_keys(container.as_dict(), container.uuid))
+        if container.name:
+            self._release_container_name(
+                self._get_container_name_key(container.name,
+                                             container.project_id),
+                container.uuid)
+
+    @retry_on_compare_failed('Container')
     def update_container(self, context, container_uuid, values):
         # NOTE(yuywz): Update would fail if any other client
-        # write '/containers/$CONTAINER_UUID' in the meanwhile
+        # write '/containers/$CONTAINER_UUID' in the meanwhile, in which
+        # case it is retried from a fresh read of the container.
         if 'uuid' in values:
             msg = _("Cannot overwrite UUID for an existing Container.")
             raise exception.InvalidParameterValue(err=msg)
 
-        if 'name' in values:
-            self._validate_unique_container_name(context, values['name'])
-
         try:
             target_uuid = self.get_container_by_uuid(
                 context, container_uuid).uuid
             target = self.client.read('/containers/' + target_uuid)
-            target_value = json.loads(target.value)
-            target_value.update(values)
-            target.value = json.dump_as_bytes(target_value)
-            self.client.update(target)
         except etcd.EtcdKeyNotFound:
             raise exception.ContainerNotFound(container=container_uuid)
-        except Exception as e:
-            LOG.error('Error occurred while updating container: %s',
-                      six.text_type(e))
-            raise
+        target_value = json.loads(target.value)
+        old_value = dict(target_value)
+        target_value.update(values)
 
+        name_key = None
+        renamed = False
+        if 'name' in values:
+            name_key = self._reserve_container_name(
+                context, values['name'], target_value.get('project_id'),
+                target_uuid)
+            renamed = name_key is not None and (
+                not old_value.get('name') or
+                old_value['name'].lower() != values['name'].lower())
+
+        old_index_keys = set(models.Container.index_keys(old_value,
+                                                         target_uuid))
+        new_index_keys = set(models.Container.index_keys(target_value,
+                                                         target_uuid))
+        added_index_keys = new_index_keys - old_index_keys
+        try:
+            for key in added_index_keys:
+                self.client.write(key, '')
+            target.value = json.dump_as_bytes(target_value)
+            self.client.update(target)
+        except Exception as e:
+            exc_info = sys.exc_info()
+            # NOTE: A retried update writes the keys of its own values, so
+            # the keys of this attempt must not be left behind.
+            self._cleanup_container_indexes(target_uuid, added_index_keys)
+            if renamed:
+                self._release_container_name(name_key, target_uuid)
+            if isinstance(e, etcd.EtcdKeyNotFound):
+                raise exception.ContainerNotFound(container=container_uuid)
+            if not isinstance(e, etcd.EtcdCompareFailed):
+                LOG.error('Error occurred while updating container: %s',
+                          six.text_type(e))
+            six.reraise(*exc_info)
+
+        self._delete_container_indexes(old_index_keys - new_index_keys)
+        if renamed and old_value.get('name'):
+            self._release_container_name(
+                self._get_container_name_key(old_value['name'],
+                                             old_value.get('project_id')),
+                target_uuid)
         return translate_etcd_result(target, 'container')
 
+    def update_containers(self, context, values):
+        for container_uuid, container_values in values.items():
+            self.update_container(context, container_uuid, container_values)
+
+    def count_usages(self, context, project_id):
+        # NOTE: The usages are not tracked in etcd, they are summed from
+        # the containers of the project.
+        filters = {'project_id': project_id}
+        container_uuids = self._get_container_uuids_by_index(filters)
+        containers = self._filter_resources(
+            self._get_containers_by_uuids(container_uuids), filters)
+        usages = {'containers': len(containers), 'cpu': 0, 'memory': 0,
+                  'disk': 0}
+        for container in containers:
+            usages['cpu'] += container.get('cpu') or 0
+            usages['memory'] += int(container.get('memory') or 0)
+            usages['disk'] += container.get('disk') or 0
+        return usages
+
     @lockutils.synchronized('etcd_zunservice')
     def create_zun_service(self, values):
         values['created_at'] = datetime.isoformat(timeutils.utcnow())
@@ -610,7 +890,7 @@ class EtcdAPI(object):
             raise
         return node
 
-    @lockutils.synchronized('etcd_computenode')
+    @retry_on_compare_failed('Compute node')
     def update_compute_node(self, context, node_uuid, values):
         if 'uuid' in values:
             msg = _('Cannot overwrite UUID for an existing node.')
@@ -619,11 +899,14 @@ class EtcdAPI(object):
         try:
             target = self.client.read('/compute_nodes/' + node_uuid)
             target_value = json.loads(target.value)
+            values['updated_at'] = datetime.isoformat(timeutils.utcnow())
             target_value.update(values)
             target.value = json.dumps(target_value)
             self.client.update(target)
         except etcd.EtcdKeyNotFound:
             raise exception.ComputeNodeNotFound(compute_node=node_uuid)
+        except etcd.EtcdCompareFailed:
+            raise
         except Exception as e:
             LOG.error(
                 'Error occurred while updating compute node: %s',
@@ -631,7 +914,6 @@ class EtcdAPI(object):
             raise
         return translate_etcd_result(target, 'compute_node')
 
-    @lockutils.synchronized('etcd_computenode')
     def create_compute_node(self, context, values):
         values['created_at'] = datetime.isoformat(timeutils.utcnow())
         if not values.get('uuid'):
@@ -640,7 +922,6 @@ class EtcdAPI(object):
         compute_node.save()
         return compute_node
 
-    @lockutils.synchronized('etcd_compute_node')
     def destroy_compute_node(self, context, node_uuid):
         compute_node = self._get_compute_node_by_uuid(context, node_uuid)
         self.client.delete('/compute_nodes/' + compute_node.uuid)
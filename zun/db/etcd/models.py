@@ -18,6 +18,8 @@ etcd models
 
 import etcd
 from oslo_serialization import jsonutils as json
+import six
+import six.moves.urllib.parse as urlparse
 
 from zun.common import exception
 import zun.db.etcd as db
@@ -127,6 +129,28 @@ class Container(Base):
 
     _path = '/containers'
 
+    # NOTE: Every indexed field of a container has a key
+    # '/container_indexes/<field>/<quoted value>/<uuid>' so containers can
+    # be looked up by these fields without reading '/containers' at all.
+    # The index keys are written before and deleted after the container
+    # record, so an index may reference a stale record but never misses
+    # one.
+    _index_path = '/container_indexes'
+    # NOTE: The marker key is written once the index keys of all the
+    # containers have been written, the containers created before the
+    # indexes existed included. The index root can not tell it since the
+    # first container created after an upgrade makes it.
+    _index_marker_path = '/container_indexes_built'
+
+    _indexed_fields = ('name', 'host', 'project_id', 'status')
+
+    # NOTE: The name of a container is reserved, when names are unique, by
+    # a key '/container_names/global/<quoted name>' or
+    # '/container_names/project/<project id>/<quoted name>' holding the uuid
+    # of the container. The key is created with prevExist=False so that
+    # concurrent writers can not take the same name.
+    _name_path = '/container_names'
+
     _fields = objects.Container.fields.keys()
 
     def __init__(self, container_data):
@@ -149,6 +173,52 @@ class Container(Base):
     def fields(cls):
         return cls._fields
 
+    @classmethod
+    def index_marker(cls):
+        return cls._index_marker_path
+
+    @classmethod
+    def indexed_fields(cls):
+        return cls._indexed_fields
+
+    @classmethod
+    def index_path(cls, field, value):
+        return '%s/%s/%s' % (cls._index_path, field,
+                             urlparse.quote(six.text_type(value), safe=''))
+
+    @classmethod
+    def name_key(cls, name, project_id=None):
+        """Return the key reserving a name, in a project if given."""
+        quoted_name = urlparse.quote(six.text_type(name).lower(), safe='')
+        if project_id is None:
+            return '%s/global/%s' % (cls._name_path, quoted_name)
+        return '%s/project/%s/%s' % (
+            cls._name_path,
+            urlparse.quote(six.text_type(project_id), safe=''),
+            quoted_name)
+
+    @classmethod
+    def index_keys(cls, values, container_uuid):
+        """Return the index keys of the indexed fields set in values."""
+        return [cls.index_path(f, values[f]) + '/' + container_uuid
+                for f in cls._indexed_fields
+                if values.get(f) is not None]
+
+    def save(self, session=None):
+        if session is None:
+            session = db.api.get_backend()
+        client = session.client
+        path = self.etcd_path(self.uuid)
+
+        for key in self.index_keys(self.as_dict(), self.uuid):
+            client.write(key, '')
+        try:
+            client.write(path, json.dump_as_bytes(self.as_dict()),
+                         prevExist=False)
+        except etcd.EtcdAlreadyExist:
+            raise exception.ResourceExists(name=getattr(self, '__class__'))
+        return
+
 
 class Image(Base):
     """Represents a container image."""
@@ -270,11 +340,12 @@ class ComputeNode(Base):
             session = db.api.get_backend()
         client = session.client
         path = self.etcd_path(self.uuid)
-        if self.path_already_exist(client, path):
+        try:
+            client.write(path, json.dump_as_bytes(self.as_dict()),
+                         prevExist=False)
+        except etcd.EtcdAlreadyExist:
             raise exception.ComputeNodeAlreadyExists(
                 field='UUID', value=self.uuid)
-
-        client.write(path, json.dump_as_bytes(self.as_dict()))
         return
 
 
@@ -0,0 +1,38 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+"""add indexes to container
+
+Revision ID: 5a1e0e3d2c9b
+Revises: a9c9fb54274a
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '5a1e0e3d2c9b'
+down_revision = 'a9c9fb54274a'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+
+
+def upgrade():
+    op.create_index('container_host_idx', 'container', ['host'])
+    op.create_index('container_project_id_name_idx', 'container',
+                    ['project_id', 'name'])
+    op.create_index('container_name_idx', 'container', ['name'])
+    op.create_index('container_status_task_state_auto_remove_idx',
+                    'container', ['status', 'task_state', 'auto_remove'])
+    op.create_index('container_capsule_id_idx', 'container', ['capsule_id'])
@@ -0,0 +1,85 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+"""Convert type of 'memory' of container from string to integer
+
+Revision ID: 8b2e4c6f1d7a
+Revises: 5a1e0e3d2c9b
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+
+import math
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4c6f1d7a'
+down_revision = '5a1e0e3d2c9b'
+branch_labels = None
+depends_on = None
+
+
+TABLE_MODEL = sa.Table(
+    'container', sa.MetaData(),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('memory', sa.String(255)))
+
+MEMORY_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([bkmgt]?)i?b?\s*$',
+                            re.IGNORECASE)
+# The power of 1024 of each unit relative to MiB, a number without unit
+# being in MiB already.
+MEMORY_UNITS = {'b': -2, 'k': -1, '': 0, 'm': 0, 'g': 1, 't': 2}
+
+
+def _memory_to_mib(container_id, memory):
+    if not memory.strip():
+        return None
+    match = MEMORY_PATTERN.match(memory)
+    if not match:
+        raise ValueError("Cannot convert the memory '%s' of the container "
+                         "%s to MiB, fix it before upgrading." %
+                         (memory, container_id))
+    number, unit = match.groups()
+    mib = float(number) * 1024 ** MEMORY_UNITS[unit.lower()]
+    return str(int(math.ceil(mib)))
+
+
+def upgrade():
+    # Convert the memory to a number of MiB so that it converts to integer
+    session = sa.orm.Session(bind=op.get_bind())
+    with session.begin(subtransactions=True):
+        for row in session.query(TABLE_MODEL):
+            if row[1] is None:
+                continue
+            memory = _memory_to_mib(row[0], row[1])
+            if memory != row[1]:
+                session.execute(
+                    TABLE_MODEL.update().values(
+                        memory=memory).where(
+                            TABLE_MODEL.c.id == row[0]))
+    session.commit()
+
+    op.alter_column('container', 'memory',
+                    existing_type=sa.String(255),
+                    type_=sa.Integer(),
+                    postgresql_using='memory::integer')
+    op.alter_column('quota_usages', 'in_use',
+                    existing_type=sa.Integer(),
+                    existing_nullable=False,
+                    type_=sa.Float())
+    op.create_unique_constraint('uniq_quota_usages0project_id0resource',
+                                'quota_usages', ['project_id', 'resource'])
@@ -39,6 +39,9 @@ profiler_sqlalchemy = importutils.try_import('osprofiler.sqlalchemy')
 
 CONF = zun.conf.CONF
 
+# The resources of the containers counted in the usages of a project
+CONTAINER_USAGE_RESOURCES = ('containers', 'cpu', 'memory', 'disk')
+
 _FACADE = None
 
 
@@ -96,6 +99,20 @@ def add_identity_filter(query, value):
         raise exception.InvalidIdentity(identity=value)
 
 
+def _convert_container_memory(values):
+    # NOTE: The memory of a container is a string of MiB in the container
+    # objects and an integer in the database.
+    if values.get('memory') is not None:
+        values['memory'] = int(values['memory'])
+
+
+def _get_container_usages(container):
+    return {'containers': 1,
+            'cpu': container.cpu or 0,
+            'memory': container.memory or 0,
+            'disk': container.disk or 0}
+
+
 def _paginate_query(model, limit=None, marker=None, sort_key=None,
                     sort_dir=None, query=None, default_sort_key='id'):
     if not query:
@@ -130,7 +147,8 @@ class Connection(object):
 
         return query
 
-    def _add_filters(self, query, filters=None, filter_names=None):
+    def _add_filters(self, query, filters=None, filter_names=None,
+                     model=models.Container):
         """Generic way to add filters to a Zun model"""
         if not filters:
             return query
@@ -142,7 +160,7 @@ class Connection(object):
             if name in filters:
                 value = filters[name]
                 if isinstance(value, list):
-                    column = getattr(models.Container, name)
+                    column = getattr(model, name)
                     query = query.filter(column.in_(value))
                 else:
                     query = query.filter_by(**{name: value})
@@ -191,10 +209,16 @@ class Connection(object):
         if values.get('name'):
             self._validate_unique_container_name(context, values['name'])
 
+        _convert_container_memory(values)
         container = models.Container()
         container.update(values)
+        session = get_session()
         try:
-            container.save()
+            with session.begin():
+                container.save(session)
+                self._update_container_usages(
+                    session, container.project_id,
+                    _get_container_usages(container))
         except db_exc.DBDuplicateEntry:
             raise exception.ContainerAlreadyExists(field='UUID',
                                                    value=values['uuid'])
@@ -227,6 +251,15 @@ class Connection(object):
         with session.begin():
             query = model_query(models.Container, session=session)
             query = add_identity_filter(query, container_id)
+            if CONF.quota.track_usages:
+                try:
+                    ref = query.with_lockmode('update').one()
+                except NoResultFound:
+                    raise exception.ContainerNotFound(container_id)
+                usages = _get_container_usages(ref)
+                self._update_container_usages(
+                    session, ref.project_id,
+                    {resource: -usage for resource, usage in usages.items()})
             count = query.delete()
             if count != 1:
                 raise exception.ContainerNotFound(container_id)
@@ -242,6 +275,45 @@ class Connection(object):
 
         return self._do_update_container(container_id, values)
 
+    def update_containers(self, context, values):
+        if CONF.quota.track_usages and any(
+                set(container_values) & set(CONTAINER_USAGE_RESOURCES)
+                for container_values in values.values()):
+            # NOTE: The usages are updated from the resources of each
+            # container before the update.
+            for container_uuid, container_values in values.items():
+                self.update_container(context, container_uuid,
+                                      container_values)
+            return
+
+        for container_values in values.values():
+            _convert_container_memory(container_values)
+            if 'uuid' in container_values:
+                msg = _("Cannot overwrite UUID for an existing Container.")
+                raise exception.InvalidParameterValue(err=msg)
+            if 'name' in container_values:
+                self._validate_unique_container_name(
+                    context, container_values['name'])
+
+        # NOTE: The containers are updated by a single UPDATE statement,
+        # each updated column being set from a CASE on the container uuid.
+        updates = {}
+        for field in set().union(*values.values()):
+            column = getattr(models.Container, field)
+            whens = [(models.Container.uuid == uuid,
+                      sa.literal(container_values[field], column.type))
+                     for uuid, container_values in values.items()
+                     if field in container_values]
+            updates[column] = sa.case(whens, else_=column)
+        if not updates:
+            return
+
+        session = get_session()
+        with session.begin():
+            query = model_query(models.Container, session=session)
+            query = query.filter(models.Container.uuid.in_(list(values)))
+            query.update(updates, synchronize_session=False)
+
     def _do_update_container(self, container_id, values):
         session = get_session()
         with session.begin():
@@ -252,7 +324,14 @@ class Connection(object):
             except NoResultFound:
                 raise exception.ContainerNotFound(container=container_id)
 
+            _convert_container_memory(values)
+            old_usages = _get_container_usages(ref)
             ref.update(values)
+            new_usages = _get_container_usages(ref)
+            self._update_container_usages(
+                session, ref.project_id,
+                {resource: new_usages[resource] - old_usages[resource]
+                 for resource in new_usages})
         return ref
 
     def create_directory_mapping(self, context, values):
@@ -917,9 +996,10 @@ class Connection(object):
 
     def _add_capsules_filters(self, query, filters):
         # filter_names = ['uuid', 'project_id', 'user_id', 'containers']
-        filter_names = ['uuid', 'project_id', 'user_id']
+        filter_names = ['id', 'uuid', 'project_id', 'user_id']
         return self._add_filters(query, filters=filters,
-                                 filter_names=filter_names)
+                                 filter_names=filter_names,
+                                 model=models.Capsule)
 
     def get_pci_device_by_addr(self, node_id, dev_addr):
         pci_dev_ref = model_query(models.PciDevice).\
@@ -1289,15 +1369,58 @@ class Connection(object):
                 exec_id=values['exec_id'])
         return exec_inst
 
-    def count_usage(self, context, project_id, flag):
+    def _sum_container_usages(self, session, project_id):
+        row = session.query(
+            func.count(models.Container.id),
+            func.sum(models.Container.cpu),
+            func.sum(models.Container.memory),
+            func.sum(models.Container.disk)). \
+            filter_by(project_id=project_id).one()
+        return dict(zip(CONTAINER_USAGE_RESOURCES,
+                        (usage or 0 for usage in row)))
+
+    def _update_container_usages(self, session, project_id, deltas):
+        if not CONF.quota.track_usages:
+            return
+        deltas = {resource: delta for resource, delta in deltas.items()
+                  if delta}
+        if not deltas:
+            return
+        rows = model_query(models.QuotaUsage, session=session). \
+            filter_by(project_id=project_id). \
+            filter(models.QuotaUsage.resource.in_(list(deltas))). \
+            with_lockmode('update').all()
+        # NOTE: The missing usages are computed from the containers when
+        # they are first read.
+        for row in rows:
+            row.in_use += deltas[row.resource]
+
+    def count_usages(self, context, project_id):
         session = get_session()
-        if flag == 'containers':
-            project_query = session.query(
-                func.count(models.Container.id)). \
-                filter_by(project_id=project_id)
-        elif flag in ['disk', 'cpu', 'memory']:
-            project_query = session.query(
-                func.sum(getattr(models.Container, flag))). \
-                filter_by(project_id=project_id)
-
-        return project_query.first()
+        if not CONF.quota.track_usages:
+            return self._sum_container_usages(session, project_id)
+
+        try:
+            with session.begin():
+                rows = model_query(models.QuotaUsage, session=session). \
+                    filter_by(project_id=project_id). \
+                    filter(models.QuotaUsage.resource.in_(
+                        CONTAINER_USAGE_RESOURCES)). \
+                    with_lockmode('update').all()
+                usages = {row.resource: row.in_use for row in rows}
+                missing = set(CONTAINER_USAGE_RESOURCES) - set(usages)
+                if missing:
+                    container_usages = self._sum_container_usages(
+                        session, project_id)
+                    for resource in missing:
+                        usage = models.QuotaUsage(
+                            project_id=project_id, resource=resource,
+                            in_use=container_usages[resource], reserved=0)
+                        session.add(usage)
+                        usages[resource] = container_usages[resource]
+        except db_exc.DBDuplicateEntry:
+            # NOTE: A concurrent request added the missing usages first,
+            # they are read again from the rows it added.
+            return self.count_usages(context, project_id)
+        usages['containers'] = int(usages['containers'])
+        return usages
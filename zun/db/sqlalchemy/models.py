@@ -132,6 +132,12 @@ class Container(Base):
     __tablename__ = 'container'
     __table_args__ = (
         schema.UniqueConstraint('uuid', name='uniq_container0uuid'),
+        Index('container_host_idx', 'host'),
+        Index('container_project_id_name_idx', 'project_id', 'name'),
+        Index('container_name_idx', 'name'),
+        Index('container_status_task_state_auto_remove_idx',
+              'status', 'task_state', 'auto_remove'),
+        Index('container_capsule_id_idx', 'capsule_id'),
         table_args()
     )
     id = Column(Integer, primary_key=True)
@@ -146,7 +152,7 @@ class Container(Base):
     cpuset_cpus = Column(String(255))
     cpuset_mems = Column(String(255))
     command = Column(JSONEncodedList)
-    memory = Column(String(255))
+    memory = Column(Integer)
     status = Column(String(20))
     status_reason = Column(Text, nullable=True)
     task_state = Column(String(20))
@@ -380,6 +386,7 @@ class ComputeNode(Base):
     disk_quota_supported = Column(Boolean, nullable=False, default=sql.false(),
                                   server_default=sql.false())
     runtimes = Column(JSONEncodedList, nullable=True)
+    images = Column(JSONEncodedList, nullable=True)
 
 
 class Capsule(Base):
@@ -550,12 +557,17 @@ class QuotaUsage(Base):
     """Respents the current usage for a given resource."""
 
     __tablename__ = 'quota_usages'
+    __table_args__ = (
+        schema.UniqueConstraint(
+            'project_id', 'resource',
+            name='uniq_quota_usages0project_id0resource'),
+    )
     id = Column(Integer, primary_key=True)
 
     project_id = Column(String(255), index=True)
     resource = Column(String(255), index=True)
 
-    in_use = Column(Integer, nullable=False)
+    in_use = Column(Float, nullable=False)
     reserved = Column(Integer, nullable=False)
 
     @property
@@ -22,6 +22,7 @@ from oslo_utils import excutils
 from zun.common import exception
 from zun.common.i18n import _
 from zun.common import utils
+from zun.container.docker import image_index
 from zun.container.docker import utils as docker_utils
 from zun.image import driver
 
@@ -50,6 +51,18 @@ class DockerDriver(driver.ContainerImageDriver):
                 raise exception.ZunException(six.text_type(e))
 
     def _search_image_on_host(self, repo, tag):
+        index = image_index.get_image_index()
+        # NOTE: The index only knows the images by tag, the images
+        # referenced by digest, e.g. 'busybox@sha256:<digest>', are
+        # inspected.
+        if index.watching and '@' not in repo:
+            # The index is kept up to date by the image events
+            if index.get(repo, tag) is None:
+                LOG.debug('Image %s:%s not found locally', repo, tag)
+                return None
+            index.touch(repo, tag)
+            return {'image': repo, 'path': None}
+
         with docker_utils.docker_client() as docker:
             image = repo + ":" + tag
             LOG.debug('Inspecting image locally %s', image)
@@ -98,6 +111,11 @@ class DockerDriver(driver.ContainerImageDriver):
             raise exception.ZunException(msg.format(e))
 
     def search_image(self, context, repo, tag, exact_match):
+        index = image_index.get_image_index()
+        if exact_match and index.watching and index.get(repo, tag):
+            # The image is present on this host, no need to ask the registry
+            return [{'name': repo, 'tags': [tag], 'metadata': {}}]
+
         with docker_utils.docker_client() as docker:
             try:
                 # TODO(hongbin): search image by both repo and tag
@@ -93,3 +93,7 @@ class ContainerImageDriver(object):
     def delete_image_tar(self, context, image):
         """Delete an image."""
         raise NotImplementedError()
+
+    def verify_cached_images(self):
+        """Verify the integrity of the images cached on the host."""
+        pass
@@ -11,7 +11,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import hashlib
 import os
 import types
 
@@ -58,19 +57,45 @@ class GlanceDriver(driver.ContainerImageDriver):
     def _verify_md5sum_for_image(self, image):
         image_path = image['path']
         image_checksum = image['checksum']
-        md5sum = hashlib.md5()
-        with open(image_path, 'rb') as fd:
-            while True:
-                # read 10MB of data each time
-                data = fd.read(10 * 1024 * 1024)
-                if not data:
-                    break
-                md5sum.update(data)
-        md5sum = md5sum.hexdigest()
+        if utils.is_image_file_verified(image_path, image_checksum):
+            return True
+        md5sum = utils.get_file_md5sum(image_path)
         if md5sum == image_checksum:
+            utils.save_image_file_verification(image_path, image_checksum)
             return True
         return False
 
+    def verify_cached_images(self):
+        """Verify again the cached images against their checksum.
+
+        A cached image that no longer matches the checksum it was verified
+        against is removed, it will be downloaded again on its next pull.
+        """
+        images_directory = CONF.glance.images_directory
+        if not os.path.isdir(images_directory):
+            return
+        for name in os.listdir(images_directory):
+            if not name.endswith('.tar'):
+                continue
+            image_path = os.path.join(images_directory, name)
+            record = utils.load_image_file_verification(image_path)
+            if not record:
+                # The image is verified when it is used
+                continue
+            try:
+                md5sum = utils.get_file_md5sum(image_path)
+            except (IOError, OSError) as e:
+                LOG.warning('Cannot verify image file %(path)s: %(error)s',
+                            {'path': image_path, 'error': e})
+                continue
+            if md5sum == record['checksum']:
+                utils.save_image_file_verification(image_path, md5sum)
+                continue
+            LOG.warning('Image file %s does not match its checksum, '
+                        'removing it', image_path)
+            fileutils.delete_if_exists(image_path)
+            utils.delete_image_file_verification(image_path)
+
     def pull_image(self, context, repo, tag, image_pull_policy):
         image_loaded = False
         image = self._search_image_on_host(context, repo, tag)
@@ -97,19 +122,24 @@ class GlanceDriver(driver.ContainerImageDriver):
         except Exception as e:
             msg = _('Cannot download image from glance: {0}')
             raise exception.ZunException(msg.format(e))
-        try:
-            images_directory = CONF.glance.images_directory
-            fileutils.ensure_tree(images_directory)
+        out_path = None
+        if CONF.glance.cache_images:
+            try:
+                images_directory = CONF.glance.images_directory
+                fileutils.ensure_tree(images_directory)
+            except Exception as e:
+                msg = _('Error occurred while writing image: {0}')
+                raise exception.ZunException(msg.format(e))
             out_path = os.path.join(images_directory, image_meta.id + '.tar')
-            with open(out_path, 'wb') as fd:
-                for chunk in image_chunks:
-                    fd.write(chunk)
-        except Exception as e:
-            msg = _('Error occurred while writing image: {0}')
-            raise exception.ZunException(msg.format(e))
-        LOG.debug('Image %(repo)s was downloaded to path : %(path)s',
-                  {'repo': repo, 'path': out_path})
-        return {'image': repo, 'path': out_path}, image_loaded
+        # NOTE: The image is not downloaded here, its data is streamed from
+        # glance when the image is loaded.
+        image_stream = utils.ImageDataStream(
+            image_chunks, checksum=image_meta.checksum, cache_path=out_path)
+        LOG.debug('Image %(repo)s will be streamed from glance, cached to '
+                  'path : %(path)s', {'repo': repo, 'path': out_path})
+        return {'image': repo, 'path': out_path,
+                'checksum': image_meta.checksum,
+                'stream': image_stream}, image_loaded
 
     def search_image(self, context, repo, tag, exact_match):
         LOG.debug('Searching image in glance %s', repo)
@@ -177,6 +207,7 @@ class GlanceDriver(driver.ContainerImageDriver):
             tarfile = image.get('path')
             try:
                 os.unlink(tarfile)
+                utils.delete_image_file_verification(tarfile)
             except Exception as e:
                 LOG.exception('Cannot delete tar file %s', tarfile)
                 raise exception.ZunException(six.text_type(e))
@@ -13,16 +13,49 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
+import os
+import time
+
 from glanceclient.common import exceptions as glance_exceptions
+from oslo_serialization import jsonutils
+from oslo_utils import encodeutils
+from oslo_utils import fileutils
 from oslo_utils import uuidutils
 
+from zun.common import cache
 from zun.common import clients
 from zun.common import exception
+import zun.conf
 
 from oslo_log import log as logging
 
+CONF = zun.conf.CONF
 LOG = logging.getLogger(__name__)
 
+TAR_BLOCK_SIZE = 512
+# Suffix of the file recording the verification of a cached image file.
+VERIFICATION_SUFFIX = '.verified'
+# Maximum number of entries of a lookup cache.
+MAX_CACHE_ENTRIES = 256
+
+
+def _lookup_cache_time():
+    return CONF.glance.image_lookup_cache_time
+
+
+# The glance clients by request context credentials, and the images found
+# by name or id.
+_glance_clients = cache.TTLCache(_lookup_cache_time,
+                                 max_entries=MAX_CACHE_ENTRIES)
+_image_lookups = cache.TTLCache(_lookup_cache_time,
+                                max_entries=MAX_CACHE_ENTRIES)
+
+
+def reset_cache():
+    _glance_clients.clear()
+    _image_lookups.clear()
+
 
 def create_glanceclient(context):
     """Creates glance client object.
@@ -30,8 +63,13 @@ def create_glanceclient(context):
         :param context: context to create client object
         :returns: Glance client object
     """
-    osc = clients.OpenStackClients(context)
-    return osc.glance()
+    key = (context.auth_token, context.project_id, context.user_id)
+    glance = _glance_clients.get(key)
+    if glance is None:
+        osc = clients.OpenStackClients(context)
+        glance = osc.glance()
+        _glance_clients.set(key, glance)
+    return glance
 
 
 def find_image(context, image_ident, tag):
@@ -48,6 +86,18 @@ def find_image(context, image_ident, tag):
 
 
 def find_images(context, image_ident, tag, exact_match):
+    # NOTE: Only the lookups that found images are cached, an image
+    # uploaded to glance is found immediately.
+    key = (context.project_id, image_ident, tag, exact_match)
+    images = _image_lookups.get(key)
+    if images is None:
+        images = _find_images(context, image_ident, tag, exact_match)
+        if images:
+            _image_lookups.set(key, images)
+    return list(images)
+
+
+def _find_images(context, image_ident, tag, exact_match):
     glance = create_glanceclient(context)
     if uuidutils.is_uuid_like(image_ident):
         images = []
@@ -58,13 +108,22 @@ def find_images(context, image_ident, tag, exact_match):
         except glance_exceptions.NotFound:
             # ignore exception
             pass
+    elif exact_match:
+        # The name and the tag are filtered by glance
+        filters = {'container_format': 'docker', 'name': image_ident}
+        images = []
+        if tag:
+            images = list(glance.images.list(
+                filters=dict(filters, tag=[tag])))
+        if not images:
+            images = list(glance.images.list(filters=filters))
+            # The tag only selects an image among the ones of that name
+            if tag and len(images) > 1:
+                images = []
     else:
         filters = {'container_format': 'docker'}
         images = list(glance.images.list(filters=filters))
-        if exact_match:
-            images = [i for i in images if i.name == image_ident]
-        else:
-            images = [i for i in images if image_ident in i.name]
+        images = [i for i in images if image_ident in i.name]
         if tag and len(images) > 1:
             images = [i for i in images if tag in i.tags]
     return images
@@ -103,3 +162,166 @@ def delete_image(context, img_id):
     LOG.debug('Delete image %s', img_id)
     glance = create_glanceclient(context)
     return glance.images.delete(img_id)
+
+
+def get_file_md5sum(path):
+    md5sum = hashlib.md5()
+    with open(path, 'rb') as fd:
+        while True:
+            # read 10MB of data each time
+            data = fd.read(10 * 1024 * 1024)
+            if not data:
+                break
+            md5sum.update(data)
+            # Let the other greenthreads run while a large file is hashed
+            time.sleep(0)
+    return md5sum.hexdigest()
+
+
+def _get_file_signature(path):
+    stat = os.stat(path)
+    return {'inode': stat.st_ino, 'size': stat.st_size,
+            'mtime': stat.st_mtime}
+
+
+def load_image_file_verification(path):
+    """Return the verification record of an image file, if any."""
+    try:
+        with open(path + VERIFICATION_SUFFIX) as f:
+            return jsonutils.loads(f.read())
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def save_image_file_verification(path, checksum):
+    """Record that an image file matched its checksum.
+
+    The record is bound to the inode, size and mtime of the file, so that
+    the file is trusted without being hashed again as long as it does not
+    change.
+    """
+    record_path = path + VERIFICATION_SUFFIX
+    try:
+        record = {'checksum': checksum,
+                  'file': _get_file_signature(path)}
+        with open(record_path + '.tmp', 'w') as f:
+            f.write(jsonutils.dumps(record))
+        os.rename(record_path + '.tmp', record_path)
+    except (IOError, OSError) as e:
+        LOG.warning('Cannot record the verification of image file %(path)s: '
+                    '%(error)s', {'path': path, 'error': e})
+
+
+def delete_image_file_verification(path):
+    fileutils.delete_if_exists(path + VERIFICATION_SUFFIX)
+
+
+def is_image_file_verified(path, checksum):
+    """Whether an image file matched checksum and did not change since."""
+    record = load_image_file_verification(path)
+    if not record or record.get('checksum') != checksum:
+        return False
+    try:
+        return record.get('file') == _get_file_signature(path)
+    except OSError:
+        return False
+
+
+class ImageDataStream(object):
+    """The data of a glance image, processed while it is consumed.
+
+    The data of the image, a docker image archive, is read once from glance:
+    while it is iterated (e.g. by docker load), its md5 checksum is
+    verified, it is written to an optional cache file and the manifest.json
+    of the archive is parsed from the tar stream.
+    """
+
+    def __init__(self, chunks, checksum=None, cache_path=None):
+        self.chunks = chunks
+        self.checksum = checksum
+        self.cache_path = cache_path
+        self.manifest = None
+        # State of the tar stream parser.
+        self._header = b''
+        self._member_left = 0
+        self._manifest_size = 0
+        self._manifest_data = None
+
+    def __iter__(self):
+        md5sum = hashlib.md5()
+        cache_file = None
+        part_path = None
+        if self.cache_path:
+            part_path = self.cache_path + '.part'
+            cache_file = open(part_path, 'wb')
+        completed = False
+        try:
+            for chunk in self.chunks:
+                md5sum.update(chunk)
+                if cache_file:
+                    cache_file.write(chunk)
+                self._parse_tar(chunk)
+                yield chunk
+            if self.checksum and md5sum.hexdigest() != self.checksum:
+                raise exception.ImageChecksumMismatch(
+                    actual=md5sum.hexdigest(), expected=self.checksum)
+            completed = True
+        finally:
+            if cache_file:
+                cache_file.close()
+                if completed:
+                    os.rename(part_path, self.cache_path)
+                    if self.checksum:
+                        save_image_file_verification(self.cache_path,
+                                                     self.checksum)
+                else:
+                    fileutils.delete_if_exists(part_path)
+
+    def _parse_tar(self, chunk):
+        pos = 0
+        while pos < len(chunk) and self.manifest is None:
+            if self._member_left:
+                # Data of the current member, padded to the block size
+                size = min(self._member_left, len(chunk) - pos)
+                if self._manifest_data is not None:
+                    self._manifest_data.append(chunk[pos:pos + size])
+                pos += size
+                self._member_left -= size
+                if not self._member_left and self._manifest_data is not None:
+                    self._read_manifest()
+                continue
+
+            size = TAR_BLOCK_SIZE - len(self._header)
+            self._header += chunk[pos:pos + size]
+            pos += size
+            if len(self._header) == TAR_BLOCK_SIZE:
+                self._read_header(self._header)
+                self._header = b''
+
+    def _read_header(self, header):
+        name = header[:100].split(b'\0', 1)[0]
+        if not name:
+            # The end of archive is marked by empty blocks
+            return
+        size = self._read_size(header[124:136])
+        self._member_left = ((size + TAR_BLOCK_SIZE - 1) //
+                             TAR_BLOCK_SIZE * TAR_BLOCK_SIZE)
+        if name == b'manifest.json':
+            self._manifest_size = size
+            self._manifest_data = []
+
+    @staticmethod
+    def _read_size(field):
+        field = bytearray(field)
+        if field[0] & 0x80:
+            # GNU base-256 encoding of the sizes too large for octal
+            size = 0
+            for byte in field[1:]:
+                size = size << 8 | byte
+            return size
+        return int(bytes(field).strip(b'\0 ') or b'0', 8)
+
+    def _read_manifest(self):
+        data = b''.join(self._manifest_data)[:self._manifest_size]
+        self._manifest_data = None
+        self.manifest = jsonutils.loads(encodeutils.safe_decode(data))
@@ -15,6 +15,7 @@ import six
 import sys
 import time
 
+import eventlet
 from neutronclient.common import exceptions
 from oslo_log import log as logging
 from oslo_utils import excutils
@@ -25,6 +26,7 @@ from zun.common.i18n import _
 import zun.conf
 from zun.network import network
 from zun.network import neutron
+from zun.network import port_pool
 from zun.objects import fields as obj_fields
 from zun.pci import manager as pci_manager
 from zun.pci import utils as pci_utils
@@ -36,6 +38,9 @@ LOG = logging.getLogger(__name__)
 
 BINDING_PROFILE = 'binding:profile'
 BINDING_HOST_ID = 'binding:host_id'
+# The number of ports updated at once, kept within the default size of the
+# connection pool of a keystoneauth session.
+PORT_UPDATE_CONCURRENCY = 10
 
 
 class KuryrNetwork(network.Network):
@@ -47,6 +52,7 @@ class KuryrNetwork(network.Network):
             CONF.pci.passthrough_whitelist)
         self.last_neutron_extension_sync = None
         self.extensions = {}
+        self._admin_neutron_api = None
 
     def create_network(self, name, neutron_net_id):
         """Create a docker network with Kuryr driver.
@@ -139,8 +145,7 @@ class KuryrNetwork(network.Network):
     def _get_subnetpool(self, subnet):
         # NOTE(kiennt): Elevate admin privilege to list all subnetpools
         #               across projects.
-        admin_context = zun_context.get_admin_context()
-        neutron_api = neutron.NeutronAPI(admin_context)
+        neutron_api = self._get_admin_neutron_api()
         subnetpool_id = subnet.get('subnetpool_id')
         if not subnetpool_id:
             return None
@@ -218,8 +223,7 @@ class KuryrNetwork(network.Network):
                 # NOTE(hongbin): Use admin context here because non-admin
                 # context might not be able to update some attributes
                 # (i.e. binding:profile).
-                admin_context = zun_context.get_admin_context()
-                neutron_api = neutron.NeutronAPI(admin_context)
+                neutron_api = self._get_admin_neutron_api()
                 neutron_api.update_port(neutron_port_id, port_req_body)
         else:
             network = self.inspect_network(network_name)
@@ -234,8 +238,14 @@ class KuryrNetwork(network.Network):
                 port_dict['fixed_ips'] = [{'ip_address': ip_addr}]
             if security_groups is not None:
                 port_dict['security_groups'] = security_groups
-            neutron_port = self.neutron_api.create_port({'port': port_dict})
-            neutron_port = neutron_port['port']
+            neutron_port = None
+            if not ip_addr:
+                neutron_port = self._bind_pooled_port(
+                    container, neutron_net_id, security_groups)
+            if neutron_port is None:
+                neutron_port = self.neutron_api.create_port(
+                    {'port': port_dict})
+                neutron_port = neutron_port['port']
 
         preserve_on_delete = requested_network['preserve_on_delete']
         addresses = []
@@ -261,6 +271,24 @@ class KuryrNetwork(network.Network):
 
         return addresses, neutron_port
 
+    def _bind_pooled_port(self, container, neutron_net_id, security_groups):
+        port = port_pool.get_port_pool().acquire(
+            neutron_net_id, self.context.project_id, security_groups)
+        if port is None:
+            return None
+        port_req_body = {'port': {'device_id': container.uuid, 'name': ''}}
+        try:
+            return self.neutron_api.update_port(
+                port['id'], port_req_body)['port']
+        except Exception as e:
+            LOG.warning("Failed to bind the pooled port %(port_id)s, "
+                        "creating a new port: %(error)s",
+                        {'port_id': port['id'], 'error': e})
+            # NOTE: The port is no longer in the pool, it would be leaked
+            # if it was not deleted.
+            port_pool.get_port_pool().discard(port['id'])
+            return None
+
     def connect_container_to_network(self, container, network_name,
                                      requested_network, security_groups=None):
         """Connect container to the network
@@ -308,8 +336,7 @@ class KuryrNetwork(network.Network):
 
             try:
                 # Requires admin creds to set port bindings
-                admin_context = zun_context.get_admin_context()
-                neutron_api = neutron.NeutronAPI(admin_context)
+                neutron_api = self._get_admin_neutron_api()
                 neutron_api.update_port(port_id, port_req_body)
             except exception.PortNotFound:
                 LOG.debug('Unable to unbind port %s as it no longer '
@@ -391,8 +418,7 @@ class KuryrNetwork(network.Network):
 
         try:
             # Requires admin creds to set port bindings
-            admin_context = zun_context.get_admin_context()
-            neutron_api = neutron.NeutronAPI(admin_context)
+            neutron_api = self._get_admin_neutron_api()
             neutron_api.update_port(port_id, port_req_body)
         except exception.PortNotFound:
             LOG.debug('Unable to unbind port %s as it no longer '
@@ -401,83 +427,71 @@ class KuryrNetwork(network.Network):
             LOG.exception("Unable to clear device ID for port '%s'",
                           port_id)
 
-    def add_security_groups_to_ports(self, container, security_group_ids):
-        container_id = container.get_sandbox_id()
-        if not container_id:
-            container_id = container.container_id
+    def _get_admin_neutron_api(self):
+        if self._admin_neutron_api is None:
+            admin_context = zun_context.get_admin_context()
+            self._admin_neutron_api = neutron.NeutronAPI(admin_context)
+        return self._admin_neutron_api
 
+    def _list_container_ports(self, container):
         port_ids = set()
         for addrs_list in container.addresses.values():
             for addr in addrs_list:
-                port_id = addr['port']
-                port_ids.add(port_id)
-
-        search_opts = {'tenant_id': self.context.project_id}
-        neutron_ports = self.neutron_api.list_ports(
-            **search_opts).get('ports', [])
-        neutron_ports = [p for p in neutron_ports if p['id'] in port_ids]
-        for port in neutron_ports:
-            if 'security_groups' not in port:
-                port['security_groups'] = []
-            port['security_groups'].extend(security_group_ids)
-            updated_port = {'security_groups': port['security_groups']}
+                port_ids.add(addr['port'])
+        if not port_ids:
+            return []
+        # NOTE: Only fetch the ports of the container instead of all the
+        # ports of the project.
+        return self.neutron_api.list_ports(
+            id=sorted(port_ids),
+            tenant_id=self.context.project_id).get('ports', [])
+
+    def _update_ports_security_groups(self, ports, security_groups,
+                                      cannot_update_exc):
+        neutron_api = self._get_admin_neutron_api()
+
+        def update_port(port):
+            updated_port = {'security_groups': security_groups(port)}
             try:
-                LOG.info("Adding security group %(security_group_ids)s "
-                         "to port %(port_id)s",
-                         {'security_group_ids': security_group_ids,
-                          'port_id': port['id']})
-                admin_context = zun_context.get_admin_context()
-                neutron_api = neutron.NeutronAPI(admin_context)
-                neutron_api.update_port(port['id'],
-                                        {'port': updated_port})
+                neutron_api.update_port(port['id'], {'port': updated_port})
             except exceptions.NeutronClientException as e:
                 exc_info = sys.exc_info()
                 if e.status_code == 400:
-                    raise exception.SecurityGroupCannotBeApplied(
-                        six.text_type(e))
+                    raise cannot_update_exc(six.text_type(e))
                 else:
                     six.reraise(*exc_info)
             except Exception:
                 with excutils.save_and_reraise_exception():
                     LOG.exception("Neutron Error:")
 
-    def remove_security_groups_from_ports(self, container, security_group_ids):
-        container_id = container.get_sandbox_id()
-        if not container_id:
-            container_id = container.container_id
+        pool = eventlet.GreenPool(PORT_UPDATE_CONCURRENCY)
+        # Consume the results to re-raise the first failure
+        list(pool.imap(update_port, ports))
 
-        port_ids = set()
-        for addrs_list in container.addresses.values():
-            for addr in addrs_list:
-                port_id = addr['port']
-                port_ids.add(port_id)
-
-        search_opts = {'tenant_id': self.context.project_id}
-        neutron_ports = self.neutron_api.list_ports(
-            **search_opts).get('ports', [])
-        neutron_ports = [p for p in neutron_ports if p['id'] in port_ids]
-        for port in neutron_ports:
-            port['security_groups'].remove(security_group_ids[0])
-            updated_port = {'security_groups': port['security_groups']}
-            try:
-                LOG.info("Removing security group %(security_group_ids)s "
-                         "from port %(port_id)s",
-                         {'security_group_ids': security_group_ids,
-                          'port_id': port['id']})
-                admin_context = zun_context.get_admin_context()
-                neutron_api = neutron.NeutronAPI(admin_context)
-                neutron_api.update_port(port['id'],
-                                        {'port': updated_port})
-            except exceptions.NeutronClientException as e:
-                exc_info = sys.exc_info()
-                if e.status_code == 400:
-                    raise exception.SecurityGroupCannotBeRemoved(
-                        six.text_type(e))
-                else:
-                    six.reraise(*exc_info)
-            except Exception:
-                with excutils.save_and_reraise_exception():
-                    LOG.exception("Neutron Error:")
+    def add_security_groups_to_ports(self, container, security_group_ids):
+        ports = self._list_container_ports(container)
+        for port in ports:
+            LOG.info("Adding security group %(security_group_ids)s "
+                     "to port %(port_id)s",
+                     {'security_group_ids': security_group_ids,
+                      'port_id': port['id']})
+        self._update_ports_security_groups(
+            ports,
+            lambda port: port.get('security_groups', []) + security_group_ids,
+            exception.SecurityGroupCannotBeApplied)
+
+    def remove_security_groups_from_ports(self, container, security_group_ids):
+        ports = self._list_container_ports(container)
+        for port in ports:
+            LOG.info("Removing security group %(security_group_ids)s "
+                     "from port %(port_id)s",
+                     {'security_group_ids': security_group_ids,
+                      'port_id': port['id']})
+        self._update_ports_security_groups(
+            ports,
+            lambda port: [sg for sg in port.get('security_groups', [])
+                          if sg not in security_group_ids],
+            exception.SecurityGroupCannotBeRemoved)
 
     def _refresh_neutron_extensions_cache(self):
         """Refresh the neutron extensions cache when necessary."""
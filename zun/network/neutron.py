@@ -14,9 +14,46 @@ from neutron_lib import constants as n_const
 from neutronclient.neutron import v2_0 as neutronv20
 from oslo_utils import uuidutils
 
+from zun.common import cache
 from zun.common import clients
 from zun.common import exception
 from zun.common.i18n import _
+import zun.conf
+
+CONF = zun.conf.CONF
+
+
+def _metadata_cache_time():
+    return CONF.network.metadata_cache_time
+
+
+# The neutron networks by (project, name or id) and the security groups by
+# project, as seen in the last metadata_cache_time seconds.
+_networks_cache = cache.TTLCache(_metadata_cache_time)
+_security_groups_cache = cache.TTLCache(_metadata_cache_time)
+
+
+def reset_cache():
+    _networks_cache.clear()
+    _security_groups_cache.clear()
+
+
+def list_security_groups(context, refresh=False):
+    """List the ids and names of the security groups of a project.
+
+    :param refresh: list the security groups from neutron even if they are
+                    cached.
+    """
+    key = context.project_id
+    security_groups = None if refresh else _security_groups_cache.get(key)
+    if security_groups is None:
+        neutron = clients.OpenStackClients(context).neutron()
+        security_groups = neutron.list_security_groups(
+            tenant_id=context.project_id).get('security_groups', [])
+        security_groups = [{'id': sg['id'], 'name': sg['name']}
+                           for sg in security_groups]
+        _security_groups_cache.set(key, security_groups)
+    return security_groups
 
 
 class NeutronAPI(object):
@@ -45,6 +82,11 @@ class NeutronAPI(object):
         return nets[0]
 
     def get_neutron_network(self, network):
+        key = (self.context.project_id, network)
+        cached_network = _networks_cache.get(key)
+        if cached_network is not None:
+            return cached_network
+
         if uuidutils.is_uuid_like(network):
             networks = self.list_networks(id=network)['networks']
         else:
@@ -58,6 +100,7 @@ class NeutronAPI(object):
                 'Please use the uuid instead.'))
 
         network = networks[0]
+        _networks_cache.set(key, network)
         return network
 
     def get_neutron_port(self, port):
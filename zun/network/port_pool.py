@@ -0,0 +1,155 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""A pool of neutron ports created ahead of the containers of a host."""
+
+import time
+
+from oslo_log import log as logging
+
+from zun.common import context as zun_context
+from zun.common import utils
+import zun.conf
+from zun.network import neutron
+
+CONF = zun.conf.CONF
+LOG = logging.getLogger(__name__)
+
+
+def _pool_port_name():
+    return 'zun-port-pool-%s' % CONF.host
+
+
+class NeutronPortPool(object):
+    """Unbound neutron ports by network, project and security groups.
+
+    A pool is started by the first port asked for its network, project and
+    security groups, then refilled in the background up to
+    [network]port_pool_size ports after each port taken from it. The ports
+    of a pool are deleted once it has not been used for
+    [network]port_pool_idle_time seconds.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # (network id, project id, security groups) => [port]
+        self._ports = {}
+        # (network id, project id, security groups) => last used time
+        self._last_used = {}
+        self._refilling = set()
+        self._neutron_api = None
+        self._cleaned_up = False
+
+    def _get_neutron_api(self):
+        # NOTE: The ports are created in the projects of the containers
+        if self._neutron_api is None:
+            admin_context = zun_context.get_admin_context()
+            self._neutron_api = neutron.NeutronAPI(admin_context)
+        return self._neutron_api
+
+    @staticmethod
+    def _get_key(network_id, project_id, security_groups):
+        if security_groups is not None:
+            security_groups = tuple(sorted(security_groups))
+        return network_id, project_id, security_groups
+
+    def acquire(self, network_id, project_id, security_groups=None):
+        """Take an unbound port from the pool, if any.
+
+        :param security_groups: the ids of the security groups of the port,
+                                or None for the default security group.
+        :returns: the neutron port or None if the pool is disabled or empty.
+        """
+        if not CONF.network.port_pool_size:
+            return None
+        key = self._get_key(network_id, project_id, security_groups)
+        self._last_used[key] = time.time()
+        ports = self._ports.setdefault(key, [])
+        port = ports.pop(0) if ports else None
+        if key not in self._refilling:
+            self._refilling.add(key)
+            utils.spawn_n(self._refill, key)
+        return port
+
+    def discard(self, port_id):
+        """Delete a port taken from the pool that could not be used."""
+        self._delete_port(port_id)
+
+    def _create_port(self, key):
+        network_id, project_id, security_groups = key
+        port_dict = {
+            'network_id': network_id,
+            'tenant_id': project_id,
+            'name': _pool_port_name(),
+        }
+        if security_groups is not None:
+            port_dict['security_groups'] = list(security_groups)
+        return self._get_neutron_api().create_port(
+            {'port': port_dict})['port']
+
+    def _delete_port(self, port_id):
+        try:
+            self._get_neutron_api().delete_port(port_id)
+        except Exception as e:
+            LOG.warning('Failed to delete the pooled port %(port)s: '
+                        '%(error)s', {'port': port_id, 'error': e})
+
+    def _refill(self, key):
+        try:
+            while (key in self._last_used and
+                    len(self._ports[key]) < CONF.network.port_pool_size):
+                port = self._create_port(key)
+                if key not in self._last_used:
+                    # The pool was pruned meanwhile
+                    self._delete_port(port['id'])
+                    break
+                self._ports[key].append(port)
+        except Exception as e:
+            LOG.warning('Failed to refill the port pool of network '
+                        '%(network)s: %(error)s',
+                        {'network': key[0], 'error': e})
+        finally:
+            self._refilling.discard(key)
+
+    def prune(self):
+        """Delete the ports of the pools that are no longer used.
+
+        The ports left by a previous run of the service on this host are
+        deleted as well on the first call with the pool enabled.
+        """
+        now = time.time()
+        for key, last_used in list(self._last_used.items()):
+            if (CONF.network.port_pool_size and
+                    now - last_used < CONF.network.port_pool_idle_time):
+                continue
+            del self._last_used[key]
+            for port in self._ports.pop(key, []):
+                self._delete_port(port['id'])
+
+        if CONF.network.port_pool_size and not self._cleaned_up:
+            pooled_ids = set(port['id'] for ports in self._ports.values()
+                             for port in ports)
+            ports = self._get_neutron_api().list_ports(
+                name=_pool_port_name(), device_id='').get('ports', [])
+            for port in ports:
+                if port['id'] not in pooled_ids:
+                    self._delete_port(port['id'])
+            self._cleaned_up = True
+
+
+_port_pool = NeutronPortPool()
+
+
+def get_port_pool():
+    return _port_pool
@@ -35,7 +35,8 @@ class ComputeNode(base.ZunPersistentObject, base.ZunObject):
     # Version 1.11: Add disk_quota_supported field
     # Version 1.12: Add runtimes field
     # Version 1.13: Add containers field
-    VERSION = '1.13'
+    # Version 1.14: Add images field
+    VERSION = '1.14'
 
     fields = {
         'uuid': fields.UUIDField(read_only=True, nullable=False),
@@ -65,6 +66,7 @@ class ComputeNode(base.ZunPersistentObject, base.ZunObject):
         'disk_quota_supported': fields.BooleanField(nullable=False),
         'runtimes': fields.ListOfStringsField(nullable=True),
         'containers': fields.StringField(nullable=True),
+        'images': fields.ListOfStringsField(nullable=True),
     }
 
     @staticmethod
@@ -69,7 +69,9 @@ class Container(base.ZunPersistentObject, base.ZunObject):
     # Version 1.36: Add 'get_count' method
     # Version 1.37: Add cpu_policy and cpuset
     # Version 1.38: Add 'dns' attribute
-    VERSION = '1.38'
+    # Version 1.39: Add 'save_all' method
+    # Version 1.40: Add 'get_usages' method
+    VERSION = '1.40'
 
     fields = {
         'id': fields.IntegerField(),
@@ -255,6 +257,22 @@ class Container(base.ZunPersistentObject, base.ZunObject):
 
         self.obj_reset_changes()
 
+    @base.remotable_classmethod
+    def save_all(cls, context, containers):
+        """Save the updates of many Containers in one database call.
+
+        :param context: Security context.
+        :param containers: a list of :class:`Container` object.
+        """
+        updates = {container.uuid: container.obj_get_changes()
+                   for container in containers
+                   if container.obj_what_changed()}
+        if updates:
+            dbapi.update_containers(context, updates)
+
+        for container in containers:
+            container.obj_reset_changes()
+
     @base.remotable
     def refresh(self, context=None):
         """Loads updates for this Container.
@@ -336,5 +354,15 @@ class Container(base.ZunPersistentObject, base.ZunObject):
                      - cpu: The sum of container's cpu.
                      - disk: The sum of container's disk size.
         """
-        usage = dbapi.count_usage(context, project_id, flag)[0] or 0
-        return usage
+        return cls.get_usages(context, project_id)[flag]
+
+    @base.remotable_classmethod
+    def get_usages(cls, context, project_id):
+        """Get all the usages of the containers of a project at once.
+
+        :param context: The request context for database access.
+        :param project_id: The project_id to count across.
+        :returns: a dict of the usages of the project keyed by resource, see
+                  get_count for the resources.
+        """
+        return dbapi.count_usages(context, project_id)
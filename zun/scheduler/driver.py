@@ -24,7 +24,6 @@ import abc
 import six
 
 from zun.api import servicegroup
-from zun import objects
 
 
 @six.add_metaclass(abc.ABCMeta)
@@ -37,7 +36,7 @@ class Scheduler(object):
     def hosts_up(self, context):
         """Return the list of hosts that have a running service."""
 
-        services = objects.ZunService.list_by_binary(context, 'zun-compute')
+        services = self.servicegroup_api.get_services(context, 'zun-compute')
         return [service.host
                 for service in services
                 if self.servicegroup_api.service_is_up(service)
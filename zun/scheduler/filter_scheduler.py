@@ -13,20 +13,30 @@
 """
 The FilterScheduler is for scheduling container to a host according to
 your filters configured.
-You can customize this scheduler by specifying your own Host Filters.
+You can customize this scheduler by specifying your own Host Filters and
+Weighing Functions.
 """
+import copy
 import random
 
+from oslo_log import log as logging
+from oslo_utils import timeutils
+
 from zun.common import exception
 from zun.common.i18n import _
+from zun.common import utils
 import zun.conf
 from zun import objects
 from zun.scheduler import driver
 from zun.scheduler import filters
 from zun.scheduler.host_state import HostState
+from zun.scheduler import placement_client
+from zun.scheduler import weights
 
 
 CONF = zun.conf.CONF
+LOG = logging.getLogger(__name__)
+HOST_STATE_SEMAPHORE = "scheduler_host_states"
 
 
 class FilterScheduler(driver.Scheduler):
@@ -40,14 +50,26 @@ class FilterScheduler(driver.Scheduler):
         self.filter_cls_map = {cls.__name__: cls for cls in filter_classes}
         self.filter_obj_map = {}
         self.enabled_filters = self._choose_host_filters(self._load_filters())
-
-    def _schedule(self, context, container, extra_spec):
-        """Picks a host according to filters."""
-        services = self._get_services_by_host(context)
-        nodes = objects.ComputeNode.list(context)
-        hosts = services.keys()
-        nodes = [node for node in nodes if node.hostname in hosts]
-        host_states = self.get_all_host_state(nodes, services)
+        self.weight_handler = weights.HostWeightHandler()
+        weigher_classes = self.weight_handler.get_matching_classes(
+            CONF.scheduler.weight_classes)
+        self.weighers = [cls() for cls in weigher_classes]
+        # A dict, keyed by hostname, of the HostState objects kept between
+        # requests. They are rebuilt only when the compute node changed.
+        self.host_state_map = {}
+        # Hosts that were selected since the last refresh. Their cached
+        # state does not include the resources claimed by the selection.
+        # The requests consume the resources from copies of the cached
+        # states, so both are only changed under HOST_STATE_SEMAPHORE.
+        self.stale_hosts = set()
+        self.last_refreshed = None
+        self.placement_client = placement_client.SchedulerReportClient()
+
+    def _schedule(self, host_states, container, extra_spec):
+        """Picks a host according to filters and weighers."""
+        for host_state in host_states:
+            # Limits are filled in by the filters of each container.
+            host_state.limits = {}
         hosts = self.filter_handler.get_filtered_objects(self.enabled_filters,
                                                          host_states,
                                                          container,
@@ -56,15 +78,39 @@ class FilterScheduler(driver.Scheduler):
             msg = _("Is the appropriate service running?")
             raise exception.NoValidHost(reason=msg)
 
-        return random.choice(hosts)
+        weighed_hosts = self.weight_handler.get_weighed_objects(
+            self.weighers, hosts, container, extra_spec)
+        LOG.debug("Weighed %(hosts)s", {'hosts': weighed_hosts})
+
+        # NOTE: Pick randomly among the best hosts so that concurrent
+        # requests do not all race for the very same host.
+        host_subset_size = min(CONF.scheduler.host_subset_size,
+                               len(weighed_hosts))
+        host = random.choice(weighed_hosts[:host_subset_size]).obj
+        self._add_stale_host(host.hostname)
+        return host
+
+    @utils.synchronized(HOST_STATE_SEMAPHORE)
+    def _add_stale_host(self, hostname):
+        self.stale_hosts.add(hostname)
 
     def select_destinations(self, context, containers, extra_spec):
-        """Selects destinations by filters."""
+        """Selects destinations by filters and weighers.
+
+        The host states are loaded once for all the containers. The
+        resources of each container are consumed from the host state it is
+        scheduled to, so that the following containers are placed against
+        the remaining capacity.
+        """
+        host_states = self.get_all_host_state(context)
         dests = []
         for container in containers:
-            host = self._schedule(context, container, extra_spec)
+            # NOTE: All the filters run for every container since the
+            # resources consumed by the previous ones change the outcome.
+            host = self._schedule(host_states, container, extra_spec)
             host_state = dict(host=host.hostname, nodename=None,
-                              limits=host.limits)
+                              limits=copy.deepcopy(host.limits))
+            host.consume_from_request(container, extra_spec)
             dests.append(host_state)
 
         if len(dests) < 1:
@@ -105,15 +151,83 @@ class FilterScheduler(driver.Scheduler):
     def _get_services_by_host(self, context):
         """Get a dict of services indexed by hostname"""
         return {service.host: service
-                for service in objects.ZunService.list_by_binary(
+                for service in self.servicegroup_api.get_services(
                     context,
                     'zun-compute')}
 
-    def get_all_host_state(self, nodes, services):
-        host_states = []
+    @utils.synchronized(HOST_STATE_SEMAPHORE)
+    def get_all_host_state(self, context):
+        """Return the host states of all the compute nodes.
+
+        The host states are cached between requests. All the compute
+        nodes are listed again once the cached states are older than
+        ``[scheduler]host_state_cache_time``, otherwise only the hosts
+        selected since the last refresh are read from the database.
+        Copies of the cached states are returned, for the request to
+        consume its resources from.
+        """
+        stale_hosts = set(self.stale_hosts)
+        now = timeutils.utcnow()
+        if (self.last_refreshed is None or
+                timeutils.delta_seconds(self.last_refreshed, now) >=
+                CONF.scheduler.host_state_cache_time):
+            self._refresh_all_host_states(context, stale_hosts)
+            self.last_refreshed = now
+        else:
+            self._refresh_stale_host_states(context, stale_hosts)
+        self.stale_hosts -= stale_hosts
+        return [host_state.copy()
+                for host_state in self.host_state_map.values()]
+
+    def _refresh_all_host_states(self, context, stale_hosts):
+        services = self._get_services_by_host(context)
+        nodes = objects.ComputeNode.list(context)
+        seen_hosts = set()
+        updated_nodes = []
+        for node in nodes:
+            service = services.get(node.hostname)
+            if service is None:
+                continue
+            seen_hosts.add(node.hostname)
+            host_state = self.host_state_map.get(node.hostname)
+            if host_state is None:
+                host_state = HostState(node.hostname)
+                self.host_state_map[node.hostname] = host_state
+            elif (node.hostname not in stale_hosts and
+                    node.updated_at is not None and
+                    host_state.updated_at == node.updated_at):
+                LOG.debug('Host state of %s is up to date', node.hostname)
+                host_state.update(service=service)
+                continue
+            host_state.update(compute_node=node, service=service)
+            updated_nodes.append(node)
+        self._update_from_placement(updated_nodes)
+
+        for hostname in set(self.host_state_map) - seen_hosts:
+            LOG.debug('Removing host state of %s', hostname)
+            del self.host_state_map[hostname]
+
+    def _refresh_stale_host_states(self, context, stale_hosts):
+        updated_nodes = []
+        for hostname in stale_hosts:
+            if hostname not in self.host_state_map:
+                continue
+            try:
+                node = objects.ComputeNode.get_by_name(context, hostname)
+            except exception.ComputeNodeNotFound:
+                del self.host_state_map[hostname]
+                continue
+            self.host_state_map[hostname].update(compute_node=node)
+            updated_nodes.append(node)
+        self._update_from_placement(updated_nodes)
+
+    def _update_from_placement(self, nodes):
+        """Fetch the NUMA usage of the given nodes in one batch."""
+        nodes = [node for node in nodes if node.numa_topology is not None]
+        if not nodes:
+            return
+        numa_topologies = self.placement_client.get_numa_topologies(
+            [node.uuid for node in nodes])
         for node in nodes:
-            host_state = HostState(node.hostname)
-            host_state.update(compute_node=node,
-                              service=services.get(node.hostname))
-            host_states.append(host_state)
-        return host_states
+            self.host_state_map[node.hostname].update_from_placement(
+                numa_topologies.get(node.uuid))
@@ -10,6 +10,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
+
 from oslo_log.log import logging
 
 from zun.common import utils
@@ -44,10 +46,26 @@ class HostState(object):
         self.pci_stats = None
         self.disk_quota_supported = False
         self.runtimes = []
+        # The 'repo:tag' references of the images present on the host
+        self.images = set()
+
+        # Generation of the compute node record this state was built from.
+        self.updated_at = None
 
         # Resource oversubscription values for the compute host:
         self.limits = {}
-        self.placement_client = placement_client.SchedulerReportClient()
+
+    def copy(self):
+        """Return a copy of this state to consume the resources from.
+
+        The resources consumed by a request are then private to it, the
+        structures changed by consume_from_request() are copied deeply.
+        """
+        host_state = copy.copy(self)
+        host_state.limits = {}
+        host_state.numa_topology = copy.deepcopy(self.numa_topology)
+        host_state.pci_stats = copy.deepcopy(self.pci_stats)
+        return host_state
 
     def update(self, compute_node=None, service=None):
         """Update information about a host"""
@@ -57,7 +75,6 @@ class HostState(object):
                 LOG.debug('Update host state from compute node: %s',
                           compute_node)
                 self._update_from_compute_node(compute_node)
-                self._update_from_placement(compute_node)
             if service is not None:
                 LOG.debug('Update host state with service: %s', service)
                 self.service = service
@@ -80,10 +97,40 @@ class HostState(object):
             stats=compute_node.pci_device_pools)
         self.disk_quota_supported = compute_node.disk_quota_supported
         self.runtimes = compute_node.runtimes
+        self.images = set(compute_node.images or [])
+        self.updated_at = compute_node.updated_at
+
+    def update_from_placement(self, numa_cells):
+        """Update the NUMA usage of a host from its placement record"""
+        if self.numa_topology is None or numa_cells is None:
+            return
+        self.numa_topology.nodes = placement_client.update_numa_nodes(
+            self.numa_topology.nodes, numa_cells)
+
+    def consume_from_request(self, container, extra_spec):
+        """Virtually consume the resources of a container from this host.
+
+        The consumed resources are accounted until the host state is rebuilt
+        from its compute node.
+        """
+        memory = int(container.memory) if container.memory else 0
+        self.mem_used += memory
+        self.mem_free -= memory
+        self.cpu_used += container.cpu or 0
+        self.disk_used += container.disk or 0
+        self.total_containers += 1
+
+        pci_requests = extra_spec.get('pci_requests')
+        if pci_requests and pci_requests.requests and self.pci_stats:
+            self.pci_stats.apply_requests(pci_requests.requests)
 
-    def _update_from_placement(self, compute_node):
-        nodes = self.placement_client.update_local_numa_topology(compute_node)
-        self.numa_topology.nodes = nodes
+        cpuset = self.limits.get('cpuset')
+        if cpuset and self.numa_topology is not None:
+            for node in self.numa_topology.nodes:
+                if node.id == cpuset['node']:
+                    free_cpus = sorted(node.free_cpus)
+                    node.pin_cpus(set(free_cpus[:int(container.cpu)]))
+                    node.mem_available -= memory
 
     def __repr__(self):
         return ("%(host)s ram: %(free_ram)sMB "
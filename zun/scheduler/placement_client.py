@@ -14,14 +14,19 @@ import functools
 import json
 import zun.conf
 
+import eventlet
 from keystoneauth1 import exceptions as ks_exc
 from keystoneauth1 import loading as keystone
 from oslo_log import log as logging
+import six
 from zun.common.i18n import _
 
 CONF = zun.conf.CONF
 LOG = logging.getLogger(__name__)
 WARN_EVERY = 10
+# Matches the default size of the connection pool of a keystoneauth
+# session, so concurrent requests reuse the pooled connections.
+NUMA_TOPOLOGY_CONCURRENCY = 10
 
 
 def warn_limit(self, msg):
@@ -147,6 +152,25 @@ def _move_operation_alloc_request(source_allocs, dest_alloc_req):
     return new_alloc_req
 
 
+def update_numa_nodes(numa_nodes, cells):
+    """Apply the NUMA usage reported to placement to the given NUMA nodes.
+
+    :param numa_nodes: list of NUMANode objects of a compute node
+    :param cells: list of NUMA cell dicts retrieved from placement
+    :returns: the NUMA nodes that have a matching cell in placement
+    """
+    numa_topology_nodes = []
+    for node in numa_nodes:
+        for cell in cells:
+            if node.id == cell['id']:
+                node.cpuset = set(cell['cpuset'])
+                node.pinned_cpus = set(cell['pinned_cpus'])
+                node.mem_available = node.mem_total - cell['memory_usage']
+                numa_topology_nodes.append(node)
+    LOG.debug('updated_numa_topology_nodes: %s' % numa_topology_nodes)
+    return numa_topology_nodes
+
+
 def get_placement_request_id(response):
     if response is not None:
         return response.headers.get(
@@ -268,8 +292,12 @@ class SchedulerReportClient(object):
         return r.status_code == 200
 
     @safe_connect
-    def update_local_numa_topology(self, compute_node):
-        rp_uuid = compute_node.uuid
+    def get_numa_topology(self, rp_uuid):
+        """Retrieve the NUMA cells of a resource provider from placement.
+
+        :param rp_uuid: UUID of the resource provider (compute node)
+        :returns: a list of NUMA cell dicts, or None on failure
+        """
         resp = self.get("/resource_providers/%s/numa_topologies" % rp_uuid,
                         version='1.15')
         if resp.status_code != 200:
@@ -284,13 +312,28 @@ class SchedulerReportClient(object):
         total_numa_topology = resp.json()
         LOG.debug('numa_topology_from_placement: %s' %
                   total_numa_topology['numa_topologies'])
-        numa_topology_nodes = []
-        for node in compute_node.numa_topology.nodes:
-            for cell in total_numa_topology['numa_topologies']:
-                if node.id == cell['id']:
-                    node.cpuset = set(cell['cpuset'])
-                    node.pinned_cpus = set(cell['pinned_cpus'])
-                    node.mem_available = node.mem_total - cell['memory_usage']
-                    numa_topology_nodes.append(node)
-        LOG.debug('updated_numa_topology_nodes: %s' % numa_topology_nodes)
-        return numa_topology_nodes
+        return total_numa_topology['numa_topologies']
+
+    def get_numa_topologies(self, rp_uuids):
+        """Retrieve the NUMA cells of several resource providers.
+
+        The requests are issued concurrently over the shared session, so
+        populating all the candidate hosts costs about one round trip
+        instead of one per host.
+
+        :param rp_uuids: list of resource provider UUIDs
+        :returns: a dict, keyed by resource provider UUID, of the NUMA cells
+                  of the providers whose topology could be retrieved
+        """
+        pool = eventlet.GreenPool(NUMA_TOPOLOGY_CONCURRENCY)
+        rp_uuids = list(rp_uuids)
+        results = pool.imap(self.get_numa_topology, rp_uuids)
+        return {rp_uuid: cells
+                for rp_uuid, cells in six.moves.zip(rp_uuids, results)
+                if cells is not None}
+
+    def update_local_numa_topology(self, compute_node):
+        cells = self.get_numa_topology(compute_node.uuid)
+        if cells is None:
+            return
+        return update_numa_nodes(compute_node.numa_topology.nodes, cells)
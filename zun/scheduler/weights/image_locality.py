@@ -0,0 +1,43 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Image Locality Weigher.  Weigh hosts by whether they already have the image
+of the container.
+
+The images present on a host are reported by its compute node. The default
+is to prefer the hosts that do not need to pull the image. Set the
+'image_locality_weight_multiplier' option to 0 to ignore the image locality,
+or to a small positive number to favor spreading over locality.
+"""
+
+from zun.common import utils
+import zun.conf
+from zun.scheduler import weights
+
+CONF = zun.conf.CONF
+
+
+class ImageLocalityWeigher(weights.BaseHostWeigher):
+
+    def weight_multiplier(self):
+        """Override the weight multiplier."""
+        return CONF.scheduler.image_locality_weight_multiplier
+
+    def _weigh_object(self, host_state, container, extra_spec):
+        """Higher weights win."""
+        if not container.image or not host_state.images:
+            return 0
+        repo, tag = utils.parse_image_name(container.image,
+                                           container.image_driver)
+        reference = utils.normalize_image_reference(repo, tag)
+        return 1 if reference in host_state.images else 0
@@ -0,0 +1,46 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+NUMA Weigher.  Weigh hosts by how well a dedicated container fits in
+their NUMA nodes.
+
+Only containers with the 'dedicated' CPU policy are weighed; every host gets
+the same weight for other containers. A host is weighed by the number of
+free CPUs of its NUMA node that fits the request and has the most free CPUs.
+The default is to spread dedicated containers. If you prefer packing them in
+the fullest NUMA nodes, you can set the 'numa_weight_multiplier' option to a
+negative number.
+"""
+
+import zun.conf
+from zun.scheduler import weights
+
+CONF = zun.conf.CONF
+
+
+class NUMAWeigher(weights.BaseHostWeigher):
+
+    def weight_multiplier(self):
+        """Override the weight multiplier."""
+        return CONF.scheduler.numa_weight_multiplier
+
+    def _weigh_object(self, host_state, container, extra_spec):
+        """Higher weights win.  We want spreading to be the default."""
+        if (container.cpu_policy != 'dedicated' or
+                host_state.numa_topology is None):
+            return 0
+        free_cpus = [len(node.cpuset - node.pinned_cpus)
+                     for node in host_state.numa_topology.nodes]
+        fit_cpus = [free for free in free_cpus
+                    if free >= (container.cpu or 0)]
+        return max(fit_cpus) if fit_cpus else 0
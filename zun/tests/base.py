@@ -24,8 +24,14 @@ from oslotest import base
 import pecan
 import testscenarios
 
+from zun.api import servicegroup
 from zun.common import context as zun_context
 import zun.conf
+from zun.container.docker import image_index
+from zun.container.os_capability.linux import os_capability_linux
+from zun.image.glance import utils as glance_utils
+from zun.network import neutron
+from zun.network import port_pool
 from zun.objects import base as objects_base
 
 from zun.tests import conf_fixture
@@ -103,6 +109,12 @@ class TestCase(base.BaseTestCase):
             pecan.set_config({}, overwrite=True)
 
         self.addCleanup(reset_pecan)
+        self.addCleanup(servicegroup.ServiceGroup.reset_cache)
+        self.addCleanup(os_capability_linux.LinuxHost.reset_cache)
+        self.addCleanup(glance_utils.reset_cache)
+        self.addCleanup(image_index.get_image_index().reset)
+        self.addCleanup(neutron.reset_cache)
+        self.addCleanup(port_pool.get_port_pool().reset)
 
     def _restore_obj_registry(self):
         objects_base.ZunObjectRegistry._registry._obj_classes \
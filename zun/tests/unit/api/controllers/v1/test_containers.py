@@ -1642,6 +1642,32 @@ class TestContainerController(api_base.FunctionalTest):
         container_get_archive.assert_called_once_with(
             mock.ANY, test_container_obj, cmd['path'])
 
+    @patch('zun.api.archive.get_archive')
+    @patch('zun.common.utils.validate_container_state')
+    @patch('zun.compute.api.API.container_get_archive_url')
+    @patch('zun.objects.Container.get_by_uuid')
+    def test_get_archive_stream(self, mock_get_by_uuid,
+                                mock_get_archive_url, mock_validate,
+                                mock_get_archive):
+        mock_get_archive_url.return_value = 'http://host/archive'
+        mock_get_archive.return_value = (iter([b'tar', b'data']),
+                                         {'name': '1.txt'})
+        test_container = utils.get_test_container()
+        test_container_obj = objects.Container(self.context, **test_container)
+        mock_get_by_uuid.return_value = test_container_obj
+
+        container_uuid = test_container.get('uuid')
+        url = '/v1/containers/%s/%s/' % (container_uuid, 'get_archive')
+        headers = {'OpenStack-API-Version': 'container 1.25'}
+        response = self.get(url, {'path': '/home/1.txt'}, headers=headers)
+        self.assertEqual(200, response.status_int)
+        self.assertEqual('application/x-tar', response.content_type)
+        self.assertEqual(b'tardata', response.body)
+        self.assertEqual('eyJuYW1lIjogIjEudHh0In0=',
+                         response.headers['Container-Path-Stat'])
+        mock_get_archive.assert_called_once_with(
+            'http://host/archive', '/home/1.txt')
+
     def test_get_archive_by_uuid_invalid_state(self):
         uuid = uuidutils.generate_uuid()
         test_object = utils.create_test_container(context=self.context,
@@ -1673,6 +1699,32 @@ class TestContainerController(api_base.FunctionalTest):
         container_put_archive.assert_called_once_with(
             mock.ANY, test_container_obj, cmd['path'], cmd['data'])
 
+    @patch('zun.api.archive.put_archive')
+    @patch('zun.common.utils.validate_container_state')
+    @patch('zun.compute.api.API.container_get_archive_url')
+    @patch('zun.objects.Container.get_by_uuid')
+    def test_put_archive_stream(self, mock_get_by_uuid,
+                                mock_get_archive_url, mock_validate,
+                                mock_put_archive):
+        mock_get_archive_url.return_value = 'http://host/archive'
+        data = []
+        mock_put_archive.side_effect = (
+            lambda url, path, data_file: data.append(data_file.read()))
+        test_container = utils.get_test_container()
+        test_container_obj = objects.Container(self.context, **test_container)
+        mock_get_by_uuid.return_value = test_container_obj
+
+        container_uuid = test_container.get('uuid')
+        url = '/v1/containers/%s/%s/?path=/home/' % (container_uuid,
+                                                     'put_archive')
+        headers = {'OpenStack-API-Version': 'container 1.25',
+                   'Content-Type': 'application/x-tar'}
+        response = self.post(url, b'tardata', headers=headers)
+        self.assertEqual(200, response.status_int)
+        self.assertEqual([b'tardata'], data)
+        mock_put_archive.assert_called_once_with(
+            'http://host/archive', '/home/', mock.ANY)
+
     def test_put_archive_by_uuid_invalid_state(self):
         uuid = uuidutils.generate_uuid()
         test_object = utils.create_test_container(context=self.context,
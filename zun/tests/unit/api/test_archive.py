@@ -0,0 +1,97 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import io
+
+import mock
+import requests
+
+from zun.api import archive
+from zun.common import exception
+from zun.tests import base
+
+URL = 'http://host:9518/containers/id/archive?token=token'
+
+
+class TestArchive(base.TestCase):
+
+    def setUp(self):
+        super(TestArchive, self).setUp()
+        p = mock.patch('zun.api.archive.requests.get')
+        self.mock_get = p.start()
+        self.addCleanup(p.stop)
+        p = mock.patch('zun.api.archive.requests.put')
+        self.mock_put = p.start()
+        self.addCleanup(p.stop)
+
+    def test_get_archive(self):
+        self.config(archive_chunk_size=1024, group='api')
+        response = self.mock_get.return_value
+        response.ok = True
+        response.headers = {'X-Container-Path-Stat':
+                            'eyJuYW1lIjogImZpbGUifQ=='}
+        response.iter_content.return_value = iter([b'a', b'b'])
+        stream, stat = archive.get_archive(URL, '/file')
+        self.assertEqual({'name': 'file'}, stat)
+        self.mock_get.assert_called_once_with(
+            URL, params={'path': '/file'}, stream=True, verify=True)
+        self.assertFalse(response.close.called)
+        self.assertEqual(b'ab', b''.join(stream))
+        response.iter_content.assert_called_once_with(1024)
+        response.close.assert_called_once_with()
+
+    def test_get_archive_not_found(self):
+        response = self.mock_get.return_value
+        response.ok = False
+        response.status_code = 404
+        response.text = 'not found'
+        self.assertRaises(exception.Invalid, archive.get_archive,
+                          URL, '/file')
+        response.close.assert_called_once_with()
+
+    def test_get_archive_forbidden(self):
+        response = self.mock_get.return_value
+        response.ok = False
+        response.status_code = 403
+        response.text = 'The archive token is invalid or expired.'
+        self.assertRaises(exception.DockerError, archive.get_archive,
+                          URL, '/file')
+
+    def test_get_archive_ca_file(self):
+        self.config(archive_ca_file='/ca.pem', group='api')
+        self.mock_get.return_value.ok = False
+        self.mock_get.return_value.status_code = 404
+        self.assertRaises(exception.Invalid, archive.get_archive,
+                          URL, '/file')
+        self.mock_get.assert_called_once_with(
+            URL, params={'path': '/file'}, stream=True, verify='/ca.pem')
+
+    def test_put_archive(self):
+        self.config(archive_chunk_size=1024, group='api')
+        data = b'x' * 2500
+        chunks = []
+
+        def put(url, params, data, verify):
+            chunks.extend(data)
+            return mock.Mock(ok=True)
+
+        self.mock_put.side_effect = put
+        archive.put_archive(URL, '/dir', io.BytesIO(data))
+        self.assertEqual([1024, 1024, 452], [len(c) for c in chunks])
+        self.assertEqual(data, b''.join(chunks))
+        self.mock_put.assert_called_once_with(
+            URL, params={'path': '/dir'}, data=mock.ANY, verify=True)
+
+    def test_put_archive_connection_error(self):
+        self.mock_put.side_effect = requests.ConnectionError('error')
+        self.assertRaises(exception.DockerError, archive.put_archive,
+                          URL, '/dir', io.BytesIO(b''))
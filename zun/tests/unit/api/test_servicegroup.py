@@ -0,0 +1,91 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import datetime
+
+import mock
+from oslo_utils import timeutils
+
+from zun.api import servicegroup
+from zun import objects
+from zun.tests import base
+
+
+class TestServiceGroup(base.TestCase):
+    """Test cases for zun.api.servicegroup"""
+
+    def setUp(self):
+        super(TestServiceGroup, self).setUp()
+        self.servicegroup_api = servicegroup.ServiceGroup()
+
+    def _get_fake_service(self, host, last_seen_up=None):
+        return objects.ZunService(self.context, host=host,
+                                  binary='zun-compute', forced_down=False,
+                                  last_seen_up=last_seen_up,
+                                  created_at=timeutils.utcnow(),
+                                  updated_at=None)
+
+    @mock.patch.object(objects.ZunService, 'list_by_binary')
+    def test_get_services_cached(self, mock_list):
+        self.config(service_cache_time=60)
+        mock_list.return_value = [self._get_fake_service('host1'),
+                                  self._get_fake_service('host2')]
+        services = self.servicegroup_api.get_services(self.context)
+        self.assertEqual(['host1', 'host2'],
+                         sorted(s.host for s in services))
+        services = servicegroup.ServiceGroup().get_services(self.context)
+        self.assertEqual(2, len(services))
+        mock_list.assert_called_once_with(self.context, 'zun-compute')
+
+    @mock.patch.object(objects.ZunService, 'list_by_binary')
+    def test_get_services_cache_disabled(self, mock_list):
+        self.config(service_cache_time=0)
+        mock_list.return_value = [self._get_fake_service('host1')]
+        self.servicegroup_api.get_services(self.context)
+        self.servicegroup_api.get_services(self.context)
+        self.assertEqual(2, mock_list.call_count)
+
+    @mock.patch.object(objects.ZunService, 'get_by_host_and_binary')
+    @mock.patch.object(objects.ZunService, 'list_by_binary')
+    def test_host_is_up(self, mock_list, mock_get):
+        self.config(service_cache_time=60)
+        now = timeutils.utcnow()
+        old = now - datetime.timedelta(seconds=3600)
+        mock_list.return_value = [self._get_fake_service('host1', now),
+                                  self._get_fake_service('host2', old)]
+        self.assertTrue(self.servicegroup_api.host_is_up(self.context,
+                                                         'host1'))
+        self.assertFalse(self.servicegroup_api.host_is_up(self.context,
+                                                          'host2'))
+        self.assertFalse(mock_get.called)
+
+    @mock.patch.object(objects.ZunService, 'get_by_host_and_binary')
+    @mock.patch.object(objects.ZunService, 'list_by_binary')
+    def test_host_is_up_not_cached(self, mock_list, mock_get):
+        self.config(service_cache_time=60)
+        mock_list.return_value = []
+        mock_get.return_value = self._get_fake_service('host1',
+                                                       timeutils.utcnow())
+        self.assertTrue(self.servicegroup_api.host_is_up(self.context,
+                                                         'host1'))
+        self.assertTrue(self.servicegroup_api.host_is_up(self.context,
+                                                         'host1'))
+        mock_get.assert_called_once_with(self.context, 'host1',
+                                         'zun-compute')
+
+    @mock.patch.object(objects.ZunService, 'get_by_host_and_binary')
+    @mock.patch.object(objects.ZunService, 'list_by_binary')
+    def test_host_is_up_unknown_host(self, mock_list, mock_get):
+        mock_list.return_value = []
+        mock_get.return_value = None
+        self.assertFalse(self.servicegroup_api.host_is_up(self.context,
+                                                          'host1'))
@@ -0,0 +1,50 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from zun.common import cache
+from zun.tests import base
+
+
+class TestTTLCache(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestTTLCache, self).setUp()
+        self.ttl = 60
+        self.cache = cache.TTLCache(lambda: self.ttl, max_entries=4)
+
+    @mock.patch('time.time')
+    def test_get_expired(self, mock_time):
+        mock_time.return_value = 1000
+        self.cache.set('key', 'value')
+        self.assertEqual('value', self.cache.get('key'))
+        self.assertIn('key', self.cache)
+        mock_time.return_value = 1060
+        self.assertIsNone(self.cache.get('key'))
+        self.assertNotIn('key', self.cache)
+
+    def test_disabled(self):
+        self.ttl = 0
+        self.cache.set('key', 'value')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_max_entries(self):
+        for i in range(5):
+            self.cache.set(i, i)
+        self.assertEqual([None, None, 2, 3, 4],
+                         [self.cache.get(i) for i in range(5)])
+
+    def test_pop(self):
+        self.cache.set('key', 'value')
+        self.assertEqual('value', self.cache.pop('key'))
+        self.assertIsNone(self.cache.get('key'))
@@ -60,6 +60,16 @@ class TestUtils(base.TestCase):
         self.assertEqual(('test-test', 'test'),
                          utils.parse_image_name('test-test:test'))
 
+    def test_normalize_image_reference(self):
+        self.assertEqual('cirros:latest',
+                         utils.normalize_image_reference('cirros'))
+        self.assertEqual('cirros:0.4',
+                         utils.normalize_image_reference(
+                             'docker.io/library/cirros', '0.4'))
+        self.assertEqual('localhost:5000/cirros:latest',
+                         utils.normalize_image_reference(
+                             'localhost:5000/cirros'))
+
     def test_get_image_pull_policy(self):
         self.assertEqual('always',
                          utils.get_image_pull_policy('always',
@@ -125,6 +135,25 @@ class TestUtils(base.TestCase):
         self.assertRaises(exception.ZunException, utils.get_security_group_ids,
                           self.context, security_groups)
 
+    @mock.patch('zun.common.clients.OpenStackClients.neutron')
+    def test_get_security_group_ids_cached(self, mock_neutron_client):
+        neutron_client_instance = mock_neutron_client.return_value
+        neutron_client_instance.list_security_groups.side_effect = [
+            {'security_groups': [{'id': 'id1', 'name': 'sg1'}]},
+            {'security_groups': [{'id': 'id1', 'name': 'sg1'},
+                                 {'id': 'id2', 'name': 'sg2'}]}]
+        self.assertEqual(['id1'],
+                         utils.get_security_group_ids(self.context, ['sg1']))
+        self.assertEqual(['id1'],
+                         utils.get_security_group_ids(self.context, ['sg1']))
+        self.assertEqual(
+            1, neutron_client_instance.list_security_groups.call_count)
+        # A security group missing from the cache is looked up in neutron
+        self.assertEqual(['id2'],
+                         utils.get_security_group_ids(self.context, ['sg2']))
+        self.assertEqual(
+            2, neutron_client_instance.list_security_groups.call_count)
+
     def test_check_capsule_template(self):
         with self.assertRaisesRegex(
             exception.InvalidCapsuleTemplate, "kind fields need to "
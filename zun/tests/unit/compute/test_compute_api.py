@@ -374,6 +374,22 @@ class TestAPI(base.TestCase):
             container.host, "container_get_archive",
             container=container, path="/root")
 
+    @mock.patch('zun.compute.rpcapi.API._call')
+    @mock.patch('zun.api.servicegroup.ServiceGroup.service_is_up')
+    @mock.patch('zun.objects.ZunService.list_by_binary')
+    def test_container_get_archive_url(self, mock_srv_list,
+                                       mock_srv_up, mock_call):
+        container = self.container
+        srv = objects.ZunService(
+            self.context,
+            **utils.get_test_zun_service(host=container.host))
+        mock_srv_list.return_value = [srv]
+        mock_srv_up.return_value = True
+        self.compute_api.container_get_archive_url(self.context, container)
+        mock_call.assert_called_once_with(
+            container.host, "container_get_archive_url",
+            container=container)
+
     @mock.patch('zun.compute.rpcapi.API._cast')
     @mock.patch.object(objects.ContainerAction, 'action_start')
     def test_add_security_group(self, mock_start, mock_cast):
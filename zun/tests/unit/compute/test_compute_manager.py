@@ -21,6 +21,7 @@ from zun.common import exception
 from zun.compute import claims
 from zun.compute import manager
 import zun.conf
+from zun.objects.capsule import Capsule
 from zun.objects.container import Container
 from zun.objects.container_action import ContainerActionEvent
 from zun.objects.exec_instance import ExecInstance
@@ -36,6 +37,7 @@ class FakeResourceTracker(object):
 
     def __init__(self, *args, **kwargs):
         self.compute_node = mock.MagicMock()
+        self.usage_drifted = False
 
     def container_claim(self, context, container, pci_requests, limits):
         return claims.NopClaim()
@@ -84,6 +86,58 @@ class TestManager(base.TestCase):
         self.compute_manager = manager.Manager()
         self.compute_manager._resource_tracker = FakeResourceTracker()
 
+    @mock.patch.object(fake_driver, 'watch_container_states')
+    def test_watch_container_events_disabled(self, mock_watch):
+        self.config(watch_container_events=False, group='compute')
+        self.compute_manager.watch_container_events(self.context)
+        self.assertFalse(mock_watch.called)
+
+    @mock.patch('time.sleep')
+    @mock.patch.object(fake_driver, 'watch_container_states')
+    def test_watch_container_events_restarts(self, mock_watch, mock_sleep):
+        mock_watch.side_effect = [exception.DockerError, None,
+                                  NotImplementedError]
+        self.compute_manager.watch_container_events(self.context)
+        self.assertEqual(3, mock_watch.call_count)
+        self.assertEqual(2, mock_sleep.call_count)
+
+    @mock.patch.object(manager.Manager, 'inventory_host')
+    def test_audit_host_if_drifted(self, mock_inventory):
+        self.compute_manager._audit_host_if_drifted(self.context)
+        self.assertFalse(mock_inventory.called)
+        self.compute_manager._resource_tracker.usage_drifted = True
+        self.compute_manager._audit_host_if_drifted(self.context)
+        mock_inventory.assert_called_once_with(self.context)
+
+    @mock.patch.object(Capsule, 'save')
+    @mock.patch.object(Capsule, 'list')
+    @mock.patch.object(fake_driver, 'update_containers_states')
+    def test_sync_container_state(self, mock_update_states, mock_list,
+                                  mock_save):
+        container_1 = Container(self.context, **utils.get_test_container(
+            uuid='ea8e2a25-2901-438d-8157-de7ffd68d051', capsule_id=1,
+            host='host2'))
+        container_2 = Container(self.context, **utils.get_test_container(
+            uuid='8a4bd3b4-0b8f-4b47-9c5e-5c4b8ef5bd2f', capsule_id=None))
+        mock_update_states.return_value = [container_1, container_2]
+        capsule = Capsule(self.context, **utils.get_test_capsule(
+            id=1, host='host1',
+            containers_uuids=['sandbox-uuid', container_1.uuid]))
+        mock_list.return_value = [capsule]
+        self.compute_manager.sync_container_state(self.context)
+        mock_update_states.assert_called_once_with(self.context)
+        mock_list.assert_called_once_with(self.context, filters={'id': [1]})
+        self.assertEqual('host2', capsule.host)
+        mock_save.assert_called_once_with(self.context)
+
+    @mock.patch('time.sleep')
+    @mock.patch.object(fake_driver, 'watch_local_images')
+    def test_watch_image_events_restarts(self, mock_watch, mock_sleep):
+        mock_watch.side_effect = [exception.DockerError, NotImplementedError]
+        self.compute_manager.watch_image_events(self.context)
+        self.assertEqual(2, mock_watch.call_count)
+        self.assertEqual(1, mock_sleep.call_count)
+
     @mock.patch.object(Container, 'save')
     def test_init_container_sets_creating_error(self, mock_save):
         container = Container(self.context, **utils.get_test_container())
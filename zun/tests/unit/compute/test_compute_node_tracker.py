@@ -0,0 +1,88 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import copy
+
+import mock
+
+from zun.compute import compute_node_tracker
+from zun import objects
+from zun.tests import base
+from zun.tests.unit.db import utils
+
+
+class TestComputeNodeTracker(base.TestCase):
+
+    @mock.patch('zun.scheduler.placement_client.SchedulerReportClient')
+    @mock.patch('zun.scheduler.client.SchedulerClient')
+    def setUp(self, mock_scheduler_client, mock_placement_client):
+        super(TestComputeNodeTracker, self).setUp()
+        self.tracker = compute_node_tracker.ComputeNodeTracker(
+            'localhost', mock.MagicMock())
+        compute_node = utils.get_test_compute_node()
+        compute_node['numa_topology'] = objects.numa.NUMATopology._from_dict(
+            compute_node['numa_topology'])
+        self.compute_node = objects.ComputeNode(self.context, **compute_node)
+        self.tracker.old_resources['localhost'] = copy.deepcopy(
+            self.compute_node)
+        self.container = objects.Container(
+            self.context, **utils.get_test_container(
+                memory='128', cpu=1.0, disk=1))
+        self.container.cpu_policy = 'shared'
+        self.container.cpuset_cpus = None
+
+    @mock.patch.object(objects.Container, 'save')
+    @mock.patch.object(objects.ComputeNode, 'get_by_name')
+    def test_container_claim_applies_usage(self, mock_get, mock_save):
+        mock_get.return_value = self.compute_node
+        self.tracker.container_claim(self.context, self.container, None)
+        self.assertEqual(512 + 128, self.compute_node.mem_used)
+        self.assertEqual(6.5 + 1.0, self.compute_node.cpu_used)
+        self.assertEqual(20 + 1, self.compute_node.disk_used)
+        self.assertIn(self.container.uuid, self.tracker.tracked_containers)
+        self.assertFalse(self.tracker.usage_drifted)
+
+        mock_get.return_value = copy.deepcopy(self.compute_node)
+        self.tracker.remove_usage_from_container(self.context,
+                                                 self.container)
+        self.assertEqual(512, self.tracker.compute_node.mem_used)
+        self.assertNotIn(self.container.uuid,
+                         self.tracker.tracked_containers)
+        self.assertFalse(self.tracker.usage_drifted)
+
+    @mock.patch.object(objects.Container, 'save')
+    @mock.patch.object(objects.ComputeNode, 'get_by_name')
+    def test_container_claim_detects_drift(self, mock_get, mock_save):
+        self.compute_node.mem_used = 256
+        mock_get.return_value = self.compute_node
+        self.tracker.container_claim(self.context, self.container, None)
+        self.assertTrue(self.tracker.usage_drifted)
+
+    @mock.patch.object(objects.ComputeNode, 'get_by_name')
+    def test_remove_untracked_container_detects_drift(self, mock_get):
+        mock_get.return_value = self.compute_node
+        self.tracker.remove_usage_from_container(self.context,
+                                                 self.container)
+        self.assertTrue(self.tracker.usage_drifted)
+        self.assertEqual(512, self.compute_node.mem_used)
+
+    @mock.patch.object(objects.Container, 'list_by_host')
+    @mock.patch.object(objects.ComputeNode, 'get_by_name')
+    def test_update_available_resources_resets_drift(self, mock_get,
+                                                     mock_list):
+        mock_get.return_value = self.compute_node
+        mock_list.return_value = []
+        self.tracker.pci_tracker = mock.MagicMock()
+        self.tracker.usage_drifted = True
+        self.tracker.update_available_resources(self.context)
+        self.assertFalse(self.tracker.usage_drifted)
+        self.assertEqual(0, self.compute_node.mem_used)
@@ -34,7 +34,8 @@ class TestAPI(base.TestCase):
                                                mock_list, mock_service_is_up):
         test_container = utils.get_test_container()
         test_container_obj = objects.Container(self.context, **test_container)
-        test_service = utils.get_test_zun_service(host="fake_host")
+        test_service = utils.get_test_zun_service(
+            host=test_container_obj.host)
         test_service_obj = objects.ZunService(self.context, **test_service)
         mock_list.return_value = [test_service_obj]
         mock_service_is_up.return_value = False
@@ -0,0 +1,124 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import io
+
+from docker import errors
+import mock
+from six.moves.urllib import parse
+import webob
+
+from zun.container.docker import archive_server
+from zun.tests import base
+
+
+class TestArchiveServer(base.TestCase):
+
+    def setUp(self):
+        super(TestArchiveServer, self).setUp()
+        self.config(archive_base_url='http://host:9518/', group='compute')
+        self.addCleanup(archive_server._tokens.clear)
+        p = mock.patch('zun.container.docker.utils.DockerHTTPClient')
+        p.start()
+        self.addCleanup(p.stop)
+        self.client = p.target.DockerHTTPClient.return_value
+        self.app = archive_server.ArchiveApplication()
+
+    def _request(self, url, path='/file', **kwargs):
+        return webob.Request.blank(
+            url.replace('http://host:9518', '') + '&' +
+            parse.urlencode({'path': path}), **kwargs).get_response(self.app)
+
+    def test_get_url(self):
+        url = archive_server.get_url('id')
+        base_url, query = url.split('?')
+        self.assertEqual('http://host:9518/containers/id/archive', base_url)
+        token = parse.parse_qs(query)['token'][0]
+        self.assertEqual('id', archive_server._tokens.get(token))
+
+    def test_get_archive(self):
+        self.config(archive_chunk_size=1024, group='api')
+        self.client.get_archive.return_value = (iter([b'a', b'b']),
+                                                {'name': 'file'})
+        response = self._request(archive_server.get_url('id'))
+        self.assertEqual(200, response.status_int)
+        self.assertEqual('application/x-tar', response.content_type)
+        self.assertEqual('eyJuYW1lIjogImZpbGUifQ==',
+                         response.headers['X-Container-Path-Stat'])
+        self.assertEqual(b'ab', response.body)
+        self.client.get_archive.assert_called_once_with(
+            'id', '/file', chunk_size=1024)
+        self.client.close.assert_called_once_with()
+
+    def test_get_archive_not_found(self):
+        self.client.get_archive.side_effect = errors.NotFound('not found')
+        response = self._request(archive_server.get_url('id'))
+        self.assertEqual(404, response.status_int)
+        self.client.close.assert_called_once_with()
+
+    def test_put_archive(self):
+        self.config(archive_chunk_size=1024, group='api')
+        data = b'x' * 2500
+        chunks = []
+        self.client.put_archive.side_effect = (
+            lambda container_id, path, stream: chunks.extend(stream))
+        response = self._request(archive_server.get_url('id'), path='/dir',
+                                 method='PUT', body=data)
+        self.assertEqual(200, response.status_int)
+        self.assertEqual([1024, 1024, 452], [len(c) for c in chunks])
+        self.assertEqual(data, b''.join(chunks))
+        self.client.put_archive.assert_called_once_with('id', '/dir',
+                                                        mock.ANY)
+        self.client.close.assert_called_once_with()
+
+    def test_put_archive_api_error(self):
+        self.client.put_archive.side_effect = errors.APIError('error')
+        response = self._request(archive_server.get_url('id'), path='/dir',
+                                 method='PUT', body=b'')
+        self.assertEqual(502, response.status_int)
+
+    def test_token_single_use(self):
+        self.client.get_archive.return_value = (iter([]), {})
+        url = archive_server.get_url('id')
+        self.assertEqual(200, self._request(url).status_int)
+        self.assertEqual(403, self._request(url).status_int)
+        self.assertEqual(1, self.client.get_archive.call_count)
+
+    def test_token_of_another_container(self):
+        url = archive_server.get_url('other')
+        response = self._request(url.replace('/other/', '/id/'))
+        self.assertEqual(403, response.status_int)
+        self.assertFalse(self.client.get_archive.called)
+
+    @mock.patch('time.time')
+    def test_token_expired(self, mock_time):
+        self.config(archive_token_ttl=60, group='compute')
+        mock_time.return_value = 1000
+        url = archive_server.get_url('id')
+        mock_time.return_value = 1060
+        self.assertEqual(403, self._request(url).status_int)
+        self.assertFalse(self.client.get_archive.called)
+
+    def test_missing_token(self):
+        response = self._request('/containers/id/archive?')
+        self.assertEqual(403, response.status_int)
+
+    def test_unknown_path(self):
+        response = webob.Request.blank('/containers/id').get_response(
+            self.app)
+        self.assertEqual(404, response.status_int)
+
+    def test_read_chunks_of_raw_input(self):
+        self.config(archive_chunk_size=1024, group='api')
+        self.assertEqual(
+            [b'x' * 1024, b'x'],
+            list(archive_server._read_chunks(io.BytesIO(b'x' * 1025))))
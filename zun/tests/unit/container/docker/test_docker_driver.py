@@ -11,12 +11,14 @@
 # under the License.
 
 from docker import errors
+import eventlet
 import mock
 
 from oslo_utils import units
 from oslo_utils import uuidutils
 
 from zun.common import consts
+from zun.common import context as zun_context
 from zun.common import exception
 from zun import conf
 from zun.container.docker.driver import DockerDriver
@@ -89,6 +91,33 @@ class TestDockerDriver(base.DriverTestCase):
             self.mock_docker.load_image.assert_called_once_with(
                 mock_open_file.return_value)
 
+    def test_pull_image_streamed(self):
+        image_stream = mock.MagicMock(manifest=[{'RepoTags': ['cirros:0.4']}])
+        image_driver = mock.MagicMock()
+        image_driver.pull_image.return_value = (
+            {'image': 'cirros', 'path': None, 'stream': image_stream}, False)
+        self.driver.image_drivers = {'glance': image_driver}
+        image, image_loaded = self.driver.pull_image(
+            self.context, 'cirros', 'latest', 'always', 'glance')
+        self.mock_docker.load_image.assert_called_once_with(image_stream)
+        self.assertTrue(image_loaded)
+        self.assertEqual({'image': 'cirros', 'path': None, 'driver': 'glance',
+                          'manifest': [{'RepoTags': ['cirros:0.4']}]}, image)
+
+    def test_pull_image_streamed_checksum_mismatch(self):
+        image_stream = mock.MagicMock(manifest=[{'RepoTags': ['cirros:0.4']}])
+        self.mock_docker.load_image.side_effect = (
+            exception.ImageChecksumMismatch(actual='1', expected='2'))
+        image_driver = mock.MagicMock()
+        image_driver.pull_image.return_value = (
+            {'image': 'cirros', 'path': None, 'stream': image_stream}, False)
+        self.driver.image_drivers = {'glance': image_driver}
+        self.assertRaises(exception.ImageChecksumMismatch,
+                          self.driver.pull_image, self.context, 'cirros',
+                          'latest', 'always', 'glance')
+        self.mock_docker.remove_image.assert_called_once_with(
+            'cirros:0.4', force=True)
+
     def test_images(self):
         self.mock_docker.images = mock.Mock()
         self.driver.images(repo='test')
@@ -450,8 +479,74 @@ class TestDockerDriver(base.DriverTestCase):
         self.assertIn(mock_container_2, local_containers)
         self.assertIn(mock_container_3, local_containers)
 
+    def test_pull_image_coalesced(self):
+        image_driver = mock.MagicMock()
+
+        def _pull_image(context, repo, tag, image_pull_policy):
+            eventlet.sleep(0)
+            return {'image': repo, 'path': '/tmp/cirros.tar'}, False
+
+        image_driver.pull_image.side_effect = _pull_image
+        self.driver.image_drivers = {'glance': image_driver}
+        with mock.patch.object(self.driver, 'load_image') as mock_load:
+            threads = [eventlet.spawn(self.driver.pull_image, self.context,
+                                      'cirros', 'latest', 'always', 'glance')
+                       for i in range(3)]
+            results = [thread.wait() for thread in threads]
+        image_driver.pull_image.assert_called_once_with(
+            self.context, 'cirros', 'latest', 'always')
+        mock_load.assert_called_once_with('/tmp/cirros.tar')
+        for image, image_loaded in results:
+            self.assertEqual({'image': 'cirros', 'path': '/tmp/cirros.tar',
+                              'driver': 'glance'}, image)
+            self.assertTrue(image_loaded)
+        self.assertIsNot(results[0][0], results[1][0])
+        self.assertEqual({}, self.driver._image_pulls)
+
+    def test_pull_image_not_coalesced_across_projects(self):
+        image_driver = mock.MagicMock()
+
+        def _pull_image(context, repo, tag, image_pull_policy):
+            eventlet.sleep(0)
+            return {'image': repo, 'path': None,
+                    'project': context.project_id}, True
+
+        image_driver.pull_image.side_effect = _pull_image
+        self.driver.image_drivers = {'glance': image_driver}
+        other_context = zun_context.RequestContext(
+            user_id='fake_user', project_id='other_project')
+        threads = [
+            eventlet.spawn(self.driver.pull_image, self.context, 'cirros',
+                           'latest', 'ifnotpresent', 'glance'),
+            eventlet.spawn(self.driver.pull_image, other_context, 'cirros',
+                           'latest', 'ifnotpresent', 'glance'),
+            eventlet.spawn(self.driver.pull_image, self.context, 'cirros',
+                           'latest', 'always', 'glance')]
+        results = [thread.wait() for thread in threads]
+        self.assertEqual(3, image_driver.pull_image.call_count)
+        self.assertEqual(self.context.project_id, results[0][0]['project'])
+        self.assertEqual('other_project', results[1][0]['project'])
+
+    def test_pull_image_coalesced_failure(self):
+        image_driver = mock.MagicMock()
+
+        def _pull_image(context, repo, tag, image_pull_policy):
+            eventlet.sleep(0)
+            raise exception.ImageNotFound('not found')
+
+        image_driver.pull_image.side_effect = _pull_image
+        self.driver.image_drivers = {'docker': image_driver}
+        threads = [eventlet.spawn(self.driver.pull_image, self.context,
+                                  'cirros', 'latest', 'always', 'docker')
+                   for i in range(2)]
+        for thread in threads:
+            self.assertRaises(exception.ZunException, thread.wait)
+        self.assertEqual(1, image_driver.pull_image.call_count)
+        self.assertEqual({}, self.driver._image_pulls)
+
+    @mock.patch('zun.objects.container.Container.save_all')
     @mock.patch('zun.objects.container.Container.save')
-    def test_update_containers_states(self, mock_save):
+    def test_update_containers_states(self, mock_save, mock_save_all):
         mock_container = obj_utils.get_test_container(
             self.context, status='Running', host='host1')
         mock_container_2 = obj_utils.get_test_container(
@@ -465,6 +560,79 @@ class TestDockerDriver(base.DriverTestCase):
                 self.context, [mock_container])
             self.assertEqual(mock_container.host, 'host2')
             self.assertEqual(mock_container.status, 'Stopped')
+        mock_save_all.assert_called_once_with(self.context, [mock_container])
+
+    @mock.patch('zun.objects.container.Container.save_all')
+    @mock.patch('zun.objects.container.Container.list')
+    @mock.patch('zun.objects.container.Container.list_by_host')
+    def test_update_containers_states_of_host(self, mock_list_by_host,
+                                              mock_list, mock_save_all):
+        conf.CONF.set_override('host', 'host1')
+        container_1 = Container(self.context, **utils.get_test_container(
+            uuid=uuidutils.generate_uuid(), container_id='id1',
+            status='Running', host='host1'))
+        container_2 = Container(self.context, **utils.get_test_container(
+            uuid=uuidutils.generate_uuid(), container_id='id2',
+            status='Running', host='host1'))
+        for container in (container_1, container_2):
+            container.obj_reset_changes()
+        mock_list_by_host.return_value = [container_1, container_2]
+        mock_list.return_value = [container_1, container_2]
+        self.mock_docker.list_containers.return_value = [
+            {'Id': 'id1', 'Names': ['/zun-' + container_1.uuid],
+             'State': 'running'},
+            {'Id': 'id2', 'Names': ['/zun-' + container_2.uuid],
+             'State': 'exited'}]
+        containers = self.driver.update_containers_states(self.context)
+        self.assertEqual([container_1, container_2], containers)
+        mock_list_by_host.assert_called_once_with(self.context, 'host1')
+        self.assertEqual(consts.RUNNING, container_1.status)
+        self.assertEqual(consts.STOPPED, container_2.status)
+        mock_save_all.assert_called_once_with(self.context, [container_2])
+
+    @mock.patch.object(Container, 'save')
+    @mock.patch.object(Container, 'get_by_uuid')
+    def test_watch_container_states(self, mock_get, mock_save):
+        container = Container(self.context, **utils.get_test_container())
+        container.status = consts.RUNNING
+        container.obj_reset_changes()
+        mock_get.return_value = container
+        self.mock_docker.events = mock.Mock(return_value=[
+            {'Action': 'die',
+             'Actor': {'ID': container.container_id,
+                       'Attributes': {'name': 'zun-' + container.uuid}}},
+            {'Action': 'die',
+             'Actor': {'ID': 'other',
+                       'Attributes': {'name': 'not-a-zun-container'}}},
+        ])
+        self.mock_docker.inspect_container = mock.Mock(return_value={
+            'State': {'Status': 'exited', 'Running': False,
+                      'Paused': False, 'Restarting': False,
+                      'Dead': False, 'Error': '',
+                      'StartedAt': '2018-01-01T00:00:00Z',
+                      'FinishedAt': '2018-01-01T00:00:01Z'}})
+        self.driver.watch_container_states(self.context)
+        mock_get.assert_called_once_with(self.context, container.uuid)
+        self.mock_docker.inspect_container.assert_called_once_with(
+            container.container_id)
+        self.assertEqual(consts.STOPPED, container.status)
+        mock_save.assert_called_once_with(self.context)
+
+    @mock.patch.object(Container, 'save')
+    @mock.patch.object(Container, 'get_by_uuid')
+    def test_watch_container_states_skip_unstable(self, mock_get,
+                                                  mock_save):
+        container = Container(self.context, **utils.get_test_container())
+        container.status = consts.DELETING
+        mock_get.return_value = container
+        self.mock_docker.events = mock.Mock(return_value=[
+            {'Action': 'die',
+             'Actor': {'ID': container.container_id,
+                       'Attributes': {'name': 'zun-' + container.uuid}}}])
+        self.mock_docker.inspect_container = mock.Mock()
+        self.driver.watch_container_states(self.context)
+        self.assertFalse(self.mock_docker.inspect_container.called)
+        self.assertFalse(mock_save.called)
 
     @mock.patch('zun.compute.api.API.container_rebuild')
     def test_heal_with_rebuilding_container(self, mock_container_rebuild):
@@ -857,6 +1025,59 @@ class TestDockerDriver(base.DriverTestCase):
         cpu_used = self.driver.get_cpu_used()
         self.assertEqual(1.0, cpu_used)
 
+    def test_get_cpu_used_cached(self):
+        self.mock_docker.containers = mock.Mock()
+        self.mock_docker.containers.return_value = [{'Id': '123456'},
+                                                    {'Id': '654321'}]
+        self.mock_docker.inspect_container = mock.Mock()
+        self.mock_docker.inspect_container.return_value = {
+            'HostConfig': {'NanoCpus': 0,
+                           'CpuPeriod': 100000,
+                           'CpuQuota': 50000}}
+        self.assertEqual(1.0, self.driver.get_cpu_used())
+        self.assertEqual(1.0, self.driver.get_cpu_used())
+        self.assertEqual(2, self.mock_docker.inspect_container.call_count)
+
+        # An updated container is inspected again
+        mock_container = mock.MagicMock(container_id='123456')
+        mock_container.obj_get_changes.return_value = {'cpu': 1.0}
+        self.driver.update(self.context, mock_container)
+        self.mock_docker.inspect_container.return_value = {
+            'HostConfig': {'NanoCpus': 0,
+                           'CpuPeriod': 100000,
+                           'CpuQuota': 100000}}
+        self.assertEqual(1.5, self.driver.get_cpu_used())
+        self.mock_docker.inspect_container.assert_called_with('123456')
+        self.assertEqual(3, self.mock_docker.inspect_container.call_count)
+
+        # A removed container is forgotten
+        self.mock_docker.containers.return_value = [{'Id': '654321'}]
+        self.assertEqual(0.5, self.driver.get_cpu_used())
+        self.assertEqual(3, self.mock_docker.inspect_container.call_count)
+
+    def test_get_cpu_used_during_update(self):
+        self.mock_docker.containers = mock.Mock()
+        self.mock_docker.containers.return_value = [{'Id': '123456'}]
+        self.mock_docker.inspect_container = mock.Mock()
+        self.mock_docker.inspect_container.return_value = {
+            'HostConfig': {'NanoCpus': 0,
+                           'CpuPeriod': 100000,
+                           'CpuQuota': 50000}}
+
+        def update_container(container_id, **kwargs):
+            # The old quota is cached again while docker is updated
+            self.assertEqual(0.5, self.driver.get_cpu_used())
+            self.mock_docker.inspect_container.return_value = {
+                'HostConfig': {'NanoCpus': 0,
+                               'CpuPeriod': 100000,
+                               'CpuQuota': 100000}}
+
+        self.mock_docker.update_container.side_effect = update_container
+        mock_container = mock.MagicMock(container_id='123456')
+        mock_container.obj_get_changes.return_value = {'cpu': 1.0}
+        self.driver.update(self.context, mock_container)
+        self.assertEqual(1.0, self.driver.get_cpu_used())
+
     def test_stats(self):
         self.mock_docker.stats = mock.Mock()
         mock_container = mock.MagicMock()
@@ -920,6 +1141,16 @@ class TestDockerDriver(base.DriverTestCase):
                                              requested_network,
                                              security_groups=None)
 
+    def test_get_or_create_docker_network_cached(self):
+        network_api = mock.Mock()
+        network_api.list_networks.return_value = []
+        for i in range(2):
+            self.driver._get_or_create_docker_network(
+                self.context, network_api, 'network')
+        network_api.list_networks.assert_called_once_with(names=['network'])
+        network_api.create_network.assert_called_once_with(
+            neutron_net_id='network', name='network')
+
     def test_network_attach_error(self):
         mock_container = mock.Mock()
         mock_container.security_groups = None
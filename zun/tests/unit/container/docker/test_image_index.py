@@ -0,0 +1,89 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from docker import errors
+import mock
+
+from zun.container.docker import image_index
+from zun.container.docker import utils as docker_utils
+from zun.tests import base
+
+
+class TestLocalImageIndex(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestLocalImageIndex, self).setUp()
+        self.index = image_index.LocalImageIndex()
+        self.docker = mock.MagicMock()
+        self.docker.images.return_value = [
+            {'Id': 'sha256:1', 'RepoTags': ['cirros:latest'], 'Size': 10},
+            {'Id': 'sha256:2', 'RepoTags': ['<none>:<none>'], 'Size': 20},
+        ]
+
+    def test_load(self):
+        self.index.load(self.docker)
+        self.assertEqual(['cirros:latest'], self.index.references())
+        entry = self.index.get('cirros', 'latest')
+        self.assertEqual('sha256:1', entry['id'])
+        self.assertEqual(10, entry['size'])
+        self.assertIsNone(self.index.get('cirros', '0.4'))
+
+    def test_get_normalized_reference(self):
+        self.index.load(self.docker)
+        entry = self.index.get('docker.io/library/cirros', None)
+        self.assertEqual('sha256:1', entry['id'])
+        self.assertEqual(entry, self.index.get('index.docker.io/cirros',
+                                               'latest'))
+
+    def test_refresh_image_moves_reference(self):
+        self.index.load(self.docker)
+        self.docker.inspect_image.return_value = {
+            'Id': 'sha256:3', 'RepoTags': ['cirros:latest', 'cirros:0.4'],
+            'Size': 30}
+        self.index.refresh_image(self.docker, 'cirros:latest')
+        self.assertEqual(['cirros:0.4', 'cirros:latest'],
+                         self.index.references())
+        self.assertEqual('sha256:3', self.index.get('cirros', 'latest')['id'])
+
+    def test_refresh_image_deleted(self):
+        self.index.load(self.docker)
+        self.docker.inspect_image.side_effect = errors.NotFound('not found')
+        self.index.refresh_image(self.docker, 'sha256:1')
+        self.assertEqual([], self.index.references())
+
+    def test_touch(self):
+        self.index.load(self.docker)
+        self.index.touch('cirros', 'latest')
+        self.assertIsNotNone(self.index.get('cirros', 'latest')['last_used'])
+
+    @mock.patch.object(docker_utils, 'docker_client')
+    def test_watch(self, mock_client):
+        mock_client.return_value.__enter__.return_value = self.docker
+
+        def events(**kwargs):
+            self.assertTrue(self.index.watching)
+            yield {'Action': 'pull', 'Actor': {'ID': 'nginx:latest'}}
+            yield {'Action': 'delete', 'Actor': {'ID': 'sha256:1'}}
+
+        def inspect_image(image):
+            if image == 'nginx:latest':
+                return {'Id': 'sha256:4', 'RepoTags': ['nginx:latest'],
+                        'Size': 40}
+            raise errors.NotFound('not found')
+
+        self.docker.events.side_effect = events
+        self.docker.inspect_image.side_effect = inspect_image
+        self.index.watch()
+        self.assertFalse(self.index.watching)
+        self.assertEqual(['nginx:latest'], self.index.references())
+        self.assertEqual({'type': 'image'},
+                         self.docker.events.call_args[1]['filters'])
@@ -10,10 +10,12 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+from docker import errors
 import mock
-
 from oslo_serialization import jsonutils
+import testtools
 
+from zun.common import exception
 from zun.container.docker import utils as docker_utils
 from zun.tests.unit.container import base
 
@@ -74,3 +76,101 @@ class TestDockerHTTPClient(base.DriverTestCase):
         self.client.read_tar_image(fake_image)
         self.assertEqual('fake_config', fake_image['repo'])
         self.assertEqual('', fake_image['tag'])
+
+    def test_read_tar_image_manifest(self):
+        fake_image = {'path': None,
+                      'manifest': [{"Config": "fake_config",
+                                    "RepoTags": ["cirros:latest"]}]}
+        self.client.read_tar_image(fake_image)
+        self.assertEqual('cirros', fake_image['repo'])
+        self.assertEqual('latest', fake_image['tag'])
+
+    @mock.patch('docker.APIClient.load_image')
+    def test_load_image(self, mock_load_image):
+        mock_load_image.return_value = iter([{'stream': 'Loaded image'}])
+        self.client.load_image(mock.sentinel.data)
+        mock_load_image.assert_called_once_with(mock.sentinel.data,
+                                                quiet=None)
+
+    @mock.patch('docker.APIClient.load_image')
+    def test_load_image_error(self, mock_load_image):
+        mock_load_image.return_value = iter([{'error': 'unexpected EOF'}])
+        self.assertRaises(exception.DockerError, self.client.load_image,
+                          mock.sentinel.data)
+
+
+class TestDockerClientPool(base.DriverTestCase):
+
+    def setUp(self):
+        super(TestDockerClientPool, self).setUp()
+        docker_utils.reset_client_pool()
+        self.addCleanup(docker_utils.reset_client_pool)
+        docker_utils.metrics.reset()
+        self.addCleanup(docker_utils.metrics.reset)
+
+    @mock.patch.object(docker_utils, 'DockerHTTPClient')
+    def test_docker_client_reused(self, mock_client_cls):
+        client1 = mock.MagicMock()
+        mock_client_cls.side_effect = [client1, mock.MagicMock()]
+        with docker_utils.docker_client() as client:
+            self.assertEqual(client1, client)
+            with docker_utils.docker_client() as nested_client:
+                self.assertEqual(client1, nested_client)
+        with docker_utils.docker_client() as client:
+            self.assertEqual(client1, client)
+        self.assertEqual(1, mock_client_cls.call_count)
+        self.assertEqual(2, docker_utils.metrics.to_dict()[
+            'pool_wait']['count'])
+
+    @mock.patch.object(docker_utils, 'DockerHTTPClient')
+    def test_docker_client_pool_timeout(self, mock_client_cls):
+        pool = docker_utils.DockerClientPool(1, 0.01)
+        with pool.get():
+            pool._local.client = None
+            with testtools.ExpectedException(exception.DockerError):
+                with pool.get():
+                    pass
+
+    @mock.patch.object(docker_utils, 'DockerHTTPClient')
+    def test_docker_client_dedicated(self, mock_client_cls):
+        self.config(client_pool_size=1, group='docker')
+        dedicated = mock.MagicMock()
+        mock_client_cls.side_effect = [dedicated, mock.MagicMock()]
+        with docker_utils.docker_client(dedicated=True) as client:
+            self.assertEqual(dedicated, client)
+            # The dedicated client takes no slot of the pool
+            with docker_utils.docker_client() as pooled_client:
+                self.assertNotEqual(dedicated, pooled_client)
+        dedicated.close.assert_called_once_with()
+        self.assertEqual(1, docker_utils.metrics.to_dict()[
+            'pool_wait']['count'])
+
+    @mock.patch.object(docker_utils, 'DockerHTTPClient')
+    def test_docker_client_api_error(self, mock_client_cls):
+        def _raise_api_error():
+            with docker_utils.docker_client():
+                raise errors.APIError('error')
+
+        self.assertRaises(exception.DockerError, _raise_api_error)
+        with docker_utils.docker_client() as client:
+            self.assertEqual(mock_client_cls.return_value, client)
+        self.assertEqual(1, mock_client_cls.call_count)
+
+    def test_get_endpoint(self):
+        base_url = 'http+docker://localhost/v1.26'
+        self.assertEqual('GET /containers/json', docker_utils.get_endpoint(
+            'get', base_url + '/containers/json'))
+        self.assertEqual('POST /containers/{id}/start',
+                         docker_utils.get_endpoint(
+                             'post', base_url + '/containers/abc/start'))
+        self.assertEqual('GET /images/{id}/json', docker_utils.get_endpoint(
+            'get', base_url + '/images/library/cirros:latest/json'))
+        self.assertEqual('POST /images/create', docker_utils.get_endpoint(
+            'post', base_url + '/images/create'))
+
+    @mock.patch('requests.Session.request')
+    def test_request_metrics(self, mock_request):
+        client = docker_utils.DockerHTTPClient()
+        client.inspect_container('abc')
+        requests = docker_utils.metrics.to_dict()['requests']
+        self.assertEqual(1, requests['GET /containers/{id}/json']['count'])
@@ -12,57 +12,103 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import os
+
+import fixtures
 import mock
 import six
 
 from mock import mock_open
 from oslo_serialization import jsonutils
 
-from zun.common import exception
+from zun.container.os_capability import host_capability
 from zun.container.os_capability.linux import os_capability_linux
 from zun.tests import base
 
-LSCPU_ON = """# The following is the parsable format, which can be fed to other
-# programs. Each different item in every column has an unique ID
-# starting from zero.
-# Socket,CPU,Online
-0,0,Y
-0,8,Y
-1,16,Y
-1,24,Y
-2,32,Y"""
-
-LSCPU_NO_ONLINE = """# The following is the parsable format, which can be fed to
-# programs. Each different item in every column has an unique ID
-# starting from zero.
-# Socket,CPU
-0,0
-0,1
-1,2
-1,3"""
+NODE0_MEMINFO = """Node 0 MemTotal:       32768000 kB
+Node 0 MemFree:        16384000 kB
+Node 0 MemUsed:        16384000 kB"""
+
+NODE1_MEMINFO = """Node 1 MemTotal:       16384000 kB
+Node 1 MemFree:         8192000 kB
+Node 1 MemUsed:         8192000 kB"""
 
 
 class TestOSCapability(base.BaseTestCase):
-    @mock.patch('zun.common.utils.execute')
-    def test_get_cpu_numa_info_with_online(self, mock_output):
-        mock_output.return_value = LSCPU_ON
-        output = os_capability_linux.LinuxHost().get_cpu_numa_info()
-        expected_output = {'0': [0, 8], '1': [16, 24], '2': [32]}
-        self.assertEqual(expected_output, output)
 
-    @mock.patch('zun.common.utils.execute')
-    def test_get_cpu_numa_info_exception(self, mock_output):
-        mock_output.side_effect = exception.CommandError()
-        self.assertRaises(exception.CommandError,
-                          os_capability_linux.LinuxHost().get_cpu_numa_info)
+    def setUp(self):
+        super(TestOSCapability, self).setUp()
+        self.sysfs = self.useFixture(fixtures.TempDir()).path
+        self.node_path = os.path.join(self.sysfs, 'node')
+        self.cpu_online_path = os.path.join(self.sysfs, 'cpu_online')
+        self.pci_path = os.path.join(self.sysfs, 'pci')
+        for path in (self.node_path, self.pci_path):
+            os.mkdir(path)
+        self.useFixture(fixtures.MonkeyPatch(
+            'zun.container.os_capability.linux.os_capability_linux.'
+            'SYSFS_NODE_PATH', self.node_path))
+        self.useFixture(fixtures.MonkeyPatch(
+            'zun.container.os_capability.linux.os_capability_linux.'
+            'SYSFS_CPU_ONLINE_PATH', self.cpu_online_path))
+        self.useFixture(fixtures.MonkeyPatch(
+            'zun.container.os_capability.host_capability.'
+            'SYSFS_PCI_DEVICES_PATH', self.pci_path))
+        os_capability_linux.LinuxHost.reset_cache()
+        self.addCleanup(os_capability_linux.LinuxHost.reset_cache)
 
-    @mock.patch('zun.common.utils.execute')
-    def test_get_cpu_numa_info_without_online(self, mock_output):
-        mock_output.side_effect = [exception.CommandError(),
-                                   LSCPU_NO_ONLINE]
-        expected_output = {'0': [0, 1], '1': [2, 3]}
-        output = os_capability_linux.LinuxHost().get_cpu_numa_info()
-        self.assertEqual(expected_output, output)
+    def _write(self, path, data):
+        dirname = os.path.dirname(path)
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        with open(path, 'w') as f:
+            f.write(data)
+
+    def _add_node(self, node_id, cpulist, meminfo):
+        path = os.path.join(self.node_path, 'node%d' % node_id)
+        self._write(os.path.join(path, 'cpulist'), cpulist + '\n')
+        self._write(os.path.join(path, 'meminfo'), meminfo + '\n')
+
+    def _add_pci_device(self, address, vendor, device, numa_node='-1'):
+        path = os.path.join(self.pci_path, address)
+        self._write(os.path.join(path, 'vendor'), vendor + '\n')
+        self._write(os.path.join(path, 'device'), device + '\n')
+        self._write(os.path.join(path, 'numa_node'), numa_node + '\n')
+        return path
+
+    def test_get_numa_info(self):
+        self._add_node(0, '0-3,8', NODE0_MEMINFO)
+        self._add_node(1, '4-7', NODE1_MEMINFO)
+        host = os_capability_linux.LinuxHost()
+        self.assertEqual({'0': [0, 1, 2, 3, 8], '1': [4, 5, 6, 7]},
+                         host.get_cpu_numa_info())
+        self.assertEqual([32000, 16000], host.get_mem_numa_info())
+
+    def test_get_numa_info_no_numa(self):
+        os.rmdir(self.node_path)
+        host = os_capability_linux.LinuxHost()
+        self.assertEqual({}, host.get_cpu_numa_info())
+        self.assertEqual([], host.get_mem_numa_info())
+
+    def test_get_numa_info_cached_until_hotplug(self):
+        self._write(self.cpu_online_path, '0-3\n')
+        self._add_node(0, '0-3', NODE0_MEMINFO)
+        host = os_capability_linux.LinuxHost()
+        self.assertEqual({'0': [0, 1, 2, 3]}, host.get_cpu_numa_info())
+
+        self._add_node(0, '0-7', NODE0_MEMINFO)
+        self.assertEqual({'0': [0, 1, 2, 3]}, host.get_cpu_numa_info())
+
+        self._write(self.cpu_online_path, '0-7\n')
+        self.assertEqual({'0': list(range(8))}, host.get_cpu_numa_info())
+
+    def test_get_numa_info_failed_read_not_cached(self):
+        self._add_node(0, '0-3', NODE0_MEMINFO)
+        os.remove(os.path.join(self.node_path, 'node0', 'meminfo'))
+        host = os_capability_linux.LinuxHost()
+        self.assertEqual([0], host.get_mem_numa_info())
+
+        self._add_node(0, '0-3', NODE0_MEMINFO)
+        self.assertEqual([32000], host.get_mem_numa_info())
 
     def test_get_host_mem(self):
         data = ('MemTotal:        3882464 kB\nMemFree:         3514608 kB\n'
@@ -81,74 +127,63 @@ class TestOSCapability(base.BaseTestCase):
                               mock_ifname):
         mock_netname.return_value = 'net_enp2s0f3_ec_38_8f_79_11_2b'
         mock_ifname.return_value = 'enp2s0f3'
-        value1 = '''0000:02:10.7 "Ethernet controller...." ""'''
-        value2 = '02:10.7 0200: 8086:1520 (rev 01)'
-        value3 = '''Slot:   02:10.7
-        Class:  Ethernet controller
-        Vendor: Intel Corporation
-        Device: I350 Ethernet Controller Virtual Function
-        Rev:    01
-        NUMANode:   0'''
-        value4 = 'class physfn'
-        value5 = '''DRIVER=igbvf
-        PCI_CLASS=20000
-        PCI_ID=8086:1520
-        PCI_SUBSYS_ID=FFFF:0000
-        PCI_SLOT_NAME=0000:02:10.7
-        MODALIAS=pci:v00008086d00001520sv0000FFFFsd00000000bc02sc00i00'''
-        value6 = '''Features for enp2s0f3:
+        pf_path = self._add_pci_device('0000:02:00.0', '0x8086', '0x1521',
+                                       numa_node='0')
+        vf_path = self._add_pci_device('0000:02:10.7', '0x8086', '0x1520',
+                                       numa_node='0')
+        self._add_pci_device('0000:00:1f.2', '0x8086', '0x8c02')
+        os.symlink(vf_path, os.path.join(pf_path, 'virtfn0'))
+        os.symlink(pf_path, os.path.join(vf_path, 'physfn'))
+        features = """Features for enp2s0f3:
 rx-checksumming: on
 tx-checksumming: on
 scatter-gather: on
-tcp-segmentation-offload: on
-generic-receive-offload: on
 large-receive-offload: off [fixed]
-rx-vlan-offload: on
-tx-vlan-offload: on
-ntuple-filters: off [fixed]
-receive-hashing: on
-highdma: on [fixed]
-rx-vlan-filter: on [fixed]
-vlan-challenged: off [fixed]
-tx-lockless: off [fixed]
-netns-local: off [fixed]
-tx-gso-robust: off [fixed]
-tx-fcoe-segmentation: off [fixed]
-tx-gre-segmentation: off [fixed]
-tx-ipip-segmentation: off [fixed]
-tx-sit-segmentation: off [fixed]
-tx-udp_tnl-segmentation: off [fixed]
-tx-mpls-segmentation: off [fixed]
-rx-fcs: off [fixed]
-tx-vlan-stag-hw-insert: off [fixed]
-rx-vlan-stag-hw-parse: off [fixed]
-rx-vlan-stag-filter: off [fixed]'''
-        values = [(value1, 0),
-                  (value2, 0),
-                  (value3, 0),
-                  (value4, 0),
-                  (value5, 0),
-                  (value6, 0)]
-        mock_output.side_effect = values
-        expected = {"dev_id": "pci_0000_02_10_7",
-                    "address": "0000:02:10.7",
-                    "vendor_id": "8086",
-                    "product_id": "1520",
-                    "numa_node": 0,
-                    "label": "label_8086_1520",
-                    "dev_type": "VF",
-                    "parent_addr": "0000:02:10.7"}
+highdma: on [fixed]"""
+        mock_output.return_value = (features, 0)
+
         output = os_capability_linux.LinuxHost().get_pci_resources()
+        pci_infos = {info['address']: info
+                     for info in jsonutils.loads(output)}
+        self.assertEqual({'dev_id': 'pci_0000_02_10_7',
+                          'address': '0000:02:10.7',
+                          'vendor_id': '8086',
+                          'product_id': '1520',
+                          'numa_node': 0,
+                          'label': 'label_8086_1520',
+                          'dev_type': 'VF',
+                          'parent_addr': '0000:02:00.0',
+                          'capabilities': {'network': ['rx', 'tx', 'sg']}},
+                         pci_infos['0000:02:10.7'])
+        self.assertEqual('PF', pci_infos['0000:02:00.0']['dev_type'])
+        self.assertEqual('PCI', pci_infos['0000:00:1f.2']['dev_type'])
+        self.assertIsNone(pci_infos['0000:00:1f.2']['numa_node'])
+        mock_output.assert_called_once_with('ethtool', '-k', 'enp2s0f3')
+
+    @mock.patch.object(host_capability.Host, '_get_pci_dev_info')
+    def test_get_pci_resource_cached_until_hotplug(self, mock_dev_info):
+        mock_dev_info.side_effect = lambda address: {'address': address}
+        self._add_pci_device('0000:02:00.0', '0x8086', '0x1521')
+        host = os_capability_linux.LinuxHost()
+        host.get_pci_resources()
+        host.get_pci_resources()
+        self.assertEqual(1, mock_dev_info.call_count)
+
+        self._add_pci_device('0000:02:10.7', '0x8086', '0x1520')
+        output = host.get_pci_resources()
+        self.assertEqual(3, mock_dev_info.call_count)
+        self.assertEqual(2, len(jsonutils.loads(output)))
+
+    def test_get_pci_resource_failed_read_not_cached(self):
+        self._add_pci_device('0000:00:1f.2', '0x8086', '0x8c02')
+        path = self._add_pci_device('0000:00:1f.3', '0x8086', '0x8c22')
+        os.remove(os.path.join(path, 'vendor'))
+        host = os_capability_linux.LinuxHost()
+        output = host.get_pci_resources()
+        self.assertEqual(['0000:00:1f.2'],
+                         [info['address'] for info in jsonutils.loads(output)])
 
-        pci_infos = jsonutils.loads(output)
-        for pci_info in pci_infos:
-            self.assertEqual(expected['dev_id'], str(pci_info['dev_id']))
-            self.assertEqual(expected['address'], str(pci_info['address']))
-            self.assertEqual(expected['product_id'],
-                             str(pci_info['product_id']))
-            self.assertEqual(expected['vendor_id'], str(pci_info['vendor_id']))
-            self.assertEqual(expected['numa_node'], pci_info['numa_node'])
-            self.assertEqual(expected['label'], str(pci_info['label']))
-            self.assertEqual(expected['dev_type'], str(pci_info['dev_type']))
-            self.assertEqual(expected['parent_addr'],
-                             str(pci_info['parent_addr']))
+        self._add_pci_device('0000:00:1f.3', '0x8086', '0x8c22')
+        output = host.get_pci_resources()
+        self.assertEqual(['0000:00:1f.2', '0000:00:1f.3'],
+                         [info['address'] for info in jsonutils.loads(output)])
@@ -184,7 +184,7 @@ class EtcdDbComputeNodeTestCase(base.DbTestCase):
                                                 mock_read):
         mock_read.side_effect = etcd.EtcdKeyNotFound
         utils.create_test_compute_node(context=self.context, hostname='123')
-        mock_read.side_effect = lambda *args: None
+        mock_write.side_effect = etcd.EtcdAlreadyExist
         self.assertRaises(exception.ResourceExists,
                           utils.create_test_compute_node,
                           context=self.context, hostname='123')
@@ -19,15 +19,17 @@ from oslo_config import cfg
 from oslo_serialization import jsonutils as json
 from oslo_utils import uuidutils
 import six
+import sqlalchemy
 
 from zun.common import exception
 import zun.conf
 from zun.db import api as dbapi
 from zun.db.etcd import api as etcdapi
 from zun.db.etcd.api import EtcdAPI as etcd_api
+from zun.db.etcd import models as etcd_models
+from zun.db.sqlalchemy import api as sqla_api
 from zun.tests.unit.db import base
 from zun.tests.unit.db import utils
-from zun.tests.unit.db.utils import FakeEtcdMultipleResult
 from zun.tests.unit.db.utils import FakeEtcdResult
 
 CONF = zun.conf.CONF
@@ -41,6 +43,19 @@ class DbContainerTestCase(base.DbTestCase):
     def test_create_container(self):
         utils.create_test_container(context=self.context)
 
+    def test_container_indexes(self):
+        engine = sqla_api.get_engine()
+        indexes = {index['name']: index['column_names'] for index in
+                   sqlalchemy.inspect(engine).get_indexes('container')}
+        self.assertEqual(['host'], indexes['container_host_idx'])
+        self.assertEqual(['project_id', 'name'],
+                         indexes['container_project_id_name_idx'])
+        self.assertEqual(['name'], indexes['container_name_idx'])
+        self.assertEqual(
+            ['status', 'task_state', 'auto_remove'],
+            indexes['container_status_task_state_auto_remove_idx'])
+        self.assertEqual(['capsule_id'], indexes['container_capsule_id_idx'])
+
     def test_create_container_already_exists(self):
         CONF.set_override("unique_container_name_scope", "",
                           group="compute")
@@ -214,6 +229,71 @@ class DbContainerTestCase(base.DbTestCase):
                                      {'image': new_image})
         self.assertEqual(new_image, res.image)
 
+    def test_count_usages(self):
+        utils.create_test_container(
+            context=self.context, uuid=uuidutils.generate_uuid(),
+            name='container1', cpu=0.5, memory='512', disk=10)
+        utils.create_test_container(
+            context=self.context, uuid=uuidutils.generate_uuid(),
+            name='container2', cpu=1.0, memory='256', disk=20)
+        usages = dbapi.count_usages(self.context, 'fake_project')
+        self.assertEqual({'containers': 2, 'cpu': 1.5, 'memory': 768,
+                          'disk': 30}, usages)
+        self.assertEqual({'containers': 0, 'cpu': 0, 'memory': 0,
+                          'disk': 0},
+                         dbapi.count_usages(self.context, 'other_project'))
+
+    def test_count_usages_tracked(self):
+        CONF.set_override('track_usages', True, group='quota')
+        container = utils.create_test_container(
+            context=self.context, uuid=uuidutils.generate_uuid(),
+            name='container1', cpu=0.5, memory='512', disk=10)
+        # The usages are computed from the containers on the first read
+        self.assertEqual({'containers': 1, 'cpu': 0.5, 'memory': 512,
+                          'disk': 10},
+                         dbapi.count_usages(self.context, 'fake_project'))
+
+        utils.create_test_container(
+            context=self.context, uuid=uuidutils.generate_uuid(),
+            name='container2', cpu=1.0, memory='256', disk=20)
+        dbapi.update_container(self.context, container.id,
+                               {'memory': '1024', 'cpu': 2.0})
+        self.assertEqual({'containers': 2, 'cpu': 3.0, 'memory': 1280,
+                          'disk': 30},
+                         dbapi.count_usages(self.context, 'fake_project'))
+
+        dbapi.destroy_container(self.context, container.id)
+        usages = dbapi.quota_usage_get_all_by_project(self.context,
+                                                      'fake_project')
+        self.assertEqual(1, usages['containers']['in_use'])
+        self.assertEqual(256, usages['memory']['in_use'])
+
+    def test_count_usages_seeded_concurrently(self):
+        CONF.set_override('track_usages', True, group='quota')
+        utils.create_test_container(
+            context=self.context, uuid=uuidutils.generate_uuid(),
+            name='container1', cpu=0.5, memory='512', disk=10)
+        sum_usages = sqla_api.Connection._sum_container_usages
+
+        def seed_usages(connection, session, project_id):
+            usages = sum_usages(connection, session, project_id)
+            if mock_sum.call_count == 1:
+                # Another request adds the usages first
+                for resource, usage in usages.items():
+                    session.add(sqla_api.models.QuotaUsage(
+                        project_id=project_id, resource=resource,
+                        in_use=usage, reserved=0))
+                session.flush()
+            return usages
+
+        with mock.patch.object(sqla_api.Connection, '_sum_container_usages',
+                               autospec=True) as mock_sum:
+            mock_sum.side_effect = seed_usages
+            usages = dbapi.count_usages(self.context, 'fake_project')
+        self.assertEqual({'containers': 1, 'cpu': 0.5, 'memory': 512,
+                          'disk': 10}, usages)
+        self.assertEqual(2, mock_sum.call_count)
+
     def test_update_container_with_the_same_name(self):
         CONF.set_override("unique_container_name_scope", "project",
                           group="compute")
@@ -245,6 +325,33 @@ class DbContainerTestCase(base.DbTestCase):
                           dbapi.update_container, self.context,
                           container.id, {'uuid': ''})
 
+    def test_update_containers(self):
+        container1 = utils.create_test_container(
+            name='container-one', uuid=uuidutils.generate_uuid(),
+            status='Running', host='host1', context=self.context)
+        container2 = utils.create_test_container(
+            name='container-two', uuid=uuidutils.generate_uuid(),
+            status='Running', host='host1', context=self.context)
+        container3 = utils.create_test_container(
+            name='container-three', uuid=uuidutils.generate_uuid(),
+            status='Running', host='host1', context=self.context)
+        dbapi.update_containers(self.context, {
+            container1.uuid: {'status': 'Stopped'},
+            container2.uuid: {'status': 'Error', 'host': 'host2'}})
+
+        res = dbapi.get_container_by_uuid(self.context, container1.uuid)
+        self.assertEqual(('Stopped', 'host1'), (res.status, res.host))
+        res = dbapi.get_container_by_uuid(self.context, container2.uuid)
+        self.assertEqual(('Error', 'host2'), (res.status, res.host))
+        res = dbapi.get_container_by_uuid(self.context, container3.uuid)
+        self.assertEqual(('Running', 'host1'), (res.status, res.host))
+
+    def test_update_containers_uuid(self):
+        container = utils.create_test_container(context=self.context)
+        self.assertRaises(exception.InvalidParameterValue,
+                          dbapi.update_containers, self.context,
+                          {container.uuid: {'uuid': ''}})
+
 
 class EtcdDbContainerTestCase(base.DbTestCase):
 
@@ -265,7 +372,12 @@ class EtcdDbContainerTestCase(base.DbTestCase):
                           group="compute")
         mock_read.side_effect = etcd.EtcdKeyNotFound
         utils.create_test_container(context=self.context)
-        mock_read.side_effect = lambda *args: None
+
+        def fake_write(path, value, prevExist=None):
+            if prevExist is False:
+                raise etcd.EtcdAlreadyExist
+
+        mock_write.side_effect = fake_write
         self.assertRaises(exception.ResourceExists,
                           utils.create_test_container,
                           context=self.context)
@@ -291,8 +403,8 @@ class EtcdDbContainerTestCase(base.DbTestCase):
         mock_inst.return_value = etcdapi.get_backend()
         mock_read.side_effect = etcd.EtcdKeyNotFound
         container = utils.create_test_container(context=self.context)
-        mock_read.side_effect = lambda *args: FakeEtcdMultipleResult(
-            [container.as_dict()])
+        mock_read.side_effect = utils.FakeEtcdContainers(
+            [container.as_dict()]).read
         res = dbapi.get_container_by_name(
             self.context, container.name)
         self.assertEqual(container.id, res.id)
@@ -323,8 +435,7 @@ class EtcdDbContainerTestCase(base.DbTestCase):
                 name='cont' + str(i))
             containers.append(container.as_dict())
             uuids.append(six.text_type(container['uuid']))
-        mock_read.side_effect = lambda *args: FakeEtcdMultipleResult(
-            containers)
+        mock_read.side_effect = utils.FakeEtcdContainers(containers).read
         res = dbapi.list_containers(self.context)
         res_uuids = [r.uuid for r in res]
         self.assertEqual(sorted(uuids), sorted(res_uuids))
@@ -344,8 +455,7 @@ class EtcdDbContainerTestCase(base.DbTestCase):
                 name='cont' + str(i))
             containers.append(container.as_dict())
             uuids.append(six.text_type(container.uuid))
-        mock_read.side_effect = lambda *args: FakeEtcdMultipleResult(
-            containers)
+        mock_read.side_effect = utils.FakeEtcdContainers(containers).read
         res = dbapi.list_containers(self.context, sort_key='uuid')
         res_uuids = [r.uuid for r in res]
         self.assertEqual(sorted(uuids), res_uuids)
@@ -372,8 +482,8 @@ class EtcdDbContainerTestCase(base.DbTestCase):
             uuid=uuidutils.generate_uuid(),
             context=self.context)
 
-        mock_read.side_effect = lambda *args: FakeEtcdMultipleResult(
-            [container1.as_dict(), container2.as_dict()])
+        mock_read.side_effect = utils.FakeEtcdContainers(
+            [container1.as_dict(), container2.as_dict()]).read
 
         res = dbapi.list_containers(
             self.context, filters={'name': 'container-one'})
@@ -392,6 +502,33 @@ class EtcdDbContainerTestCase(base.DbTestCase):
             filters={'name': container1.name})
         self.assertEqual([container1.id], [r.id for r in res])
 
+    @mock.patch.object(etcd_client, 'read')
+    @mock.patch.object(etcd_client, 'write')
+    @mock.patch.object(dbapi, "_get_dbdriver_instance")
+    def test_count_usages(self, mock_db_inst, mock_write, mock_read):
+        mock_db_inst.return_value = etcdapi.get_backend()
+        mock_read.side_effect = etcd.EtcdKeyNotFound
+        container1 = utils.create_test_container(
+            context=self.context, uuid=uuidutils.generate_uuid(),
+            name='container1', cpu=0.5, memory='512', disk=10)
+        container2 = utils.create_test_container(
+            context=self.context, uuid=uuidutils.generate_uuid(),
+            name='container2', cpu=1.0, memory='256', disk=20)
+        container3 = utils.create_test_container(
+            context=self.context, uuid=uuidutils.generate_uuid(),
+            name='container3', project_id='other_project', cpu=1.0,
+            memory='1024', disk=5)
+        mock_read.side_effect = utils.FakeEtcdContainers(
+            [container1.as_dict(), container2.as_dict(),
+             container3.as_dict()]).read
+
+        usages = dbapi.count_usages(self.context, 'fake_project')
+        self.assertEqual({'containers': 2, 'cpu': 1.5, 'memory': 768,
+                          'disk': 30}, usages)
+        self.assertEqual({'containers': 0, 'cpu': 0, 'memory': 0,
+                          'disk': 0},
+                         dbapi.count_usages(self.context, 'no_project'))
+
     @mock.patch.object(etcd_client, 'read')
     @mock.patch.object(etcd_client, 'write')
     @mock.patch.object(etcd_client, 'delete')
@@ -404,7 +541,9 @@ class EtcdDbContainerTestCase(base.DbTestCase):
         mock_read.side_effect = lambda *args: FakeEtcdResult(
             container.as_dict())
         dbapi.destroy_container(self.context, container.uuid)
-        mock_delete.assert_called_once_with('/containers/%s' % container.uuid)
+        mock_delete.assert_any_call('/containers/%s' % container.uuid)
+        mock_delete.assert_any_call('/container_indexes/name/%s/%s' % (
+            container.name, container.uuid))
 
     @mock.patch.object(etcd_client, 'read')
     @mock.patch.object(etcd_client, 'write')
@@ -418,7 +557,138 @@ class EtcdDbContainerTestCase(base.DbTestCase):
         mock_read.side_effect = lambda *args: FakeEtcdResult(
             container.as_dict())
         dbapi.destroy_container(self.context, container.uuid)
-        mock_delete.assert_called_once_with('/containers/%s' % container.uuid)
+        mock_delete.assert_any_call('/containers/%s' % container.uuid)
+
+    @mock.patch.object(etcd_client, 'read')
+    @mock.patch.object(etcd_client, 'write')
+    def test_create_container_writes_indexes(self, mock_write, mock_read):
+        mock_read.side_effect = etcd.EtcdKeyNotFound
+        container = utils.create_test_container(context=self.context,
+                                                name='my container')
+        written = [c[0][0] for c in mock_write.call_args_list]
+        self.assertEqual(
+            ['/container_indexes/name/my%%20container/%s' % container.uuid,
+             '/container_indexes/host/%s/%s' % (container.host,
+                                                container.uuid),
+             '/container_indexes/project_id/%s/%s' % (container.project_id,
+                                                      container.uuid),
+             '/container_indexes/status/%s/%s' % (container.status,
+                                                  container.uuid),
+             '/containers/%s' % container.uuid],
+            written)
+
+    @mock.patch.object(etcd_client, 'read')
+    @mock.patch.object(etcd_client, 'write')
+    @mock.patch.object(dbapi, "_get_dbdriver_instance")
+    def test_list_containers_by_index(self, mock_inst, mock_write,
+                                      mock_read):
+        mock_inst.return_value = etcdapi.get_backend()
+        mock_read.side_effect = etcd.EtcdKeyNotFound
+        container1 = utils.create_test_container(
+            uuid=uuidutils.generate_uuid(), context=self.context,
+            name='cont1', host='host1')
+        container2 = utils.create_test_container(
+            uuid=uuidutils.generate_uuid(), context=self.context,
+            name='cont2', host='host2')
+        mock_read.side_effect = utils.FakeEtcdContainers(
+            [container1.as_dict(), container2.as_dict()]).read
+        res = dbapi.list_containers(self.context, filters={'host': 'host2'})
+        self.assertEqual([container2.uuid], [r.uuid for r in res])
+        read_paths = [c[0][0] for c in mock_read.call_args_list]
+        self.assertNotIn('/containers', read_paths)
+        self.assertIn('/container_indexes/host/host2', read_paths)
+
+    @mock.patch.object(etcd_client, 'read')
+    @mock.patch.object(etcd_client, 'write')
+    @mock.patch.object(dbapi, "_get_dbdriver_instance")
+    def test_list_containers_builds_missing_indexes(self, mock_inst,
+                                                    mock_write, mock_read):
+        backend = etcdapi.get_backend()
+        backend._container_indexes_checked = False
+        mock_inst.return_value = backend
+        container = utils.get_test_container(name='cont1')
+        fake_containers = utils.FakeEtcdContainers([container])
+
+        def fake_read(path, *args, **kwargs):
+            if path == '/container_indexes_built':
+                raise etcd.EtcdKeyNotFound
+            return fake_containers.read(path)
+
+        mock_read.side_effect = fake_read
+        dbapi.list_containers(self.context)
+        mock_write.assert_any_call(
+            '/container_indexes/name/cont1/%s' % container['uuid'], '')
+        self.assertEqual(mock.call('/container_indexes_built', ''),
+                         mock_write.call_args)
+        self.assertTrue(backend._container_indexes_checked)
+
+    @mock.patch.object(etcd_client, 'read')
+    @mock.patch.object(etcd_client, 'write')
+    @mock.patch.object(dbapi, "_get_dbdriver_instance")
+    def test_list_containers_created_before_indexes(self, mock_inst,
+                                                    mock_write, mock_read):
+        backend = etcdapi.get_backend()
+        backend._container_indexes_checked = False
+        mock_inst.return_value = backend
+        # A container created before the upgrade has no index keys
+        old_container = utils.get_test_container(
+            uuid=uuidutils.generate_uuid(), name='old', host='host1')
+        containers = [old_container]
+        index_keys = set()
+
+        def fake_read(path, *args, **kwargs):
+            if path == '/containers':
+                return utils.FakeEtcdMultipleResult(containers)
+            for c in containers:
+                if path == '/containers/' + c['uuid']:
+                    return utils.FakeEtcdResult(c)
+            uuids = [key.rsplit('/', 1)[-1] for key in index_keys
+                     if key.rsplit('/', 1)[0] == path]
+            if uuids or any(key.startswith(path + '/') for key in index_keys):
+                return utils.FakeEtcdIndexResult(path, uuids)
+            raise etcd.EtcdKeyNotFound
+
+        def fake_write(key, value, *args, **kwargs):
+            if key.startswith('/containers/'):
+                containers.append(json.loads(value))
+            else:
+                index_keys.add(key)
+
+        mock_read.side_effect = fake_read
+        mock_write.side_effect = fake_write
+        # The first container created after the upgrade creates the index
+        # root, the existing containers must be indexed all the same.
+        new_container = utils.create_test_container(
+            uuid=uuidutils.generate_uuid(), context=self.context,
+            name='new', host='host1')
+        res = dbapi.list_containers(self.context, filters={'host': 'host1'})
+        self.assertEqual(sorted([old_container['uuid'], new_container.uuid]),
+                         sorted(r.uuid for r in res))
+
+    @mock.patch.object(etcd_client, 'read')
+    @mock.patch.object(etcd_client, 'write')
+    @mock.patch.object(dbapi, "_get_dbdriver_instance")
+    def test_list_containers_with_marker(self, mock_inst, mock_write,
+                                         mock_read):
+        containers = []
+        mock_inst.return_value = etcdapi.get_backend()
+        mock_read.side_effect = etcd.EtcdKeyNotFound
+        for i in range(5):
+            container = utils.create_test_container(
+                uuid=uuidutils.generate_uuid(),
+                context=self.context,
+                name='cont' + str(i))
+            containers.append(container.as_dict())
+        mock_read.side_effect = utils.FakeEtcdContainers(containers).read
+        uuids = sorted(c['uuid'] for c in containers)
+        page1 = dbapi.list_containers(self.context, limit=2)
+        self.assertEqual(uuids[:2], [r.uuid for r in page1])
+        page2 = dbapi.list_containers(self.context, limit=2,
+                                      marker=page1[-1])
+        self.assertEqual(uuids[2:4], [r.uuid for r in page2])
+        res = dbapi.list_containers(self.context, marker=page2[-1],
+                                    sort_dir='desc')
+        self.assertEqual(list(reversed(uuids[:3])), [r.uuid for r in res])
 
     @mock.patch.object(etcd_client, 'read')
     def test_destroy_container_that_does_not_exist(self, mock_read):
@@ -445,12 +715,70 @@ class EtcdDbContainerTestCase(base.DbTestCase):
         self.assertEqual(new_image, json.loads(
             mock_update.call_args_list[0][0][0].value)['image'])
 
+    @mock.patch.object(etcd_client, 'read')
+    @mock.patch.object(etcd_client, 'write')
+    @mock.patch.object(etcd_client, 'update')
+    @mock.patch.object(etcd_client, 'delete')
+    @mock.patch.object(dbapi, "_get_dbdriver_instance")
+    def test_update_container_updates_indexes(self, mock_inst, mock_delete,
+                                              mock_update, mock_write,
+                                              mock_read):
+        mock_inst.return_value = etcdapi.get_backend()
+        mock_read.side_effect = etcd.EtcdKeyNotFound
+        container = utils.create_test_container(context=self.context,
+                                                status='Creating')
+        mock_write.reset_mock()
+        mock_read.side_effect = lambda *args: FakeEtcdResult(
+            container.as_dict())
+        dbapi.update_container(self.context, container.uuid,
+                               {'status': 'Running'})
+        mock_write.assert_called_once_with(
+            '/container_indexes/status/Running/%s' % container.uuid, '')
+        mock_delete.assert_called_once_with(
+            '/container_indexes/status/Creating/%s' % container.uuid)
+
+    @mock.patch.object(etcd_client, 'read')
+    @mock.patch.object(etcd_client, 'write')
+    @mock.patch.object(etcd_client, 'update')
+    @mock.patch.object(dbapi, "_get_dbdriver_instance")
+    def test_update_container_retries_on_compare_failed(
+            self, mock_inst, mock_update, mock_write, mock_read):
+        mock_inst.return_value = etcdapi.get_backend()
+        mock_read.side_effect = etcd.EtcdKeyNotFound
+        container = utils.create_test_container(context=self.context)
+        mock_read.side_effect = lambda *args: FakeEtcdResult(
+            container.as_dict())
+        mock_update.side_effect = [etcd.EtcdCompareFailed, None]
+        dbapi.update_container(self.context, container.uuid,
+                               {'image': 'new-image'})
+        self.assertEqual(2, mock_update.call_count)
+
+    @mock.patch.object(etcd_client, 'read')
+    @mock.patch.object(etcd_client, 'write')
+    @mock.patch.object(etcd_client, 'update')
+    @mock.patch.object(dbapi, "_get_dbdriver_instance")
+    def test_update_container_concurrent_update(
+            self, mock_inst, mock_update, mock_write, mock_read):
+        CONF.set_override('cas_max_retries', 2, group='etcd')
+        mock_inst.return_value = etcdapi.get_backend()
+        mock_read.side_effect = etcd.EtcdKeyNotFound
+        container = utils.create_test_container(context=self.context)
+        mock_read.side_effect = lambda *args: FakeEtcdResult(
+            container.as_dict())
+        mock_update.side_effect = etcd.EtcdCompareFailed
+        self.assertRaises(exception.ConcurrentUpdate,
+                          dbapi.update_container, self.context,
+                          container.uuid, {'image': 'new-image'})
+        self.assertEqual(3, mock_update.call_count)
+
+    @mock.patch.object(etcd_client, 'delete')
     @mock.patch.object(etcd_client, 'read')
     @mock.patch.object(etcd_client, 'write')
     @mock.patch.object(etcd_client, 'update')
     @mock.patch.object(dbapi, "_get_dbdriver_instance")
     def test_update_container_with_the_same_name(self, mock_inst, mock_update,
-                                                 mock_write, mock_read):
+                                                 mock_write, mock_read,
+                                                 mock_delete):
         CONF.set_override("unique_container_name_scope", "project",
                           group="compute")
         mock_inst.return_value = etcdapi.get_backend()
@@ -464,12 +792,67 @@ class EtcdDbContainerTestCase(base.DbTestCase):
             uuid=uuidutils.generate_uuid(),
             context=self.context)
 
-        mock_read.side_effect = lambda *args: FakeEtcdMultipleResult(
-            [container1.as_dict(), container2.as_dict()])
+        mock_read.side_effect = utils.FakeEtcdContainers(
+            [container1.as_dict(), container2.as_dict()]).read
         self.assertRaises(exception.ContainerAlreadyExists,
                           dbapi.update_container, self.context,
                           container2.uuid, {'name': 'container-one'})
 
+    @mock.patch.object(etcd_client, 'read')
+    @mock.patch.object(etcd_client, 'write')
+    @mock.patch.object(etcd_api, 'list_containers')
+    def test_create_container_name_reserved_concurrently(
+            self, mock_list_containers, mock_write, mock_read):
+        CONF.set_override("unique_container_name_scope", "project",
+                          group="compute")
+        # Another container took the name but is not listed yet
+        mock_list_containers.return_value = []
+        name_key = etcd_models.Container.name_key('cont1', 'fake_project')
+        owner = uuidutils.generate_uuid()
+
+        def write(key, value, **kwargs):
+            if key == name_key:
+                raise etcd.EtcdAlreadyExist
+
+        def read(key, **kwargs):
+            if key == name_key:
+                return mock.Mock(value=owner)
+            if key == '/containers/' + owner:
+                return mock.Mock()
+            raise etcd.EtcdKeyNotFound
+
+        mock_write.side_effect = write
+        mock_read.side_effect = read
+        self.assertRaises(exception.ContainerAlreadyExists,
+                          utils.create_test_container,
+                          context=self.context, name='cont1')
+        self.assertNotIn('/containers/',
+                         [c[0][0][:12] for c in mock_write.call_args_list])
+
+    @mock.patch.object(etcd_client, 'delete')
+    @mock.patch.object(etcd_client, 'read')
+    @mock.patch.object(etcd_client, 'write')
+    @mock.patch.object(etcd_client, 'update')
+    @mock.patch.object(dbapi, "_get_dbdriver_instance")
+    def test_update_container_retry_deletes_index_keys(
+            self, mock_inst, mock_update, mock_write, mock_read,
+            mock_delete):
+        mock_inst.return_value = etcdapi.get_backend()
+        mock_read.side_effect = etcd.EtcdKeyNotFound
+        container = utils.create_test_container(context=self.context)
+        mock_read.side_effect = lambda *args: FakeEtcdResult(
+            container.as_dict())
+        mock_update.side_effect = [etcd.EtcdCompareFailed, None]
+        dbapi.update_container(self.context, container.uuid,
+                               {'host': 'new-host'})
+        new_key = etcd_models.Container.index_path(
+            'host', 'new-host') + '/' + container.uuid
+        old_key = etcd_models.Container.index_path(
+            'host', container.host) + '/' + container.uuid
+        # The key of the failed attempt, then the stale key once updated
+        self.assertEqual([mock.call(new_key), mock.call(old_key)],
+                         mock_delete.call_args_list)
+
     @mock.patch.object(etcd_client, 'read')
     def test_update_container_not_found(self, mock_read):
         container_uuid = uuidutils.generate_uuid()
@@ -488,12 +871,14 @@ class EtcdDbContainerTestCase(base.DbTestCase):
                           dbapi.update_container, self.context,
                           container.id, {'uuid': ''})
 
+    @mock.patch.object(etcd_client, 'delete')
     @mock.patch.object(etcd_client, 'read')
     @mock.patch.object(etcd_client, 'write')
     @mock.patch.object(etcd_api, 'list_containers')
     @mock.patch.object(dbapi, "_get_dbdriver_instance")
     def test_create_container_already_exists_in_project_name_space(
-            self, mock_db_inst, mock_list_containers, mock_write, mock_read):
+            self, mock_db_inst, mock_list_containers, mock_write, mock_read,
+            mock_delete):
         mock_db_inst.return_value = etcdapi.get_backend()
         mock_read.side_effect = etcd.EtcdKeyNotFound
         mock_list_containers.return_value = []
@@ -508,11 +893,12 @@ class EtcdDbContainerTestCase(base.DbTestCase):
                                         context=self.context,
                                         name='cont1')
 
+    @mock.patch.object(etcd_client, 'delete')
     @mock.patch.object(etcd_client, 'read')
     @mock.patch.object(etcd_client, 'write')
     @mock.patch.object(etcd_api, 'list_containers')
     def test_create_container_already_exists_in_global_name_space(
-            self, mock_list_containers, mock_write, mock_read):
+            self, mock_list_containers, mock_write, mock_read, mock_delete):
         mock_read.side_effect = etcd.EtcdKeyNotFound
         mock_list_containers.return_value = []
         CONF.set_override("unique_container_name_scope", "global",
@@ -10,6 +10,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 """Zun test utilities."""
+import etcd
 import mock
 
 from oslo_config import cfg
@@ -18,6 +19,7 @@ from oslo_serialization import jsonutils as json
 from zun.common import name_generator
 from zun.db import api as db_api
 from zun.db.etcd import api as etcd_api
+from zun.db.etcd import models as etcd_models
 
 CONF = cfg.CONF
 
@@ -368,6 +370,7 @@ def get_test_compute_node(**kwargs):
         'disk_used': kwargs.get('disk_used', 20),
         'disk_quota_supported': kwargs.get('disk_quota_supported', False),
         'runtimes': kwargs.get('runtimes', ['runc']),
+        'images': kwargs.get('images', ['cirros:latest']),
     }
 
 
@@ -391,6 +394,39 @@ class FakeEtcdResult(object):
         self.value = json.dump_as_bytes(value)
 
 
+class FakeEtcdIndexResult(object):
+    def __init__(self, path, uuids):
+        self.children = []
+        for uuid in uuids:
+            res = mock.MagicMock(dir=False)
+            res.key = path + '/' + uuid
+            self.children.append(res)
+
+
+class FakeEtcdContainers(object):
+    """Answer the etcd reads of containers and of their indexes."""
+
+    def __init__(self, containers):
+        self.containers = containers
+
+    def read(self, path, *args, **kwargs):
+        if path == '/containers':
+            return FakeEtcdMultipleResult(self.containers)
+        if path.startswith('/containers/'):
+            for c in self.containers:
+                if path == '/containers/' + c['uuid']:
+                    return FakeEtcdResult(c)
+        if path == etcd_models.Container.index_marker():
+            return FakeEtcdResult('')
+        if path.startswith('/container_indexes/'):
+            uuids = [c['uuid'] for c in self.containers
+                     if path + '/' + c['uuid'] in
+                     etcd_models.Container.index_keys(c, c['uuid'])]
+            if uuids:
+                return FakeEtcdIndexResult(path, uuids)
+        raise etcd.EtcdKeyNotFound
+
+
 def get_test_capsule(**kwargs):
     return {
         'capsule_version': kwargs.get('capsule_version', 'beta'),
@@ -17,6 +17,7 @@ import mock
 from docker import errors
 
 from zun.common import exception
+from zun.container.docker import image_index
 from zun.container.docker import utils
 from zun.image.docker import driver
 from zun.tests import base
@@ -195,6 +196,38 @@ class TestDriver(base.BaseTestCase):
             self.mock_docker.search.assert_called_once_with('image')
             self.assertEqual(1, mock_search.call_count)
 
+    def _watch_index(self):
+        index = image_index.get_image_index()
+        self.mock_docker.images.return_value = [
+            {'Id': 'sha256:1', 'RepoTags': ['nginx:latest'], 'Size': 10}]
+        index.load(self.mock_docker)
+        index.watching = True
+        self.mock_docker.reset_mock()
+
+    def test_search_image_on_host_indexed(self):
+        self._watch_index()
+        self.assertEqual({'image': 'nginx', 'path': None},
+                         self.driver._search_image_on_host('nginx', 'latest'))
+        self.assertIsNone(self.driver._search_image_on_host('nginx', '1.15'))
+        self.assertFalse(self.mock_docker.inspect_image.called)
+
+    def test_search_image_on_host_by_digest(self):
+        self._watch_index()
+        self.mock_docker.inspect_image.return_value = {'Id': 'sha256:2'}
+        digest = 'sha256:' + 'a' * 64
+        self.assertEqual(
+            {'image': 'busybox@sha256', 'path': None},
+            self.driver._search_image_on_host('busybox@sha256', 'a' * 64))
+        self.mock_docker.inspect_image.assert_called_once_with(
+            'busybox@' + digest)
+
+    def test_search_image_exact_match_indexed(self):
+        self._watch_index()
+        ret = self.driver.search_image(None, 'nginx', 'latest', True)
+        self.assertEqual([{'name': 'nginx', 'tags': ['latest'],
+                           'metadata': {}}], ret)
+        self.assertFalse(self.mock_docker.search.called)
+
     def test_search_image_apierror(self):
         with mock.patch.object(errors.APIError, '__str__',
                                return_value='hit error') as mock_init:
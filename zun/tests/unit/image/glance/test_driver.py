@@ -56,7 +56,7 @@ class TestDriver(base.BaseTestCase):
         mock_search.return_value = {'image': 'nginx', 'path': 'xyz',
                                     'checksum': checksum}
         mock_open_file = mock.mock_open()
-        with mock.patch('zun.image.glance.driver.open', mock_open_file):
+        with mock.patch('zun.image.glance.utils.open', mock_open_file):
             self.assertEqual(({'image': 'nginx', 'path': 'xyz',
                                'checksum': checksum}, True),
                              self.driver.pull_image(None, 'nonexisting',
@@ -89,19 +89,85 @@ class TestDriver(base.BaseTestCase):
                                             'checksum': 'xxx'}
         image_meta = mock.MagicMock()
         image_meta.id = '1234'
+        image_meta.checksum = '9a0364b9e99bb480dd25e1f0284c8555'
         mock_find_image.return_value = image_meta
-        mock_download_image.return_value = 'content'
+        mock_download_image.return_value = [b'content']
         CONF.set_override('images_directory', self.test_dir, group='glance')
         out_path = os.path.join(self.test_dir, '1234' + '.tar')
-        mock_open_file = mock.mock_open()
-        with mock.patch('zun.image.glance.driver.open', mock_open_file):
-            ret = self.driver.pull_image(None, 'image', 'latest', 'always')
-        mock_open_file.assert_any_call(out_path, 'wb')
+        image, image_loaded = self.driver.pull_image(None, 'image', 'latest',
+                                                     'always')
         self.assertTrue(mock_search_on_host.called)
         self.assertTrue(mock_should_pull_image.called)
         self.assertTrue(mock_find_image.called)
         self.assertTrue(mock_download_image.called)
-        self.assertEqual(({'image': 'image', 'path': out_path}, False), ret)
+        self.assertFalse(image_loaded)
+        image_stream = image.pop('stream')
+        self.assertEqual({'image': 'image', 'path': out_path,
+                          'checksum': image_meta.checksum}, image)
+        # The image is only written to its path while it is streamed
+        self.assertFalse(os.path.exists(out_path))
+        self.assertEqual([b'content'], list(image_stream))
+        with open(out_path, 'rb') as f:
+            self.assertEqual(b'content', f.read())
+
+    @mock.patch.object(driver.GlanceDriver,
+                       '_search_image_on_host')
+    @mock.patch('zun.image.glance.utils.download_image_in_chunks')
+    @mock.patch('zun.image.glance.utils.find_image')
+    def test_pull_image_not_cached(self, mock_find_image,
+                                   mock_download_image, mock_search_on_host):
+        CONF.set_override('cache_images', False, group='glance')
+        mock_search_on_host.return_value = None
+        image_meta = mock.MagicMock()
+        image_meta.id = '1234'
+        image_meta.checksum = None
+        mock_find_image.return_value = image_meta
+        mock_download_image.return_value = [b'content']
+        image, image_loaded = self.driver.pull_image(None, 'image', 'latest',
+                                                     'always')
+        self.assertIsNone(image['path'])
+        self.assertEqual([b'content'], list(image['stream']))
+        self.assertEqual([], os.listdir(self.test_dir))
+
+    def _write_image_file(self, name, data):
+        path = os.path.join(self.test_dir, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    @mock.patch('zun.image.glance.utils.get_file_md5sum')
+    def test_verify_md5sum_for_image_cached(self, mock_md5sum):
+        path = self._write_image_file('1234.tar', b'content')
+        checksum = '9a0364b9e99bb480dd25e1f0284c8555'
+        mock_md5sum.return_value = checksum
+        image = {'image': 'image', 'path': path, 'checksum': checksum}
+        self.assertTrue(self.driver._verify_md5sum_for_image(image))
+        self.assertTrue(self.driver._verify_md5sum_for_image(image))
+        mock_md5sum.assert_called_once_with(path)
+
+        # The file changed since its verification
+        self._write_image_file('1234.tar', b'changed')
+        mock_md5sum.return_value = 'd41d8cd98f00b204e9800998ecf8427e'
+        self.assertFalse(self.driver._verify_md5sum_for_image(image))
+        self.assertEqual(2, mock_md5sum.call_count)
+
+    def test_verify_cached_images(self):
+        CONF.set_override('images_directory', self.test_dir, group='glance')
+        valid_path = self._write_image_file('1234.tar', b'content')
+        corrupt_path = self._write_image_file('5678.tar', b'content')
+        unverified_path = self._write_image_file('9012.tar', b'content')
+        checksum = '9a0364b9e99bb480dd25e1f0284c8555'
+        self.assertTrue(self.driver._verify_md5sum_for_image(
+            {'path': valid_path, 'checksum': checksum}))
+        self.assertTrue(self.driver._verify_md5sum_for_image(
+            {'path': corrupt_path, 'checksum': checksum}))
+        with open(corrupt_path, 'r+b') as f:
+            f.write(b'C')
+
+        self.driver.verify_cached_images()
+        self.assertEqual(['1234.tar', '1234.tar.verified', '9012.tar'],
+                         sorted(os.listdir(self.test_dir)))
+        self.assertTrue(os.path.exists(unverified_path))
 
     @mock.patch('zun.common.utils.should_pull_image')
     def test_pull_image_not_found(self, mock_should_pull_image):
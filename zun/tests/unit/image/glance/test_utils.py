@@ -0,0 +1,199 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import hashlib
+import io
+import os
+import tarfile
+
+import fixtures
+import mock
+from oslo_serialization import jsonutils
+
+from zun.common import exception
+from zun.image.glance import utils
+from zun.tests import base
+
+
+def _make_image_archive(manifest):
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode='w') as tar:
+        for name, content in [
+                ('a' * 64 + '/layer.tar', b'x' * 5000),
+                ('a' * 64 + '.json', b'{}'),
+                ('manifest.json', jsonutils.dump_as_bytes(manifest)),
+                ('repositories', b'{}')]:
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    return data.getvalue()
+
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestImageDataStream(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestImageDataStream, self).setUp()
+        self.manifest = [{'Config': 'a' * 64 + '.json',
+                          'RepoTags': ['cirros:latest'],
+                          'Layers': ['a' * 64 + '/layer.tar']}]
+        self.data = _make_image_archive(self.manifest)
+        self.checksum = hashlib.md5(self.data).hexdigest()
+        self.test_dir = self.useFixture(fixtures.TempDir()).path
+        self.cache_path = os.path.join(self.test_dir, 'image.tar')
+
+    def test_stream(self):
+        for chunk_size in (1, 100, 512, 4096, len(self.data)):
+            stream = utils.ImageDataStream(_chunks(self.data, chunk_size),
+                                           checksum=self.checksum)
+            self.assertEqual(self.data, b''.join(stream))
+            self.assertEqual(self.manifest, stream.manifest)
+
+    def test_stream_cached(self):
+        stream = utils.ImageDataStream(_chunks(self.data, 1000),
+                                       checksum=self.checksum,
+                                       cache_path=self.cache_path)
+        self.assertEqual(self.data, b''.join(stream))
+        with open(self.cache_path, 'rb') as f:
+            self.assertEqual(self.data, f.read())
+        self.assertEqual(['image.tar', 'image.tar.verified'],
+                         sorted(os.listdir(self.test_dir)))
+        self.assertTrue(utils.is_image_file_verified(self.cache_path,
+                                                     self.checksum))
+
+    def test_stream_checksum_mismatch(self):
+        stream = utils.ImageDataStream(_chunks(self.data, 1000),
+                                       checksum='0' * 32,
+                                       cache_path=self.cache_path)
+        self.assertRaises(exception.ImageChecksumMismatch, b''.join, stream)
+        self.assertEqual([], os.listdir(self.test_dir))
+        self.assertEqual(self.manifest, stream.manifest)
+
+    def test_stream_interrupted(self):
+        stream = utils.ImageDataStream(_chunks(self.data, 1000),
+                                       cache_path=self.cache_path)
+        chunks = iter(stream)
+        next(chunks)
+        chunks.close()
+        self.assertEqual([], os.listdir(self.test_dir))
+
+    def test_read_size(self):
+        for size in (0, 5000, 8 * 1024 ** 3, 10 * 1024 ** 3):
+            field = tarfile.itn(size, 12, tarfile.GNU_FORMAT)
+            self.assertEqual(size, utils.ImageDataStream._read_size(field))
+
+
+class TestImageFileVerification(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestImageFileVerification, self).setUp()
+        self.test_dir = self.useFixture(fixtures.TempDir()).path
+        self.path = os.path.join(self.test_dir, 'image.tar')
+        with open(self.path, 'wb') as f:
+            f.write(b'content')
+        self.checksum = utils.get_file_md5sum(self.path)
+
+    def test_is_image_file_verified(self):
+        self.assertFalse(utils.is_image_file_verified(self.path,
+                                                      self.checksum))
+        utils.save_image_file_verification(self.path, self.checksum)
+        self.assertTrue(utils.is_image_file_verified(self.path,
+                                                     self.checksum))
+        self.assertFalse(utils.is_image_file_verified(self.path, '0' * 32))
+
+    def test_is_image_file_verified_file_changed(self):
+        utils.save_image_file_verification(self.path, self.checksum)
+        with open(self.path, 'ab') as f:
+            f.write(b'more content')
+        self.assertFalse(utils.is_image_file_verified(self.path,
+                                                      self.checksum))
+
+    def test_is_image_file_verified_file_deleted(self):
+        utils.save_image_file_verification(self.path, self.checksum)
+        os.unlink(self.path)
+        self.assertFalse(utils.is_image_file_verified(self.path,
+                                                      self.checksum))
+
+
+class TestFindImages(base.TestCase):
+
+    def setUp(self):
+        super(TestFindImages, self).setUp()
+        self.config(image_lookup_cache_time=60, group='glance')
+        p = mock.patch('zun.common.clients.OpenStackClients')
+        self.mock_clients = p.start()
+        self.addCleanup(p.stop)
+        self.glance = self.mock_clients.return_value.glance.return_value
+
+    def _image(self, name, tags=()):
+        return mock.MagicMock(name=name, tags=list(tags),
+                              container_format='docker')
+
+    def test_find_images_filters_in_glance(self):
+        image = self._image('cirros', ['latest'])
+        self.glance.images.list.return_value = [image]
+        images = utils.find_images(self.context, 'cirros', 'latest', True)
+        self.assertEqual([image], images)
+        self.glance.images.list.assert_called_once_with(
+            filters={'container_format': 'docker', 'name': 'cirros',
+                     'tag': ['latest']})
+
+    def test_find_images_untagged(self):
+        image = self._image('cirros')
+        self.glance.images.list.side_effect = [[], [image]]
+        images = utils.find_images(self.context, 'cirros', 'latest', True)
+        self.assertEqual([image], images)
+        self.glance.images.list.assert_called_with(
+            filters={'container_format': 'docker', 'name': 'cirros'})
+
+    def test_find_images_ambiguous_untagged(self):
+        self.glance.images.list.side_effect = [
+            [], [self._image('cirros'), self._image('cirros')]]
+        images = utils.find_images(self.context, 'cirros', 'latest', True)
+        self.assertEqual([], images)
+
+    def test_find_images_cached(self):
+        image = self._image('cirros', ['latest'])
+        self.glance.images.list.return_value = [image]
+        utils.find_images(self.context, 'cirros', 'latest', True)
+        images = utils.find_images(self.context, 'cirros', 'latest', True)
+        self.assertEqual([image], images)
+        self.assertEqual(1, self.glance.images.list.call_count)
+        self.assertEqual(1, self.mock_clients.call_count)
+
+    def test_find_images_not_found_not_cached(self):
+        self.glance.images.list.return_value = []
+        utils.find_images(self.context, 'cirros', None, True)
+        utils.find_images(self.context, 'cirros', None, True)
+        self.assertEqual(2, self.glance.images.list.call_count)
+        # The glance client is reused
+        self.assertEqual(1, self.mock_clients.call_count)
+
+    def test_find_images_cache_disabled(self):
+        self.config(image_lookup_cache_time=0, group='glance')
+        self.glance.images.list.return_value = [self._image('cirros')]
+        utils.find_images(self.context, 'cirros', None, True)
+        utils.find_images(self.context, 'cirros', None, True)
+        self.assertEqual(2, self.glance.images.list.call_count)
+        self.assertEqual(2, self.mock_clients.call_count)
+
+    @mock.patch('time.time')
+    def test_find_images_cache_expired(self, mock_time):
+        mock_time.return_value = 1000
+        self.glance.images.list.return_value = [self._image('cirros')]
+        utils.find_images(self.context, 'cirros', None, True)
+        mock_time.return_value = 1060
+        utils.find_images(self.context, 'cirros', None, True)
+        self.assertEqual(2, self.glance.images.list.call_count)
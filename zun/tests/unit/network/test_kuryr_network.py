@@ -75,11 +75,14 @@ class FakeNeutronClient(object):
                 port.update(port_data)
 
     def list_ports(self, **filters):
-        ports = list(self.ports)
+        ports = []
         for port in self.ports:
-            for attr in filters:
-                if port[attr] != filters[attr]:
-                    ports.remove(port)
+            for attr, value in filters.items():
+                values = value if isinstance(value, list) else [value]
+                if port[attr] not in values:
+                    break
+            else:
+                ports.append(port)
         return {'ports': copy.deepcopy(ports)}
 
     def delete_port(self, port_id):
@@ -316,3 +319,91 @@ class KuryrNetworkTestCase(base.TestCase):
         mock_update_port.assert_called_once_with(
             'fake-port-id',
             {'port': {'security_groups': ['sg1', 'sg2']}})
+
+    @mock.patch('zun.network.neutron.NeutronAPI')
+    def test_add_security_groups_to_ports_filters_ports(
+            self, mock_neutron_api_cls):
+        addresses = {'fake-net-id': [{'port': 'fake-port-id'}]}
+        container = Container(self.context, **utils.get_test_container(
+            addresses=addresses))
+        mock_neutron_api_cls.return_value = self.network_api.neutron_api
+        with mock.patch.object(self.network_api.neutron_api, 'list_ports',
+                               wraps=self.network_api.neutron_api.list_ports
+                               ) as mock_list_ports:
+            self.network_api.add_security_groups_to_ports(container, ['sg2'])
+            self.network_api.remove_security_groups_from_ports(container,
+                                                               ['sg2'])
+
+        mock_list_ports.assert_called_with(id=['fake-port-id'],
+                                           tenant_id=self.context.project_id)
+        # the admin client is created once and reused
+        self.assertEqual(1, mock_neutron_api_cls.call_count)
+
+    @mock.patch('zun.network.neutron.NeutronAPI')
+    def test_remove_security_groups_from_ports(self, mock_neutron_api_cls):
+        addresses = {'fake-net-id': [{'port': 'fake-port-id'}]}
+        container = Container(self.context, **utils.get_test_container(
+            addresses=addresses))
+        mock_neutron_api_cls.return_value = self.network_api.neutron_api
+        self.network_api.remove_security_groups_from_ports(container, ['sg1'])
+        port = self.network_api.neutron_api.list_ports(
+            id='fake-port-id')['ports'][0]
+        self.assertEqual([], port['security_groups'])
+
+    @mock.patch('zun.network.port_pool.NeutronPortPool.acquire')
+    def test_create_or_update_port_from_pool(self, mock_acquire):
+        mock_acquire.return_value = {'id': 'fake-port-id'}
+        container = Container(self.context, **utils.get_test_container())
+        requested_net = {'network': 'fake-net-id',
+                         'preserve_on_delete': False}
+        with mock.patch.object(self.network_api.neutron_api, 'update_port',
+                               return_value={'port': {
+                                   'id': 'fake-port-id',
+                                   'fixed_ips': [{
+                                       'ip_address': '10.5.0.22',
+                                       'subnet_id': 'fake-subnet-id'}]}}
+                               ) as mock_update_port, \
+                mock.patch.object(self.network_api.neutron_api,
+                                  'create_port') as mock_create_port:
+            addresses, port = self.network_api.create_or_update_port(
+                container, 'c02afe4e-8350-4263-8078', requested_net,
+                security_groups=['sg1'])
+
+        mock_acquire.assert_called_once_with(
+            '1234567', self.context.project_id, ['sg1'])
+        mock_update_port.assert_called_once_with(
+            'fake-port-id',
+            {'port': {'device_id': container.uuid, 'name': ''}})
+        self.assertFalse(mock_create_port.called)
+        self.assertEqual('fake-port-id', addresses[0]['port'])
+
+    @mock.patch('zun.network.port_pool.NeutronPortPool.discard')
+    @mock.patch('zun.network.port_pool.NeutronPortPool.acquire')
+    def test_create_or_update_port_pooled_port_failed(self, mock_acquire,
+                                                      mock_discard):
+        mock_acquire.return_value = {'id': 'pooled-port-id'}
+        container = Container(self.context, **utils.get_test_container())
+        requested_net = {'network': 'fake-net-id',
+                         'preserve_on_delete': False}
+        with mock.patch.object(self.network_api.neutron_api, 'update_port',
+                               side_effect=n_exc.NeutronClientException
+                               ) as mock_update_port, \
+                mock.patch.object(self.network_api.neutron_api,
+                                  'create_port',
+                                  return_value={'port': {
+                                      'id': 'fake-port-id',
+                                      'fixed_ips': [{
+                                          'ip_address': '10.5.0.22',
+                                          'subnet_id': 'fake-subnet-id'}]}}
+                                  ) as mock_create_port:
+            addresses, port = self.network_api.create_or_update_port(
+                container, 'c02afe4e-8350-4263-8078', requested_net,
+                security_groups=['sg1'])
+
+        mock_update_port.assert_called_once_with(
+            'pooled-port-id',
+            {'port': {'device_id': container.uuid, 'name': ''}})
+        # The pooled port is deleted and a new port is created instead
+        mock_discard.assert_called_once_with('pooled-port-id')
+        self.assertTrue(mock_create_port.called)
+        self.assertEqual('fake-port-id', addresses[0]['port'])
@@ -0,0 +1,67 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from zun.common import exception
+from zun.network import neutron
+from zun.tests import base
+
+
+class TestNeutronAPI(base.TestCase):
+
+    def setUp(self):
+        super(TestNeutronAPI, self).setUp()
+        p = mock.patch('zun.common.clients.OpenStackClients.neutron')
+        self.mock_neutron = p.start().return_value
+        self.addCleanup(p.stop)
+        self.network = {'id': 'net-id', 'name': 'net', 'shared': False}
+
+    def test_get_neutron_network_cached(self):
+        self.mock_neutron.list_networks.return_value = {
+            'networks': [self.network]}
+        neutron_api = neutron.NeutronAPI(self.context)
+        self.assertEqual(self.network, neutron_api.get_neutron_network('net'))
+        self.assertEqual(self.network,
+                         neutron.NeutronAPI(self.context).get_neutron_network(
+                             'net'))
+        self.mock_neutron.list_networks.assert_called_once_with(name='net')
+
+    def test_get_neutron_network_not_found_not_cached(self):
+        self.mock_neutron.list_networks.return_value = {'networks': []}
+        neutron_api = neutron.NeutronAPI(self.context)
+        self.assertRaises(exception.NetworkNotFound,
+                          neutron_api.get_neutron_network, 'net')
+        self.assertRaises(exception.NetworkNotFound,
+                          neutron_api.get_neutron_network, 'net')
+        self.assertEqual(2, self.mock_neutron.list_networks.call_count)
+
+    def test_get_neutron_network_cache_disabled(self):
+        self.config(metadata_cache_time=0, group='network')
+        self.mock_neutron.list_networks.return_value = {
+            'networks': [self.network]}
+        neutron_api = neutron.NeutronAPI(self.context)
+        neutron_api.get_neutron_network('net')
+        neutron_api.get_neutron_network('net')
+        self.assertEqual(2, self.mock_neutron.list_networks.call_count)
+
+    def test_list_security_groups(self):
+        self.mock_neutron.list_security_groups.return_value = {
+            'security_groups': [{'id': 'sg-id', 'name': 'default',
+                                 'rules': []}]}
+        expected = [{'id': 'sg-id', 'name': 'default'}]
+        self.assertEqual(expected, neutron.list_security_groups(self.context))
+        self.assertEqual(expected, neutron.list_security_groups(self.context))
+        self.mock_neutron.list_security_groups.assert_called_once_with(
+            tenant_id=self.context.project_id)
+        neutron.list_security_groups(self.context, refresh=True)
+        self.assertEqual(2, self.mock_neutron.list_security_groups.call_count)
@@ -0,0 +1,76 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+import zun.conf
+from zun.network import port_pool
+from zun.tests import base
+
+CONF = zun.conf.CONF
+
+
+@mock.patch('zun.common.utils.spawn_n',
+            lambda func, *args, **kwargs: func(*args, **kwargs))
+@mock.patch('zun.network.neutron.NeutronAPI')
+class TestNeutronPortPool(base.TestCase):
+
+    def setUp(self):
+        super(TestNeutronPortPool, self).setUp()
+        self.pool = port_pool.NeutronPortPool()
+        self.port_ids = iter(range(100))
+
+    def _create_port(self, port):
+        port = dict(port['port'], id='port-%d' % next(self.port_ids))
+        return {'port': port}
+
+    def test_acquire_disabled(self, mock_neutron_api_cls):
+        self.assertIsNone(self.pool.acquire('net', 'project', ['sg1']))
+        self.assertFalse(mock_neutron_api_cls.called)
+
+    def test_acquire_refills(self, mock_neutron_api_cls):
+        self.config(port_pool_size=2, group='network')
+        neutron_api = mock_neutron_api_cls.return_value
+        neutron_api.create_port.side_effect = self._create_port
+
+        # The first port starts the pool
+        self.assertIsNone(self.pool.acquire('net', 'project', ['sg2', 'sg1']))
+        self.assertEqual(2, neutron_api.create_port.call_count)
+        neutron_api.create_port.assert_called_with(
+            {'port': {'network_id': 'net', 'tenant_id': 'project',
+                      'name': 'zun-port-pool-%s' % CONF.host,
+                      'security_groups': ['sg1', 'sg2']}})
+
+        port = self.pool.acquire('net', 'project', ['sg1', 'sg2'])
+        self.assertEqual('port-0', port['id'])
+        self.assertEqual(3, neutron_api.create_port.call_count)
+        # Another set of security groups has its own pool
+        self.assertIsNone(self.pool.acquire('net', 'project', None))
+
+    def test_prune(self, mock_neutron_api_cls):
+        self.config(port_pool_size=1, group='network')
+        neutron_api = mock_neutron_api_cls.return_value
+        neutron_api.create_port.side_effect = self._create_port
+        neutron_api.list_ports.return_value = {
+            'ports': [{'id': 'port-0'}, {'id': 'stale-port'}]}
+        self.pool.acquire('net', 'project')
+
+        # The stale ports of a previous run are deleted once
+        self.pool.prune()
+        self.pool.prune()
+        neutron_api.delete_port.assert_called_once_with('stale-port')
+
+        neutron_api.delete_port.reset_mock()
+        self.config(port_pool_idle_time=0, group='network')
+        self.pool.prune()
+        neutron_api.delete_port.assert_called_once_with('port-0')
+        self.assertIsNone(self.pool.acquire('net', 'project'))
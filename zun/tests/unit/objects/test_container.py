@@ -57,6 +57,18 @@ class TestContainerObject(base.DbTestCase):
             self.assertIsInstance(containers[0], objects.Container)
             self.assertEqual(self.context, containers[0]._context)
 
+    def test_get_usages(self):
+        usages = {'containers': 2, 'cpu': 1.5, 'memory': 768, 'disk': 30}
+        with mock.patch.object(self.dbapi, 'count_usages',
+                               autospec=True) as mock_count_usages:
+            mock_count_usages.return_value = usages
+            self.assertEqual(usages, objects.Container.get_usages(
+                self.context, 'fake_project'))
+            self.assertEqual(768, objects.Container.get_count(
+                self.context, 'fake_project', 'memory'))
+            mock_count_usages.assert_called_with(self.context,
+                                                 'fake_project')
+
     def test_list_by_host(self):
         with mock.patch.object(self.dbapi, 'list_containers',
                                autospec=True) as mock_get_list:
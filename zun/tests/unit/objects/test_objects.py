@@ -344,18 +344,18 @@ class TestObject(test_base.TestCase, _TestObject):
 # For more information on object version testing, read
 # https://docs.openstack.org/zun/latest/
 object_data = {
-    'Container': '1.36-ad2bacdaa51afd0047e96003f93ff181',
+    'Container': '1.40-69a6f5a061129bb7790d85918851f5ed',
     'VolumeMapping': '1.2-2230102beda09cf5caabd130c600dc92',
     'Image': '1.1-330e6205c80b99b59717e1cfc6a79935',
     'MyObj': '1.0-34c4b1aadefd177b13f9a2f894cc23cd',
-    'NUMANode': '1.0-cba878b70b2f8b52f1e031b41ac13b4e',
+    'NUMANode': '1.0-f6f5568bf22d5698573c03d913c14428',
     'NUMATopology': '1.0-b54086eda7e4b2e6145ecb6ee2c925ab',
     'ResourceClass': '1.1-d661c7675b3cd5b8c3618b68ba64324e',
     'ResourceProvider': '1.0-92b427359d5a4cf9ec6c72cbe630ee24',
     'ZunService': '1.2-deff2a74a9ce23baa231ae12f39a6189',
     'Capsule': '1.6-7238a80b4ef34e219c135fa72d0adc06',
     'PciDevice': '1.1-6e3f0851ad1cf12583e6af4df1883979',
-    'ComputeNode': '1.12-12d7c4fdeb26d58e1988d8577c838512',
+    'ComputeNode': '1.14-0b7cbc4c11ebc2b0182c25d89bbd2ef0',
     'PciDevicePool': '1.0-3f5ddc3ff7bfa14da7f6c7e9904cc000',
     'PciDevicePoolList': '1.0-15ecf022a68ddbb8c2a6739cfc9f8f5e',
     'Quota': '1.2-3a7d520d119fe1e886baad968ef7990a',
@@ -366,6 +366,7 @@ object_data = {
     'ContainerActionEvent': '1.0-2974d0a6f5d4821fd4e223a88c10181a',
     'Network': '1.0-235ba13359282107f27c251af9aaffcd',
     'ExecInstance': '1.0-59464e7b96db847c0abb1e96d3cec30a',
+    'DirectoryMapping': '1.1-730d1362aff55b7e02b9c33d718b3702',
 }
 
 
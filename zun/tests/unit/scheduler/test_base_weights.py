@@ -0,0 +1,84 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Tests for base weights
+"""
+
+from zun.scheduler import base_weights
+from zun.scheduler import weights
+from zun.tests import base
+
+
+class TestWeigher(base.TestCase):
+    def test_no_multiplier(self):
+        class FakeWeigher(base_weights.BaseWeigher):
+            def _weigh_object(self, *args, **kwargs):
+                pass
+
+        self.assertEqual(1.0,
+                         FakeWeigher().weight_multiplier())
+
+    def test_no_weight_object(self):
+        class FakeWeigher(base_weights.BaseWeigher):
+            def weight_multiplier(self, *args, **kwargs):
+                pass
+        self.assertRaises(TypeError,
+                          FakeWeigher)
+
+    def test_normalization(self):
+        # weight_list, expected_result, minval, maxval
+        map_ = (
+            ((), (), None, None),
+            ((0.0, 0.0), (0.0, 0.0), None, None),
+            ((1.0, 1.0), (0.0, 0.0), None, None),
+
+            ((20.0, 50.0), (0.0, 1.0), None, None),
+            ((20.0, 50.0), (0.0, 0.375), None, 100.0),
+            ((20.0, 50.0), (0.4, 1.0), 0.0, None),
+            ((20.0, 50.0), (0.2, 0.5), 0.0, 100.0),
+        )
+        for seq, result, minval, maxval in map_:
+            ret = base_weights.normalize(seq, minval=minval, maxval=maxval)
+            self.assertEqual(tuple(ret), result)
+
+
+class TestWeightHandler(base.TestCase):
+    def _get_weigher(self, weights, multiplier=1.0):
+        class FakeWeigher(base_weights.BaseWeigher):
+            def weight_multiplier(self):
+                return multiplier
+
+            def _weigh_object(self, obj, container, extra_spec):
+                return weights[obj]
+        return FakeWeigher()
+
+    def test_get_weighed_objects(self):
+        handler = weights.HostWeightHandler()
+        weighers = [self._get_weigher({'a': 10, 'b': 20, 'c': 30}),
+                    self._get_weigher({'a': 4, 'b': 0, 'c': 1}, 2.0),
+                    self._get_weigher({'a': 1, 'b': 2, 'c': 3}, 0.0)]
+
+        weighed_objs = handler.get_weighed_objects(weighers, ['a', 'b', 'c'],
+                                                   None, {})
+
+        self.assertEqual(['a', 'c', 'b'], [o.obj for o in weighed_objs])
+        self.assertEqual([2.0, 1.5, 0.5], [o.weight for o in weighed_objs])
+
+    def test_get_weighed_objects_single_object(self):
+        handler = weights.HostWeightHandler()
+        weighers = [self._get_weigher({'a': 10})]
+
+        weighed_objs = handler.get_weighed_objects(weighers, ['a'], None, {})
+
+        self.assertEqual(['a'], [o.obj for o in weighed_objs])
+        self.assertEqual([0.0], [o.weight for o in weighed_objs])
@@ -10,13 +10,19 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
+
 import mock
+from oslo_utils import timeutils
+from oslo_utils import uuidutils
 
 from zun.api import servicegroup
 from zun.common import context
 from zun.common import exception
 from zun import objects
 from zun.scheduler import filter_scheduler
+from zun.scheduler import host_state
+from zun.scheduler import placement_client
 from zun.tests import base
 from zun.tests.unit.db import utils
 from zun.tests.unit.scheduler.fakes import FakeService
@@ -32,6 +38,26 @@ class FilterSchedulerTestCase(base.TestCase):
         self.context = context.RequestContext('fake_user', 'fake_project')
         self.driver = self.driver_cls()
 
+    def _get_fake_node(self, hostname, updated_at=None):
+        node = objects.ComputeNode(self.context)
+        node.cpus = 48
+        node.cpu_used = 0.0
+        node.mem_total = 1024 * 128
+        node.mem_used = 1024 * 4
+        node.mem_free = 1024 * 124
+        node.disk_total = 80
+        node.disk_used = 20
+        node.hostname = hostname
+        node.numa_topology = None
+        node.labels = {}
+        node.pci_device_pools = None
+        node.disk_quota_supported = True
+        node.runtimes = ['runc']
+        node.images = ['cirros:latest']
+        node.total_containers = 0
+        node.updated_at = updated_at or timeutils.utcnow()
+        return node
+
     @mock.patch.object(servicegroup.ServiceGroup, 'service_is_up')
     @mock.patch.object(objects.ComputeNode, 'list')
     @mock.patch.object(objects.ZunService, 'list_by_binary')
@@ -50,67 +76,18 @@ class FilterSchedulerTestCase(base.TestCase):
         self.driver.servicegroup_api.service_is_up = mock.Mock(
             return_value=True)
         mock_list_by_binary.side_effect = _return_services
-        test_container = utils.get_test_container()
+        test_container = utils.get_test_container(host=None)
+        test_container['cpu_policy'] = 'shared'
         containers = [objects.Container(self.context, **test_container)]
-        node1 = objects.ComputeNode(self.context)
-        node1.cpus = 48
-        node1.cpu_used = 0.0
-        node1.mem_total = 1024 * 128
-        node1.mem_used = 1024 * 4
-        node1.mem_free = 1024 * 124
-        node1.disk_total = 80
-        node1.disk_used = 20
-        node1.hostname = 'host1'
-        node1.numa_topology = None
-        node1.labels = {}
-        node1.pci_device_pools = None
-        node1.disk_quota_supported = True
-        node1.runtimes = ['runc']
-        node2 = objects.ComputeNode(self.context)
-        node2.cpus = 48
-        node2.cpu_used = 0.0
-        node2.mem_total = 1024 * 128
-        node2.mem_used = 1024 * 4
-        node2.mem_free = 1024 * 124
-        node2.disk_total = 80
-        node2.disk_used = 20
-        node2.hostname = 'host2'
-        node2.numa_topology = None
-        node2.labels = {}
-        node2.pci_device_pools = None
-        node2.disk_quota_supported = True
-        node2.runtimes = ['runc']
-        node3 = objects.ComputeNode(self.context)
-        node3.cpus = 48
-        node3.cpu_used = 0.0
-        node3.mem_total = 1024 * 128
-        node3.mem_used = 1024 * 4
-        node3.mem_free = 1024 * 124
-        node3.disk_total = 80
-        node3.disk_used = 20
-        node3.hostname = 'host3'
-        node3.numa_topology = None
-        node3.labels = {}
-        node3.pci_device_pools = None
-        node3.disk_quota_supported = True
-        node3.runtimes = ['runc']
-        node4 = objects.ComputeNode(self.context)
-        node4.cpus = 48
-        node4.cpu_used = 0.0
-        node4.mem_total = 1024 * 128
-        node4.mem_used = 1024 * 4
-        node4.mem_free = 1024 * 124
-        node4.disk_total = 80
-        node4.disk_used = 20
-        node4.hostname = 'host4'
-        node4.numa_topology = None
-        node4.labels = {}
-        node4.pci_device_pools = None
-        node4.disk_quota_supported = True
-        node4.runtimes = ['runc']
+        node1 = self._get_fake_node('host1')
+        node2 = self._get_fake_node('host2')
+        node3 = self._get_fake_node('host3')
+        node4 = self._get_fake_node('host4')
         nodes = [node1, node2, node3, node4]
         mock_compute_list.return_value = nodes
 
+        self.config(host_subset_size=4, group='scheduler')
+
         def side_effect(hosts):
             return hosts[2]
         mock_random_choice.side_effect = side_effect
@@ -124,6 +101,30 @@ class FilterSchedulerTestCase(base.TestCase):
         self.assertEqual('host3', host)
         self.assertIsNone(node)
 
+    @mock.patch.object(servicegroup.ServiceGroup, 'service_is_up')
+    @mock.patch.object(objects.ComputeNode, 'list')
+    @mock.patch.object(objects.ZunService, 'list_by_binary')
+    def test_select_destinations_weighed(self, mock_list_by_binary,
+                                         mock_compute_list,
+                                         mock_service_is_up):
+        mock_list_by_binary.return_value = [FakeService('service1', 'host1'),
+                                            FakeService('service2', 'host2'),
+                                            FakeService('service3', 'host3')]
+        nodes = [self._get_fake_node('host1'),
+                 self._get_fake_node('host2'),
+                 self._get_fake_node('host3')]
+        nodes[0].mem_used = 1024 * 64
+        nodes[2].mem_used = 1024 * 32
+        mock_compute_list.return_value = nodes
+        mock_service_is_up.return_value = True
+        test_container = utils.get_test_container(host=None)
+        test_container['cpu_policy'] = 'shared'
+        containers = [objects.Container(self.context, **test_container)]
+
+        dests = self.driver.select_destinations(self.context, containers, {})
+
+        self.assertEqual('host2', dests[0]['host'])
+
     @mock.patch.object(objects.ComputeNode, 'list')
     @mock.patch.object(objects.ZunService, 'list_by_binary')
     @mock.patch('random.choice')
@@ -143,3 +144,171 @@ class FilterSchedulerTestCase(base.TestCase):
         self.assertRaises(exception.NoValidHost,
                           self.driver.select_destinations, self.context,
                           containers, extra_spec)
+
+    @mock.patch.object(host_state.HostState, '_update_from_compute_node',
+                       autospec=True,
+                       side_effect=host_state.HostState.
+                       _update_from_compute_node)
+    @mock.patch.object(objects.ComputeNode, 'list')
+    @mock.patch.object(objects.ZunService, 'list_by_binary')
+    def test_get_all_host_state_only_rebuilds_changed_hosts(
+            self, mock_list_by_binary, mock_compute_list, mock_update):
+        mock_list_by_binary.return_value = [FakeService('service1', 'host1'),
+                                            FakeService('service2', 'host2')]
+        updated_at = timeutils.utcnow()
+        mock_compute_list.return_value = [
+            self._get_fake_node('host1', updated_at),
+            self._get_fake_node('host2', updated_at)]
+        host_states = self.driver.get_all_host_state(self.context)
+        self.assertEqual(2, len(host_states))
+        self.assertEqual(2, mock_update.call_count)
+
+        # Unchanged compute nodes keep their cached host state
+        host_states = self.driver.get_all_host_state(self.context)
+        self.assertEqual(2, len(host_states))
+        self.assertEqual(2, mock_update.call_count)
+
+        # Changed and previously selected hosts are rebuilt
+        self.driver.stale_hosts.add('host1')
+        node2 = self._get_fake_node(
+            'host2', updated_at + datetime.timedelta(seconds=1))
+        node2.mem_used = 1024 * 8
+        mock_compute_list.return_value = [
+            self._get_fake_node('host1', updated_at), node2]
+        host_states = self.driver.get_all_host_state(self.context)
+        self.assertEqual(4, mock_update.call_count)
+        self.assertEqual(1024 * 8,
+                         self.driver.host_state_map['host2'].mem_used)
+        self.assertEqual(set(), self.driver.stale_hosts)
+
+        # Hosts whose compute node disappeared are dropped
+        mock_compute_list.return_value = [
+            self._get_fake_node('host1', updated_at)]
+        host_states = self.driver.get_all_host_state(self.context)
+        self.assertEqual(['host1'], [h.hostname for h in host_states])
+
+    @mock.patch.object(objects.ComputeNode, 'get_by_name')
+    @mock.patch.object(objects.ComputeNode, 'list')
+    @mock.patch.object(objects.ZunService, 'list_by_binary')
+    def test_get_all_host_state_within_cache_time(
+            self, mock_list_by_binary, mock_compute_list, mock_get_by_name):
+        self.config(host_state_cache_time=60, group='scheduler')
+        mock_list_by_binary.return_value = [FakeService('service1', 'host1'),
+                                            FakeService('service2', 'host2')]
+        mock_compute_list.return_value = [self._get_fake_node('host1'),
+                                          self._get_fake_node('host2')]
+        self.driver.get_all_host_state(self.context)
+
+        node1 = self._get_fake_node('host1')
+        node1.mem_used = 1024 * 8
+        mock_get_by_name.return_value = node1
+        self.driver.stale_hosts.add('host1')
+        host_states = self.driver.get_all_host_state(self.context)
+
+        self.assertEqual(2, len(host_states))
+        self.assertEqual(1, mock_list_by_binary.call_count)
+        self.assertEqual(1, mock_compute_list.call_count)
+        mock_get_by_name.assert_called_once_with(self.context, 'host1')
+        self.assertEqual(1024 * 8,
+                         self.driver.host_state_map['host1'].mem_used)
+
+    @mock.patch.object(objects.ComputeNode, 'get_by_name')
+    @mock.patch.object(objects.ComputeNode, 'list')
+    @mock.patch.object(objects.ZunService, 'list_by_binary')
+    def test_get_all_host_state_keeps_hosts_selected_meanwhile(
+            self, mock_list_by_binary, mock_compute_list, mock_get_by_name):
+        self.config(host_state_cache_time=60, group='scheduler')
+        mock_list_by_binary.return_value = [FakeService('service1', 'host1'),
+                                            FakeService('service2', 'host2')]
+        mock_compute_list.return_value = [self._get_fake_node('host1'),
+                                          self._get_fake_node('host2')]
+        self.driver.get_all_host_state(self.context)
+
+        def get_by_name(context, hostname):
+            # Another request selects host2 while host1 is read
+            self.driver.stale_hosts.add('host2')
+            return self._get_fake_node(hostname)
+
+        mock_get_by_name.side_effect = get_by_name
+        self.driver.stale_hosts.add('host1')
+        self.driver.get_all_host_state(self.context)
+        mock_get_by_name.assert_called_once_with(self.context, 'host1')
+        self.assertEqual(set(['host2']), self.driver.stale_hosts)
+
+    @mock.patch.object(placement_client.SchedulerReportClient,
+                       'get_numa_topologies')
+    @mock.patch.object(objects.ComputeNode, 'list')
+    @mock.patch.object(objects.ZunService, 'list_by_binary')
+    def test_get_all_host_state_numa_topology_from_placement(
+            self, mock_list_by_binary, mock_compute_list,
+            mock_get_numa_topologies):
+        mock_list_by_binary.return_value = [FakeService('service1', 'host1'),
+                                            FakeService('service2', 'host2')]
+        nodes = []
+        for hostname in ('host1', 'host2'):
+            node = self._get_fake_node(hostname)
+            node.uuid = uuidutils.generate_uuid()
+            node.numa_topology = objects.NUMATopology(nodes=[
+                objects.NUMANode(id=0, cpuset=set([0, 1]),
+                                 pinned_cpus=set(), mem_total=1024,
+                                 mem_available=1024)])
+            nodes.append(node)
+        mock_compute_list.return_value = nodes
+        mock_get_numa_topologies.return_value = {
+            nodes[0].uuid: [{'id': 0, 'cpuset': [0, 1], 'pinned_cpus': [1],
+                             'memory_usage': 512}]}
+
+        self.driver.get_all_host_state(self.context)
+
+        mock_get_numa_topologies.assert_called_once_with(
+            [nodes[0].uuid, nodes[1].uuid])
+        numa_node1 = self.driver.host_state_map['host1'].numa_topology.nodes[0]
+        self.assertEqual(set([1]), numa_node1.pinned_cpus)
+        self.assertEqual(512, numa_node1.mem_available)
+        # Host missing from placement keeps the topology of the compute node
+        numa_node2 = self.driver.host_state_map['host2'].numa_topology.nodes[0]
+        self.assertEqual(set(), numa_node2.pinned_cpus)
+        self.assertEqual(1024, numa_node2.mem_available)
+
+    @mock.patch.object(servicegroup.ServiceGroup, 'service_is_up')
+    @mock.patch.object(objects.ComputeNode, 'list')
+    @mock.patch.object(objects.ZunService, 'list_by_binary')
+    def test_select_destinations_consumes_resources(self, mock_list_by_binary,
+                                                    mock_compute_list,
+                                                    mock_service_is_up):
+        mock_list_by_binary.return_value = [FakeService('service1', 'host1'),
+                                            FakeService('service2', 'host2')]
+        node1 = self._get_fake_node('host1')
+        node1.mem_total = 1024 * 2
+        node1.mem_used = 0
+        node2 = self._get_fake_node('host2')
+        node2.mem_total = 1024 * 3
+        node2.mem_used = 0
+        mock_compute_list.return_value = [node1, node2]
+        mock_service_is_up.return_value = True
+        containers = []
+        for i in range(4):
+            test_container = utils.get_test_container(
+                host=None, memory='1024', uuid=uuidutils.generate_uuid())
+            test_container['cpu_policy'] = 'shared'
+            containers.append(objects.Container(self.context,
+                                                **test_container))
+
+        dests = self.driver.select_destinations(self.context, containers, {})
+
+        self.assertEqual(['host2', 'host1', 'host2', 'host1'],
+                         [dest['host'] for dest in dests])
+        mock_compute_list.assert_called_once_with(self.context)
+        self.assertEqual(set(['host1', 'host2']), self.driver.stale_hosts)
+        # The resources are consumed from copies of the cached host states
+        self.assertEqual(0, self.driver.host_state_map['host1'].mem_used)
+        self.assertEqual(0, self.driver.host_state_map['host2'].mem_used)
+
+        # The consumption is dropped when the host states are rebuilt, and
+        # the two hosts only have room for five containers
+        dests = self.driver.select_destinations(self.context,
+                                                containers[:1], {})
+        self.assertEqual('host2', dests[0]['host'])
+        self.assertRaises(exception.NoValidHost,
+                          self.driver.select_destinations, self.context,
+                          containers + containers[:2], {})
@@ -0,0 +1,96 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from zun.common import context
+from zun import objects
+from zun.tests import base
+from zun.tests.unit.scheduler import fakes
+
+
+class HostStateTestCase(base.TestCase):
+    """Test case for HostState class."""
+
+    def setUp(self):
+        super(HostStateTestCase, self).setUp()
+        self.context = context.RequestContext('fake_user', 'fake_project')
+
+    def _get_container(self, **kwargs):
+        container = objects.Container(self.context)
+        container.memory = kwargs.get('memory', '512')
+        container.cpu = kwargs.get('cpu', 1.0)
+        container.disk = kwargs.get('disk', 10)
+        container.cpu_policy = kwargs.get('cpu_policy', 'shared')
+        return container
+
+    def test_consume_from_request(self):
+        host = fakes.FakeHostState('host1', {
+            'mem_total': 2048, 'mem_used': 512, 'mem_free': 1536,
+            'cpus': 8, 'cpu_used': 1.0, 'disk_total': 80, 'disk_used': 20,
+            'total_containers': 1, 'pci_stats': mock.Mock()})
+        pci_requests = mock.Mock(requests=['fake_request'])
+
+        host.consume_from_request(self._get_container(),
+                                  {'pci_requests': pci_requests})
+
+        self.assertEqual(1024, host.mem_used)
+        self.assertEqual(1024, host.mem_free)
+        self.assertEqual(2.0, host.cpu_used)
+        self.assertEqual(30, host.disk_used)
+        self.assertEqual(2, host.total_containers)
+        host.pci_stats.apply_requests.assert_called_once_with(
+            ['fake_request'])
+
+    def test_consume_from_request_dedicated(self):
+        numa_topology = objects.NUMATopology(nodes=[
+            objects.NUMANode(id=0, cpuset=set([0, 1, 2, 3]),
+                             pinned_cpus=set([0]), mem_total=1024,
+                             mem_available=1024),
+            objects.NUMANode(id=1, cpuset=set([4, 5, 6, 7]),
+                             pinned_cpus=set(), mem_total=1024,
+                             mem_available=1024)])
+        host = fakes.FakeHostState('host1', {
+            'mem_total': 2048, 'cpus': 8, 'disk_total': 80,
+            'numa_topology': numa_topology})
+        host.limits['cpuset'] = {'node': 0}
+
+        host.consume_from_request(
+            self._get_container(cpu=2, cpu_policy='dedicated'), {})
+
+        self.assertEqual(set([0, 1, 2]), numa_topology.nodes[0].pinned_cpus)
+        self.assertEqual(512, numa_topology.nodes[0].mem_available)
+        self.assertEqual(set(), numa_topology.nodes[1].pinned_cpus)
+        self.assertEqual(2, host.cpu_used)
+
+    def test_copy(self):
+        numa_topology = objects.NUMATopology(nodes=[
+            objects.NUMANode(id=0, cpuset=set([0, 1, 2, 3]),
+                             pinned_cpus=set(), mem_total=1024,
+                             mem_available=1024)])
+        host = fakes.FakeHostState('host1', {
+            'mem_total': 2048, 'mem_used': 0, 'mem_free': 2048, 'cpus': 8,
+            'disk_total': 80, 'numa_topology': numa_topology})
+        host_copy = host.copy()
+        host_copy.limits['cpuset'] = {'node': 0}
+
+        host_copy.consume_from_request(
+            self._get_container(cpu=2, cpu_policy='dedicated'), {})
+
+        self.assertEqual(512, host_copy.mem_used)
+        self.assertEqual(set([0, 1]),
+                         host_copy.numa_topology.nodes[0].pinned_cpus)
+        # The copied state is left as is
+        self.assertEqual(0, host.mem_used)
+        self.assertEqual({}, host.limits)
+        self.assertEqual(set(), numa_topology.nodes[0].pinned_cpus)
+        self.assertEqual(1024, numa_topology.nodes[0].mem_available)
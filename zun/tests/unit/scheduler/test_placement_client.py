@@ -0,0 +1,43 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from zun.scheduler import placement_client
+from zun.tests import base
+
+
+class SchedulerReportClientTestCase(base.TestCase):
+
+    def setUp(self):
+        super(SchedulerReportClientTestCase, self).setUp()
+        self.client = placement_client.SchedulerReportClient()
+
+    @mock.patch.object(placement_client.SchedulerReportClient, 'get')
+    def test_get_numa_topologies(self, mock_get):
+        cells = [{'id': 0, 'cpuset': [0, 1], 'pinned_cpus': [],
+                  'memory_usage': 0}]
+
+        def _get(url, version=None):
+            resp = mock.Mock(headers={})
+            if 'rp2' in url:
+                resp.status_code = 404
+                return resp
+            resp.status_code = 200
+            resp.json.return_value = {'numa_topologies': cells}
+            return resp
+        mock_get.side_effect = _get
+
+        topologies = self.client.get_numa_topologies(['rp1', 'rp2', 'rp3'])
+
+        self.assertEqual({'rp1': cells, 'rp3': cells}, topologies)
+        self.assertEqual(3, mock_get.call_count)
@@ -0,0 +1,56 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from zun import objects
+from zun.scheduler import weights
+from zun.scheduler.weights import image_locality
+from zun.tests import base
+from zun.tests.unit.scheduler import fakes
+
+
+class TestImageLocalityWeigher(base.TestCase):
+
+    def setUp(self):
+        super(TestImageLocalityWeigher, self).setUp()
+        self.weight_handler = weights.HostWeightHandler()
+        self.weighers = [image_locality.ImageLocalityWeigher()]
+
+    def _get_weighed_hosts(self, image):
+        container = objects.Container(self.context)
+        container.image = image
+        container.image_driver = 'docker'
+        hosts = [
+            fakes.FakeHostState('host1', {'images': {'nginx:latest'}}),
+            fakes.FakeHostState('host2', {'images': {'cirros:latest',
+                                                     'cirros:0.4'}}),
+            fakes.FakeHostState('host3', {'images': set()}),
+        ]
+        return self.weight_handler.get_weighed_objects(self.weighers, hosts,
+                                                       container, {})
+
+    def test_prefer_hosts_with_image(self):
+        weighed_hosts = self._get_weighed_hosts('docker.io/cirros:0.4')
+        self.assertEqual('host2', weighed_hosts[0].obj.hostname)
+        self.assertEqual(1.0, weighed_hosts[0].weight)
+        self.assertEqual([0.0, 0.0],
+                         [host.weight for host in weighed_hosts[1:]])
+
+    def test_image_not_present(self):
+        weighed_hosts = self._get_weighed_hosts('busybox')
+        self.assertEqual([0.0, 0.0, 0.0],
+                         [host.weight for host in weighed_hosts])
+
+    def test_image_locality_weight_multiplier_zero(self):
+        self.config(image_locality_weight_multiplier=0.0, group='scheduler')
+        weighed_hosts = self._get_weighed_hosts('nginx')
+        self.assertEqual([0.0, 0.0, 0.0],
+                         [host.weight for host in weighed_hosts])
@@ -0,0 +1,61 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from zun.common import context
+from zun import objects
+from zun.scheduler import weights
+from zun.scheduler.weights import numa
+from zun.tests import base
+from zun.tests.unit.scheduler import fakes
+
+
+class TestNUMAWeigher(base.TestCase):
+
+    def setUp(self):
+        super(TestNUMAWeigher, self).setUp()
+        self.context = context.RequestContext('fake_user', 'fake_project')
+        self.weight_handler = weights.HostWeightHandler()
+        self.weighers = [numa.NUMAWeigher()]
+
+    def _get_numa_topology(self, *free_cpus):
+        nodes = []
+        for i, free in enumerate(free_cpus):
+            nodes.append(objects.NUMANode(
+                id=i, cpuset=set(range(8)),
+                pinned_cpus=set(range(8 - free)),
+                mem_total=1024, mem_available=1024))
+        return objects.NUMATopology(nodes=nodes)
+
+    def _get_weighed_hosts(self, cpu_policy):
+        container = objects.Container(self.context)
+        container.cpu_policy = cpu_policy
+        container.cpu = 2
+        hosts = [
+            fakes.FakeHostState('host1', {
+                'numa_topology': self._get_numa_topology(1, 3)}),
+            fakes.FakeHostState('host2', {
+                'numa_topology': self._get_numa_topology(6, 2)}),
+            fakes.FakeHostState('host3', {
+                'numa_topology': self._get_numa_topology(1, 1)}),
+        ]
+        return self.weight_handler.get_weighed_objects(self.weighers, hosts,
+                                                       container, {})
+
+    def test_dedicated_container(self):
+        weighed_hosts = self._get_weighed_hosts('dedicated')
+        self.assertEqual(['host2', 'host1', 'host3'],
+                         [host.obj.hostname for host in weighed_hosts])
+
+    def test_shared_container(self):
+        weighed_hosts = self._get_weighed_hosts('shared')
+        self.assertEqual([0.0, 0.0, 0.0],
+                         [host.weight for host in weighed_hosts])
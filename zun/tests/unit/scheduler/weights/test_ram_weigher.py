@@ -0,0 +1,48 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from zun.scheduler import weights
+from zun.scheduler.weights import ram
+from zun.tests import base
+from zun.tests.unit.scheduler import fakes
+
+
+class TestRAMWeigher(base.TestCase):
+
+    def setUp(self):
+        super(TestRAMWeigher, self).setUp()
+        self.weight_handler = weights.HostWeightHandler()
+        self.weighers = [ram.RAMWeigher()]
+
+    def _get_weighed_hosts(self):
+        hosts = [
+            fakes.FakeHostState('host1', {'mem_total': 1024,
+                                          'mem_used': 512}),
+            fakes.FakeHostState('host2', {'mem_total': 2048,
+                                          'mem_used': 512}),
+            fakes.FakeHostState('host3', {'mem_total': 1024,
+                                          'mem_used': 1000}),
+        ]
+        return self.weight_handler.get_weighed_objects(self.weighers, hosts,
+                                                       None, {})
+
+    def test_default_of_spreading_first(self):
+        weighed_hosts = self._get_weighed_hosts()
+        self.assertEqual('host2', weighed_hosts[0].obj.hostname)
+        self.assertEqual(1.0, weighed_hosts[0].weight)
+
+    def test_ram_weight_multiplier_negative(self):
+        self.config(ram_weight_multiplier=-1.0, group='scheduler')
+        weighed_hosts = self._get_weighed_hosts()
+        self.assertEqual('host3', weighed_hosts[0].obj.hostname)
+        self.assertEqual(0.0, weighed_hosts[0].weight)
+        self.assertEqual(-1.0, weighed_hosts[-1].weight)